@@ -0,0 +1,248 @@
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from dataclasses import dataclass
+
+from ceo_lookup import CeoLookup
+from extract_QA import get_analysis_result, get_result_row, get_result_status, read_ceo_file, save_to_file
+from extraction_utilities import get_processed_doc_from_file
+from generate_synthetic_corpus import generate_corpus
+
+STAGES = ('extraction', 'analysis', 'output')
+
+# interval between two samples of the resident set size
+RSS_SAMPLE_INTERVAL = 0.005
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_current_rss() -> int:
+    """resident set size of this process in bytes, the peak so far when
+    /proc is not available
+
+    Returns:
+        int: resident set size in bytes
+    """
+    try:
+        with open('/proc/self/statm', 'r') as statm_file:
+            return int(statm_file.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is in kB on linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class StageStatistics:
+    """
+    Time spent in a stage of the pipeline and the largest resident set size seen during it
+    """
+    num_docs : int = 0
+    num_pages : int = 0
+    seconds : float = 0.
+    peak_rss : int = 0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.num_docs/self.seconds if self.seconds > 0 else 0.
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.num_pages/self.seconds if self.seconds > 0 else 0.
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class StageMonitor:
+    """
+    Times the stages of the pipeline. A background thread samples the resident
+    set size and adds each sample to the stage running at that moment, so the
+    peak of a stage includes the allocations made and freed inside it.
+    """
+
+    def __init__(self,
+                 sample_interval : float = RSS_SAMPLE_INTERVAL):
+
+        self.sample_interval = sample_interval
+        self.statistics = {stage : StageStatistics() for stage in STAGES}
+        self.current_stage = None
+
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample_rss, daemon=True)
+
+    def __enter__(self):
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.sampler.join()
+
+    def sample_rss(self) -> None:
+        while not self.stopped.wait(self.sample_interval):
+            self.record_rss(self.current_stage)
+
+    def record_rss(self,
+                   stage : str) -> None:
+        if stage is not None:
+            stage_statistics = self.statistics[stage]
+            stage_statistics.peak_rss = max(stage_statistics.peak_rss, get_current_rss())
+
+    def add_pages(self,
+                  num_pages : int) -> None:
+        """count the pages of a document in every stage
+        """
+        for stage_statistics in self.statistics.values():
+            stage_statistics.num_pages = stage_statistics.num_pages + num_pages
+
+    def run(self,
+            stage : str,
+            function,
+            *args):
+        """call function(*args) as part of a stage
+
+        Args:
+            stage (str): one of STAGES
+
+        Returns:
+            the value returned by function
+        """
+        stage_statistics = self.statistics[stage]
+
+        self.current_stage = stage
+        self.record_rss(stage)
+        start_time_point = time.perf_counter()
+
+        value = function(*args)
+
+        stage_statistics.seconds = stage_statistics.seconds + time.perf_counter() - start_time_point
+        self.record_rss(stage)
+        self.current_stage = None
+
+        stage_statistics.num_docs = stage_statistics.num_docs + 1
+
+        return value
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def write_results_row(output_file,
+                      num : int,
+                      result) -> None:
+    output_file.write(get_result_row(num, result, get_result_status(result))+'\n')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def run_benchmark(file_paths : list,
+                  output_dir_path : str,
+                  ceo_lookup : CeoLookup,
+                  columnar : bool = False,
+                  lazy : bool = False,
+                  prescan : bool = False) -> dict:
+    """run the pipeline of extract_QA on every pdf in this process, one document
+    at a time, timing the extraction, the analysis and the output separately.
+    With lazy the pages extracted on demand are counted in the analysis.
+
+    Args:
+        file_paths (list): list of file paths to pdf documents
+        output_dir_path (str): directory the answers and the results table are written to
+        ceo_lookup (CeoLookup): fallback table of CEO names by company and year
+        columnar (bool): store the text_blocks in ColumnarDocuments
+        lazy (bool): only extract the pages of a pdf which are accessed
+        prescan (bool): skip the full extraction of pdfs without a Q&A section
+
+    Returns:
+        dict: StageStatistics by stage
+    """
+    with StageMonitor() as monitor, \
+         open(os.path.join(output_dir_path, 'results_table.dat'), 'w+', encoding='UTF-8') as output_file:
+
+        for num, file_path in enumerate(file_paths):
+
+            processed_doc = monitor.run('extraction', get_processed_doc_from_file,
+                                        file_path, None, columnar, lazy, prescan)
+            monitor.add_pages(processed_doc.num_pages)
+
+            result = monitor.run('analysis', get_analysis_result, processed_doc, ceo_lookup)
+
+            monitor.run('output', save_to_file, [result], output_dir_path)
+            write_results_row(output_file, num, result)
+
+            del processed_doc
+
+    return monitor.statistics
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_statistics(statistics : dict) -> None:
+
+    print(f'{"stage":<12}{"docs":>8}{"pages":>8}{"seconds":>10}{"docs/sec":>10}{"pages/sec":>11}{"peak RSS MB":>13}')
+
+    for stage, stage_statistics in statistics.items():
+        print(f'{stage:<12}'
+              f'{stage_statistics.num_docs:>8}'
+              f'{stage_statistics.num_pages:>8}'
+              f'{stage_statistics.seconds:>10.3f}'
+              f'{stage_statistics.docs_per_second:>10.1f}'
+              f'{stage_statistics.pages_per_second:>11.1f}'
+              f'{stage_statistics.peak_rss/1024**2:>13.1f}')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def main():
+    """
+    Generate a synthetic corpus, or reuse an existing one, and report the
+    throughput and peak memory of each stage of the pipeline
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the QA extraction pipeline on a synthetic corpus')
+    parser.add_argument('--corpus-dir', default=None,
+                        help='directory of the corpus, a temporary corpus is generated if not given')
+    parser.add_argument('--generate', action='store_true',
+                        help='generate the corpus in --corpus-dir before running the benchmark')
+    parser.add_argument('--num-docs', type=int, default=20)
+    parser.add_argument('--min-pages', type=int, default=10)
+    parser.add_argument('--max-pages', type=int, default=40)
+    parser.add_argument('--no-qa-fraction', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--columnar', action='store_true',
+                        help='store the extracted text_blocks in flat arrays')
+    parser.add_argument('--lazy', action='store_true',
+                        help='only extract the pages of a pdf which are searched')
+    parser.add_argument('--prescan', action='store_true',
+                        help='scan the plain text for a Q&A section before extracting a pdf')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+
+        corpus_dir = args.corpus_dir
+        if corpus_dir is None:
+            corpus_dir = os.path.join(temp_dir, 'corpus')
+
+        if args.corpus_dir is None or args.generate:
+            start_time_point = time.time()
+            generate_corpus(corpus_dir, args.num_docs, args.min_pages, args.max_pages,
+                            args.no_qa_fraction, args.seed)
+            print(f'Generated : {time.time() - start_time_point}')
+
+        file_paths = sorted(os.path.join(dir_path, file_name)
+                            for dir_path, _, file_names in os.walk(corpus_dir)
+                            for file_name in file_names if file_name.endswith('.pdf'))
+        print(f'# of files: {len(file_paths)}')
+
+        ceo_lookup = CeoLookup({})
+        if os.path.isfile('./docs/company_name_ceo.csv'):
+            ceo_lookup = CeoLookup(read_ceo_file())
+
+        output_dir_path = os.path.join(temp_dir, 'output')
+        os.makedirs(output_dir_path)
+
+        statistics = run_benchmark(file_paths, output_dir_path, ceo_lookup,
+                                   args.columnar, args.lazy, args.prescan)
+
+    display_statistics(statistics)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+
+from processed_document import DocumentTextBlock
+
+# blocks further away than this are never the previous block
+MAX_PREVIOUS_BLOCK_DIST = 1000.
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class BlockGeometry:
+    """
+    Layout queries on a range of text blocks, e.g. a participants section.
+    The bounding boxes are kept in a NumPy array for the distance queries and
+    the blocks are indexed by their (y_1, y_2) row for the same line queries.
+    """
+
+    def __init__(self,
+                 text_blocks : list):
+
+        self.text_blocks = text_blocks
+
+        self.bboxes = np.array([(text_block.x_1, text_block.y_1, text_block.x_2, text_block.y_2)
+                                for text_block in text_blocks], dtype=float).reshape(-1, 4)
+
+        # (y_1, y_2) -> x_1 of the blocks on that row
+        self.rows = {}
+        for text_block in text_blocks:
+            self.rows.setdefault((text_block.y_1, text_block.y_2), set()).add(text_block.x_1)
+
+    @property
+    def num_text_blocks(self) -> int:
+        return len(self.text_blocks)
+
+    def get_previous_text_block(self,
+                                target_text_block : DocumentTextBlock,
+                                max_dist : float = MAX_PREVIOUS_BLOCK_DIST) -> DocumentTextBlock:
+        """the block whose top right corner is closest to the top left corner of the
+        target, the first block if none is closer than max_dist. Same result as
+        extraction_utilities.get_previous_text_block.
+
+        Args:
+            target_text_block (DocumentTextBlock): block to the right of the one searched for
+            max_dist (float): largest distance of the previous block
+
+        Returns:
+            DocumentTextBlock: the previous block
+        """
+        if self.num_text_blocks == 0:
+            return self.text_blocks[0]
+
+        dists = np.hypot(self.bboxes[:, 2] - target_text_block.x_1,
+                         self.bboxes[:, 1] - target_text_block.y_1)
+
+        # argmin returns the first of equally close blocks
+        nearest_idx = int(np.argmin(dists))
+
+        if not dists[nearest_idx] < max_dist:
+            nearest_idx = 0
+
+        return self.text_blocks[nearest_idx]
+
+    def only_block_on_line(self,
+                           target_text_block : DocumentTextBlock) -> bool:
+        """check that no other block has the same top and bottom as the target,
+        blocks starting at the same position as the target are not counted
+
+        Args:
+            target_text_block (DocumentTextBlock): block being checked
+
+        Returns:
+            bool: True if the target is alone on its line
+        """
+        row = self.rows.get((target_text_block.y_1, target_text_block.y_2), ())
+
+        for x_1 in row:
+            if x_1 != target_text_block.x_1:
+                return False
+
+        return True
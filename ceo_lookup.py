@@ -0,0 +1,248 @@
+import re
+import unicodedata
+
+import numpy as np
+
+# similarity of the trigrams of two company names above which they are the same company
+MIN_COMPANY_SIMILARITY = 0.8
+
+# ratio of the lengths of two normalized company names below which they are
+# not the same company, however similar, e.g. 'enbridge gas' and 'enbridge'
+MIN_LENGTH_RATIO = 0.8
+
+# legal forms dropped from the end of a company name, a transcript often
+# writes them differently from the table or leaves them out
+LEGAL_FORMS = frozenset(['inc', 'incorporated', 'corp', 'corporation', 'co', 'company',
+                         'ltd', 'limited', 'plc', 'llc', 'lp', 'sa', 'ag', 'nv'])
+
+NON_ALPHANUMERIC_PATTERN = re.compile('[^a-z0-9]+')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def normalize_company_name(company_name : str) -> str:
+    """canonical form of a company name: accents removed, lower case, '&'
+    spelled 'and', punctuation, a leading 'the' and the trailing legal forms
+    removed, e.g. 'The Maple & Birch Co., Inc.' -> 'maple and birch'
+
+    Args:
+        company_name (str): name of the company
+
+    Returns:
+        str: normalized name
+    """
+    name = unicodedata.normalize('NFKD', company_name).encode('ascii', 'ignore').decode('ascii')
+    name = name.lower().replace('&', ' and ')
+
+    words = [word for word in NON_ALPHANUMERIC_PATTERN.split(name) if word != '']
+
+    if len(words) > 1 and words[0] == 'the':
+        words = words[1:]
+
+    while len(words) > 1 and words[-1] in LEGAL_FORMS:
+        words = words[:-1]
+
+    return ' '.join(words)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_trigrams(normalized_name : str) -> set:
+    """character trigrams of a normalized name, padded so the first and last
+    characters of the name are in as many trigrams as the others
+    """
+    padded_name = f'  {normalized_name} '
+
+    return {padded_name[idx:idx+3] for idx in range(len(padded_name) - 2)}
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class CeoLookup:
+    """
+    Fallback table of CEO names by company and year, indexed by normalized
+    company name and by character trigram. A company name found in a
+    transcript is looked up exactly after normalization, then with the Dice
+    similarity of the trigram sets among the names of about the same length. The number of trigrams each company shares
+    with the name is counted in one pass over the posting lists of the
+    trigrams of the name, so a lookup does not compare the name with every
+    company of the table.
+
+    The indices are built once and only read afterwards, so the lookup is
+    sent to the workers with their initializer instead of each worker parsing
+    the table. Each worker remembers the names it has already looked up.
+    """
+
+    def __init__(self,
+                 company_ceo_dict : dict,
+                 min_similarity : float = MIN_COMPANY_SIMILARITY,
+                 min_length_ratio : float = MIN_LENGTH_RATIO):
+        """
+        Args:
+            company_ceo_dict (dict): company name -> year -> CEO name, as returned by read_ceo_file
+            min_similarity (float): trigram similarity needed for a fuzzy match
+            min_length_ratio (float): ratio of the lengths of the normalized names
+                needed for a fuzzy match
+        """
+        self.min_similarity = min_similarity
+        self.min_length_ratio = min_length_ratio
+
+        self.company_names = list(company_ceo_dict.keys())
+        self.company_ceos = [company_ceo_dict[company_name] for company_name in self.company_names]
+
+        # normalized name -> index of the first company with that name
+        self.normalized_index = {}
+        # trigram -> indices of the companies containing it
+        trigram_index = {}
+        num_trigrams = []
+        name_lengths = []
+
+        for company_idx, company_name in enumerate(self.company_names):
+            normalized_name = normalize_company_name(company_name)
+            self.normalized_index.setdefault(normalized_name, company_idx)
+
+            trigrams = get_trigrams(normalized_name)
+            num_trigrams.append(len(trigrams))
+            name_lengths.append(len(normalized_name))
+
+            for trigram in trigrams:
+                trigram_index.setdefault(trigram, []).append(company_idx)
+
+        self.trigram_index = {trigram : np.array(posting_list, dtype=np.int32)
+                              for trigram, posting_list in trigram_index.items()}
+        self.num_trigrams = np.array(num_trigrams, dtype=np.int32)
+        self.name_lengths = np.array(name_lengths, dtype=np.int32)
+
+        # company name -> (index found, -1 if none, True if found by similarity),
+        # filled as names are looked up, a name of the table is its own match
+        self.found_companies = {company_name : (company_idx, False) for company_idx, company_name in enumerate(self.company_names)}
+
+    def __len__(self) -> int:
+        return len(self.company_names)
+
+    def find_company_idx(self,
+                         company_name : str) -> int:
+        """index of the company of the table matching company_name
+
+        Args:
+            company_name (str): company name found in a transcript
+
+        Returns:
+            int: index of the company, -1 if no company is similar enough
+        """
+        return self.find_company_match(company_name)[0]
+
+    def find_company_match(self,
+                           company_name : str) -> tuple:
+        """index of the company of the table matching company_name and how it matched
+
+        Args:
+            company_name (str): company name found in a transcript
+
+        Returns:
+            tuple: index of the company, -1 if no company is similar enough, and
+                True if the normalized names differ and the match is only by similarity
+        """
+        company_match = self.found_companies.get(company_name)
+        if company_match is not None:
+            return company_match
+
+        normalized_name = normalize_company_name(company_name)
+
+        company_idx = self.normalized_index.get(normalized_name, -1)
+        fuzzy = False
+
+        if company_idx == -1:
+            company_idx = self.find_similar_company_idx(get_trigrams(normalized_name), len(normalized_name))
+            fuzzy = company_idx != -1
+
+        company_match = (company_idx, fuzzy)
+        self.found_companies[company_name] = company_match
+
+        return company_match
+
+    def find_similar_company_idx(self,
+                                 trigrams : set,
+                                 name_length : int) -> int:
+        """index of the company whose trigrams are the most similar to trigrams,
+        among the companies whose name is about as long. A name which only
+        adds or drops a word, e.g. 'Enbridge Gas' and 'Enbridge', shares most
+        of its trigrams with the other but is a different company.
+
+        Args:
+            trigrams (set): trigrams of the normalized company name
+            name_length (int): length of the normalized company name
+
+        Returns:
+            int: index of the company, the first one of the table in case of a tie,
+                -1 if no company reaches min_similarity
+        """
+        posting_lists = [self.trigram_index[trigram] for trigram in trigrams if trigram in self.trigram_index]
+
+        if len(posting_lists) == 0:
+            return -1
+
+        num_shared = np.bincount(np.concatenate(posting_lists), minlength=len(self.company_names))
+        similarities = 2*num_shared/(len(trigrams) + self.num_trigrams)
+
+        length_ratios = np.minimum(self.name_lengths, name_length)/np.maximum(np.maximum(self.name_lengths, name_length), 1)
+        similarities[length_ratios < self.min_length_ratio] = 0
+
+        company_idx = int(np.argmax(similarities))
+
+        if similarities[company_idx] < self.min_similarity:
+            return -1
+
+        return company_idx
+
+    def find_company(self,
+                     company_name : str) -> str:
+        """name in the table of the company matching company_name
+
+        Returns:
+            str: company name of the table, '' if no company is similar enough
+        """
+        company_idx = self.find_company_idx(company_name)
+
+        if company_idx == -1:
+            return ''
+
+        return self.company_names[company_idx]
+
+    def get_ceo_name(self,
+                     company_name : str,
+                     report_year) -> str:
+        """CEO of a company in the year of the report
+
+        Args:
+            company_name (str): company name found in a transcript
+            report_year: year of the report, as a string or an int
+
+        Returns:
+            str: name of the CEO, '' if the company or the year is not in the table
+        """
+        return self.get_ceo_match(company_name, report_year)[0]
+
+    def get_ceo_match(self,
+                      company_name : str,
+                      report_year) -> tuple:
+        """CEO of a company in the year of the report, with the company of the
+        table it was found under
+
+        Args:
+            company_name (str): company name found in a transcript
+            report_year: year of the report, as a string or an int
+
+        Returns:
+            tuple: name of the CEO, company name of the table and True if the
+                company names only matched by similarity, ('', '', False) if the
+                company or the year is not in the table
+        """
+        company_idx, fuzzy = self.find_company_match(company_name)
+
+        if company_idx == -1:
+            return '', '', False
+
+        ceo_name = self.company_ceos[company_idx].get(str(report_year), '')
+
+        if ceo_name == '':
+            return '', '', False
+
+        return ceo_name, self.company_names[company_idx], fuzzy
@@ -1,6 +1,8 @@
 import unicodedata
 import re
 
+from token_alignment import align_token_lists, get_multiset_residuals
+
 ANSWER_DIR_PATH = '/home/nickschiell/storage/DolloramaData/Transcripts/TestData/Answers/Bloomberg/'
 
 #ANSWER_DIR_PATH = '/home/nickschiell/storage/DolloramaData/Transcripts/TestData/Answers/Refinitiv/'
@@ -108,17 +110,7 @@ def get_unique_list_token(input_list) -> list:
 def get_residuals(list_1 : list, 
                   list_2 : list) -> (list, list):
     
-    residual_1 = []
-    residual_2 = list_2
-    
-    for item in list_1:
-        
-        if item in residual_2:
-            residual_2.remove(item)
-        else:
-            residual_1.append(item)
-
-    return residual_1, residual_2
+    return get_multiset_residuals(list_1, list_2)
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -130,28 +122,14 @@ def compare_lists(list_1 : list,
     Args:
         list_1 (list): first list to be compared
         list_2 (list): second list to be compared
-    """
-
-    list_1_missed = []
 
-    while len(list_1) > 0:
-
-        # starting at the beginning of list_1 find the longest unique sublist
-        unique_sub_list = get_unique_list_token(list_1)
-        
-        # find instances of the unique sublist in list_2
-        idx_list = find_sub_list(unique_sub_list, list_2)
-
-        # if list 2 does not contain the unique sublist
-        if  len(idx_list) == 0:
-            list_1_missed = list_1_missed + unique_sub_list
-        else:
-            idx = idx_list[0]
-            list_2 = list_2[0:idx]+list_2[idx+len(unique_sub_list):]
+    Returns:
+        (list, list): tokens of list_1 missing from list_2 and extra tokens of list_2
+    """
 
-        list_1 = list_1[len(unique_sub_list):]   
-    
-    return get_residuals(list_1_missed, list_2)
+    # same cut into unique sublists as get_unique_list_token and find_sub_list,
+    # computed with a suffix array instead of rescanning the lists
+    return align_token_lists(list_1, list_2)
 
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
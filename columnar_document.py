@@ -0,0 +1,238 @@
+from array import array
+from bisect import bisect_left
+
+from unidecode import unidecode
+
+from heading_matcher import as_heading_matcher
+from processed_document import DocumentLine, DocumentTextBlock, FontRegistry, ProcessedDocument, TextBlockView
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class ColumnarDocument(ProcessedDocument):
+    """
+    ProcessedDocument which stores its text blocks in flat arrays instead of a list
+    of DocumentTextBlocks. Block coordinates and page numbers are kept in arrays,
+    the lines of block i are lines block_line_offsets[i] to block_line_offsets[i+1],
+    the text of line j is text_store[line_text_offsets[j]:line_text_offsets[j+1]]
+    and each line refers to a font in the font_registry by its id.
+
+    DocumentTextBlocks are only built when they are accessed and are kept for the
+    next access, the heading searches work directly on the arrays.
+    """
+
+    def __init__(self,
+                 file_path : str = ''):
+
+        self.file_path = file_path
+        self.provider_name = ''
+        self.readable = True
+
+        self.font_registry = FontRegistry()
+
+        self.bboxes = array('d')
+        self.page_numbers = array('i')
+        self.block_line_offsets = array('i', [0])
+        self.line_font_ids = array('i')
+        self.line_text_offsets = array('i', [0])
+
+        self._text_store = ''
+        self._text_chunks = []
+
+        self.font_block_index = None
+        self.heading_index = None
+        self.block_page_numbers = None
+
+        self.prescan_result = None
+        self.font_statistics = None
+
+        # block index -> DocumentTextBlock built on first access
+        self.text_blocks = {}
+
+        self.document_text_blocks = TextBlockView(self)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_text_store'] = self.text_store
+        state['_text_chunks'] = []
+        state['font_block_index'] = None
+        state['heading_index'] = None
+        state['font_statistics'] = None
+        state['text_blocks'] = {}
+        del state['document_text_blocks']
+        return state
+
+    def __setstate__(self, state : dict) -> None:
+        self.text_blocks = {}
+        self.__dict__.update(state)
+        self.document_text_blocks = TextBlockView(self)
+
+    @property
+    def num_text_blocks(self) -> int:
+        return len(self.page_numbers)
+
+    @property
+    def num_lines(self) -> int:
+        return len(self.line_font_ids)
+
+    @property
+    def text_store(self) -> str:
+        """all the line text of the document in a single string
+        """
+        if len(self._text_chunks) > 0:
+            self._text_store = self._text_store + ''.join(self._text_chunks)
+            self._text_chunks = []
+
+        return self._text_store
+
+    def add_text_block(self,
+                       text_block : dict,
+                       page_number : int) -> None:
+        """Add a text block, as returned by page.get_text("dict"), to the document
+
+        Args:
+            text_block (dict): text block to be added
+            page_number (int): page the text block is on
+        """
+        self.bboxes.extend(text_block['bbox'])
+        self.page_numbers.append(page_number)
+
+        text_length = self.line_text_offsets[-1]
+
+        for line in text_block['lines']:
+            for span in line['spans']:
+                text = unidecode(span['text'])
+                text_length = text_length + len(text)
+
+                self._text_chunks.append(text)
+                self.line_text_offsets.append(text_length)
+                self.line_font_ids.append(self.font_registry.get_font_id(span['font'], span['size'], span['color']))
+
+        self.block_line_offsets.append(self.num_lines)
+
+        self.invalidate_heading_index()
+
+    def get_text_block(self,
+                       idx : int) -> DocumentTextBlock:
+
+        if idx > self.num_text_blocks:
+            idx = self.num_text_blocks
+        if idx < 0:
+            idx = idx + self.num_text_blocks
+        if idx < 0 or idx >= self.num_text_blocks:
+            raise IndexError('text block index out of range')
+
+        text_block = self.text_blocks.get(idx)
+        if text_block is not None:
+            return text_block
+
+        text_store = self.text_store
+
+        # the text is stored normalized and the fonts interned, so the lines
+        # are built from the arrays without going through a span dict
+        lines = [DocumentLine.from_font_id(text_store[self.line_text_offsets[line_idx]:self.line_text_offsets[line_idx+1]],
+                                           self.line_font_ids[line_idx],
+                                           self.font_registry)
+                 for line_idx in range(self.block_line_offsets[idx], self.block_line_offsets[idx+1])]
+
+        text_block = DocumentTextBlock.from_lines(lines, self.bboxes[4*idx:4*idx+4], self.page_numbers[idx])
+        self.text_blocks[idx] = text_block
+
+        return text_block
+
+    def get_page_start_idx(self,
+                           page_number : int) -> int:
+
+        if page_number == -1:
+            return -1
+
+        # blocks are added in page order
+        return bisect_left(self.page_numbers, page_number)
+
+    def get_page_text_blocks(self,
+                             page_number : int) -> list:
+
+        start_idx = self.get_page_start_idx(page_number)
+        end_idx = self.get_page_start_idx(page_number+1)
+
+        return [self.get_text_block(idx) for idx in range(start_idx, end_idx)]
+
+    def get_heading_idx(self,
+                        titles,
+                        font_dict: dict,
+                        start_idx = -1,
+                        end_idx = -1) -> int:
+        """find the section heading, only the lines in the heading font are searched
+
+        Args:
+            titles (HeadingMatcher | list): titles of the section
+            font_dict (dict): font type used in headings
+
+        Returns:
+            int: index of text_block containing the heading
+        """
+
+        if start_idx == -1:
+            start_idx = 0
+        if end_idx == -1:
+            end_idx = self.num_text_blocks
+
+        heading_matcher = as_heading_matcher(titles)
+        font_ids = self.get_matching_font_ids(font_dict)
+
+        text_store = self.text_store
+        block_indices = self.get_font_block_indices(font_dict)
+
+        for idx in block_indices[bisect_left(block_indices, start_idx):]:
+            if idx >= end_idx:
+                break
+
+            for line_idx in range(self.block_line_offsets[idx], self.block_line_offsets[idx+1]):
+                if self.line_font_ids[line_idx] in font_ids:
+                    text = text_store[self.line_text_offsets[line_idx]:self.line_text_offsets[line_idx+1]]
+
+                    if heading_matcher.search(text):
+                        return idx
+
+        return -1
+
+    def build_font_block_index(self) -> dict:
+        """map each font id to the sorted indices of the blocks which use it
+
+        Returns:
+            dict: font id -> list of block indices
+        """
+        font_block_index = {}
+
+        for idx in range(self.num_text_blocks):
+            line_font_ids = self.line_font_ids[self.block_line_offsets[idx]:self.block_line_offsets[idx+1]]
+
+            for font_id in set(line_font_ids):
+                font_block_index.setdefault(font_id, []).append(idx)
+
+        return font_block_index
+
+    @classmethod
+    def from_processed_document(cls,
+                                processed_document : ProcessedDocument):
+        """convert a list based ProcessedDocument to the columnar layout
+
+        Args:
+            processed_document (ProcessedDocument): document to convert
+
+        Returns:
+            ColumnarDocument: the converted document
+        """
+        columnar_document = cls(processed_document.file_path)
+
+        for text_block in processed_document.document_text_blocks:
+            spans = [{'text' : line.text,
+                      'font' : line.font_name,
+                      'size' : line.font_size,
+                      'color' : line.font_colour} for line in text_block.lines]
+
+            block = {'bbox' : (text_block.x_1, text_block.y_1, text_block.x_2, text_block.y_2),
+                     'lines' : [{'spans' : spans}]}
+
+            columnar_document.add_text_block(block, text_block.page_number)
+
+        return columnar_document
@@ -0,0 +1,250 @@
+import concurrent.futures
+import functools
+import re
+import zlib
+
+import fitz
+import numpy as np
+from unidecode import unidecode
+
+# pages of the pdf the fingerprint is computed from
+FINGERPRINT_PAGES = 3
+
+# number of consecutive words in a shingle
+SHINGLE_SIZE = 5
+
+# MinHash signature of NUM_PERMUTATIONS values cut into NUM_BANDS bands, two
+# documents are compared if all the values of one of their bands are equal,
+# which is likely above a similarity of (1/NUM_BANDS)**(1/rows per band) ~ 0.42
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 32
+
+# estimated Jaccard similarity of the shingles above which two documents are duplicates
+SIMILARITY_THRESHOLD = 0.5
+
+# largest prime below 2**32, the hash of a shingle and the permutation
+# parameters are below 2**32 so a*x + b fits in 64 bits
+PERMUTATION_PRIME = 4294967291
+
+WORD_PATTERN = re.compile('[a-z0-9]+')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_first_pages_text(file_path : str,
+                         num_pages : int = FINGERPRINT_PAGES) -> str:
+    """plain text of the first pages of a pdf
+
+    Args:
+        file_path (str): file path to the pdf
+        num_pages (int): number of pages read
+
+    Returns:
+        str: the text, '' if the pdf can not be opened
+    """
+    try:
+        with fitz.open(file_path) as fitz_doc:
+            return '\n'.join(fitz_doc[page_number].get_text('text')
+                             for page_number in range(min(num_pages, fitz_doc.page_count)))
+    except (OSError, RuntimeError):
+        return ''
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_shingle_hashes(text : str,
+                       shingle_size : int = SHINGLE_SIZE) -> np.ndarray:
+    """32 bit hashes of the distinct word shingles of a text, the words are
+    lower case and stripped of accents and punctuation so the layout of the
+    provider does not change them
+
+    Args:
+        text (str): text being hashed
+        shingle_size (int): number of words in a shingle
+
+    Returns:
+        np.ndarray: unique uint64 hashes, empty if the text has fewer words than a shingle
+    """
+    words = WORD_PATTERN.findall(unidecode(text).lower())
+
+    shingles = {' '.join(words[idx:idx+shingle_size]) for idx in range(len(words) - shingle_size + 1)}
+
+    return np.array([zlib.crc32(shingle.encode('UTF-8')) for shingle in shingles], dtype=np.uint64)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_minhash_signature(shingle_hashes : np.ndarray,
+                          permutations : np.ndarray) -> np.ndarray:
+    """minimum of each permutation (a*x + b) mod PERMUTATION_PRIME over the shingles
+
+    Args:
+        shingle_hashes (np.ndarray): hashes of the shingles
+        permutations (np.ndarray): (2, NUM_PERMUTATIONS) array of the a and b parameters
+
+    Returns:
+        np.ndarray: the signature, None if there are no shingles
+    """
+    if len(shingle_hashes) == 0:
+        return None
+
+    a, b = permutations
+
+    return ((np.outer(a, shingle_hashes) + b[:, np.newaxis]) % PERMUTATION_PRIME).min(axis=1)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_document_signature(file_path : str,
+                           permutations : np.ndarray,
+                           num_pages : int = FINGERPRINT_PAGES) -> np.ndarray:
+    """MinHash signature of the first pages of a pdf, run in the workers
+
+    Returns:
+        np.ndarray: the signature, None if the pdf has no text
+    """
+    return get_minhash_signature(get_shingle_hashes(get_first_pages_text(file_path, num_pages)), permutations)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class DuplicateDetector:
+    """
+    Finds the transcripts of the same call, e.g. a re-download or the
+    Bloomberg and Refinitiv copies, from a MinHash signature of the shingles
+    of their first pages. Locality sensitive hashing of the bands of the
+    signatures gives the candidate pairs without comparing every pair of the
+    corpus, the candidates whose signatures agree on at least threshold of
+    their values are grouped together.
+    """
+
+    def __init__(self,
+                 num_permutations : int = NUM_PERMUTATIONS,
+                 num_bands : int = NUM_BANDS,
+                 threshold : float = SIMILARITY_THRESHOLD,
+                 num_pages : int = FINGERPRINT_PAGES,
+                 seed : int = 1):
+
+        if num_permutations % num_bands != 0:
+            raise ValueError(f'{num_permutations} permutations can not be cut into {num_bands} bands')
+
+        self.num_bands = num_bands
+        self.threshold = threshold
+        self.num_pages = num_pages
+
+        rng = np.random.default_rng(seed)
+        self.permutations = rng.integers(1, PERMUTATION_PRIME, size=(2, num_permutations), dtype=np.uint64)
+
+    def get_signatures(self,
+                       file_paths : list,
+                       max_workers : int = None) -> list:
+        """MinHash signature of each pdf, computed in parallel
+
+        Args:
+            file_paths (list): list of file paths to pdf documents
+            max_workers (int): number of worker processes
+
+        Returns:
+            list: signature of each pdf, None for pdfs without text
+        """
+        get_signature = functools.partial(get_document_signature,
+                                          permutations=self.permutations,
+                                          num_pages=self.num_pages)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(get_signature, file_paths, chunksize=16))
+
+    def get_candidate_pairs(self,
+                            signatures : list,
+                            num_known : int = 0) -> set:
+        """pairs of documents sharing at least one band of their signatures
+
+        Args:
+            signatures (list): signature of each document, None are skipped
+            num_known (int): number of signatures at the start of signatures which
+                are not paired with each other
+
+        Returns:
+            set: (idx, idx) pairs of indices into signatures
+        """
+        buckets = {}
+
+        for idx, signature in enumerate(signatures):
+            if signature is None:
+                continue
+
+            for band_number, band in enumerate(np.split(signature, self.num_bands)):
+                buckets.setdefault((band_number, band.tobytes()), []).append(idx)
+
+        candidate_pairs = set()
+
+        for indices in buckets.values():
+            for pos, idx in enumerate(indices):
+                for other_idx in indices[pos+1:]:
+                    # the indices of a bucket are in increasing order
+                    if other_idx >= num_known:
+                        candidate_pairs.add((idx, other_idx))
+
+        return candidate_pairs
+
+    def find_duplicates(self,
+                        file_paths : list,
+                        max_workers : int = None,
+                        signatures : list = None,
+                        known_signatures : dict = None) -> dict:
+        """group the near-duplicate pdfs, the first pdf of a group in file_paths is
+        the canonical one which is processed. A pdf processed before, given by
+        known_signatures, is the canonical pdf of the group it falls in.
+
+        Args:
+            file_paths (list): list of file paths to pdf documents
+            max_workers (int): number of worker processes computing the signatures
+            signatures (list): signature of each pdf of file_paths, computed with
+                get_signatures if not given
+            known_signatures (dict): file path -> signature of the pdfs processed before
+
+        Returns:
+            dict: file path of each duplicate of file_paths -> file path of its canonical pdf
+        """
+        if signatures is None:
+            signatures = self.get_signatures(file_paths, max_workers)
+
+        if known_signatures is None:
+            known_signatures = {}
+
+        # the pdfs processed before come first, so they are the roots of their groups
+        all_file_paths = list(known_signatures.keys()) + list(file_paths)
+        all_signatures = list(known_signatures.values()) + list(signatures)
+        num_known = len(known_signatures)
+
+        # union-find over the indices, the root of a group is its lowest index
+        parents = list(range(len(all_file_paths)))
+
+        def find_root(idx : int) -> int:
+            while parents[idx] != idx:
+                parents[idx] = parents[parents[idx]]
+                idx = parents[idx]
+            return idx
+
+        for idx, other_idx in self.get_candidate_pairs(all_signatures, num_known):
+            similarity = np.mean(all_signatures[idx] == all_signatures[other_idx])
+
+            if similarity >= self.threshold:
+                root, other_root = sorted((find_root(idx), find_root(other_idx)))
+                parents[other_root] = root
+
+        return {all_file_paths[idx] : all_file_paths[find_root(idx)] for idx in range(num_known, len(all_file_paths))
+                if find_root(idx) != idx}
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_duplicates_of(duplicates : dict) -> dict:
+    """invert the duplicate mapping
+
+    Args:
+        duplicates (dict): file path of each duplicate -> file path of its canonical pdf
+
+    Returns:
+        dict: file path of each canonical pdf -> list of the file paths of its duplicates
+    """
+    duplicates_of = {}
+
+    for file_path, canonical_file_path in duplicates.items():
+        duplicates_of.setdefault(canonical_file_path, []).append(file_path)
+
+    return duplicates_of
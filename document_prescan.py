@@ -0,0 +1,90 @@
+import re
+from dataclasses import dataclass
+
+from heading_matcher import HeadingMatcher
+
+# company header of the Bloomberg and Refinitiv transcripts
+HEADER_PATTERN = re.compile(r'Company Name: |Q[0-9] 2[0-9]*')
+
+PARTICIPANTS_HEADING_MATCHER = HeadingMatcher(['Company Participants', 'CORPORATE PARTICIPANTS'])
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class DocumentPreScan:
+    """
+    Pages of interest found in the plain text of a pdf before any text block
+    is extracted, -1 if the page was not found
+    """
+    num_pages : int = 0
+    header_page : int = -1
+    participants_page : int = -1
+    qa_page : int = -1
+
+    @property
+    def qa_section_found(self) -> bool:
+        return self.qa_page != -1
+
+    def scan_page(self,
+                  page_number : int,
+                  page_text : str,
+                  qa_heading_matcher : HeadingMatcher,
+                  participants_matcher : HeadingMatcher = PARTICIPANTS_HEADING_MATCHER,
+                  header_pattern : re.Pattern = HEADER_PATTERN,
+                  header_pages : int = None) -> bool:
+        """look for the pages of interest in the plain text of the next page
+
+        Args:
+            page_number (int): page the text is from, the pages are scanned in order
+            page_text (str): plain text of the page
+            qa_heading_matcher (HeadingMatcher): titles of the Q&A section
+            participants_matcher (HeadingMatcher): titles of the participants section
+            header_pattern (re.Pattern): company header
+            header_pages (int): number of first pages the header is looked for on,
+                every page if None
+
+        Returns:
+            bool: True if one of the pages of interest is found on this page
+        """
+        found = False
+
+        if self.header_page == -1 and (header_pages is None or page_number < header_pages) and header_pattern.search(page_text):
+            self.header_page = page_number
+            found = True
+
+        if self.participants_page == -1 and participants_matcher.search(page_text):
+            self.participants_page = page_number
+            found = True
+
+        if self.qa_page == -1 and qa_heading_matcher.search(page_text):
+            self.qa_page = page_number
+            found = True
+
+        return found
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def prescan_page_texts(page_texts : list,
+                       qa_heading_matcher : HeadingMatcher,
+                       participants_matcher : HeadingMatcher = PARTICIPANTS_HEADING_MATCHER) -> DocumentPreScan:
+    """find the first page with the company header, the participants heading
+    and a Q&A heading. The plain text contains the text of every font, so a
+    page that is not found here can not contain the heading.
+
+    Args:
+        page_texts (list): plain text of each page
+        qa_heading_matcher (HeadingMatcher): titles of the Q&A section
+        participants_matcher (HeadingMatcher): titles of the participants section
+
+    Returns:
+        DocumentPreScan: pages found
+    """
+    prescan = DocumentPreScan(num_pages=len(page_texts))
+
+    for page_number, page_text in enumerate(page_texts):
+        prescan.scan_page(page_number, page_text, qa_heading_matcher, participants_matcher)
+
+        if prescan.qa_section_found:
+            break
+
+    return prescan
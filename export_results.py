@@ -0,0 +1,99 @@
+import argparse
+import os
+
+from extract_QA import get_file_name, get_result_row, display_status_counts
+from result_store import ResultStore
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def export_text_files(result_store : ResultStore,
+                      output_dir_path : str) -> int:
+    """write the answers of every stored result to its own text file, with the
+    names and layout of extract_QA.save_to_file. The names in use are listed
+    once instead of checking each candidate name on disk. The answers of a
+    near-duplicate are in the file of its canonical pdf.
+
+    Args:
+        result_store (ResultStore): store the results are read from
+        output_dir_path (str): directory the text files are written to
+
+    Returns:
+        int: number of files written
+    """
+    os.makedirs(output_dir_path, exist_ok=True)
+
+    used_file_names = set(os.listdir(output_dir_path))
+    num_files = 0
+
+    for result, _ in result_store.get_results():
+
+        if result.duplicate_of != '':
+            continue
+
+        file_counter = 0
+        file_name = get_file_name(result, file_counter)
+
+        while file_name in used_file_names:
+            file_counter = file_counter + 1
+            file_name = get_file_name(result, file_counter)
+
+        used_file_names.add(file_name)
+
+        with open(os.path.join(output_dir_path, file_name), 'w+', encoding='UTF-8') as out:
+            for answer in result.answer_text:
+                out.write(answer+'\n')
+
+        num_files = num_files + 1
+
+    return num_files
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def export_results_table(result_store : ResultStore,
+                         results_table_path : str) -> dict:
+    """write the '+' delimited results table of extract_QA.display_results
+
+    Args:
+        result_store (ResultStore): store the results are read from
+        results_table_path (str): path to the results table
+
+    Returns:
+        dict: number of results per status
+    """
+    status_counts = {}
+
+    with open(results_table_path, 'w+', encoding='UTF-8') as output_file:
+        for num, (result, status) in enumerate(result_store.get_results()):
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+            output_file.write(get_result_row(num, result, status)+'\n')
+
+    return status_counts
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def main():
+    """
+    Export a result store to the legacy text files and results table
+    """
+    parser = argparse.ArgumentParser(description='Export a result store to one text file per result')
+    parser.add_argument('store_path')
+    parser.add_argument('--output-dir', default=None,
+                        help='directory the text files are written to')
+    parser.add_argument('--results-table', default=None,
+                        help='path the results table is written to')
+    args = parser.parse_args()
+
+    with ResultStore(args.store_path) as result_store:
+
+        if args.output_dir is not None:
+            num_files = export_text_files(result_store, args.output_dir)
+            print(f'# of files: {num_files}')
+
+        if args.results_table is not None:
+            display_status_counts(export_results_table(result_store, args.results_table))
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import glob
 import os
 import time
@@ -5,12 +6,64 @@ import random
 
 import concurrent.futures
 
+from contextlib import nullcontext
+import dataclasses
+
 from extract_QA_bloomberg import process_bloomberg_doc
 from extract_QA_refinitiv import process_refinitiv_doc
 from extraction_utilities import get_processed_doc_from_file, AnalysisResults, ProcessedDocument
+from extraction_cache import ExtractionCache
+from ceo_lookup import CeoLookup
+from dedup import DuplicateDetector, get_duplicates_of
+from manifest import FAILURE_STATUSES, RETRY_STATUSES, Manifest, get_file_hash, get_pipeline_version
+from prefetch import PdfPrefetcher, get_task_data
+from result_store import ResultStore
+from scheduling import PoolUtilization, TaskScheduler, get_pool_size, get_tasks
+from providers import DEFAULT_PROVIDER, REFINITIV, Provider, get_provider, sniff_processed_doc
+from pipeline_trace import DocumentTrace, TraceWriter, start_trace, stop_trace, trace_count, trace_stage
+from worker_profiling import WorkerProfiler, merge_profiles, write_allocation_report
 
 OUTPUT_PATH = './output'
-    
+RESULTS_TABLE_PATH = 'results_table.dat'
+CEO_FILE_PATH = './docs/company_name_ceo.csv'
+
+MAX_WORKERS = 30
+MAX_IN_FLIGHT = 2*MAX_WORKERS
+
+# documents analysed between two prunes of the extraction cache in streaming mode
+CACHE_PRUNE_INTERVAL = 1000
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclasses.dataclass
+class WorkerOptions:
+    """
+    Options of the extraction and analysis of a run, built once by the parent
+    and sent to each worker by init_analysis_worker.
+    """
+    # cache of previously extracted documents
+    extraction_cache : ExtractionCache = None
+    # store the text_blocks in ColumnarDocuments
+    columnar : bool = False
+    # only extract the pages of a pdf which are accessed
+    lazy : bool = False
+    # skip the full extraction of pdfs without a Q&A section
+    prescan : bool = False
+    # time the stages of each document
+    trace : bool = False
+    # profiles a sample of the documents in the worker
+    profiler : WorkerProfiler = None
+    # company -> year -> CEO lookup, the CEO table is read by the worker if not given
+    ceo_lookup : CeoLookup = None
+    # hash the content of each pdf for the manifest, from its bytes if they were prefetched
+    hash_content : bool = False
+    # report the pdfs identified by neither their first page nor their path as
+    # Unknown Format instead of analysing them as DEFAULT_PROVIDER
+    strict_provider : bool = False
+
+# options of the worker process, set by init_analysis_worker
+worker_options = WorkerOptions()
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def get_data_file_paths() -> list:
@@ -60,7 +113,7 @@ def get_processed_documents(file_paths : list) -> list:
     """
     processed_documents = []
 
-    with concurrent.futures.ProcessPoolExecutor(max_workers=30) as executor:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
 
         future_results = [executor.submit(get_processed_doc_from_file, fp) for fp in file_paths]
         for finished in concurrent.futures.as_completed(future_results):
@@ -70,8 +123,43 @@ def get_processed_documents(file_paths : list) -> list:
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+def get_analysis_result(processed_doc : ProcessedDocument,
+                        ceo_lookup : CeoLookup = None,
+                        default_provider : Provider = DEFAULT_PROVIDER) -> AnalysisResults:
+    """route a single document to the analysis for its data provider, identified
+    from the fonts and markers of its first page rather than from its path
+
+    Args:
+        processed_doc (ProcessedDocument): document to analyse
+        ceo_lookup (CeoLookup): fallback table of CEO names by company and year
+        default_provider (Provider): provider of a document identified by neither
+            its first page nor its path, reported as Unknown Format if None
+
+    Returns:
+        AnalysisResults: results of the analysis
+    """
+
+    if not processed_doc.readable:
+        return AnalysisResults(file_path=processed_doc.file_path, file_readable=False)
+
+    provider = get_provider(processed_doc.provider_name)
+
+    if provider is None:
+        provider = sniff_processed_doc(processed_doc, default_provider)
+
+    if provider is None:
+        # the format is not analysed rather than read as the wrong provider
+        return AnalysisResults(file_path=processed_doc.file_path, format_identified=False)
+
+    if provider is REFINITIV:
+        return process_refinitiv_doc(processed_doc)
+    else:
+        return process_bloomberg_doc(processed_doc,ceo_lookup)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 def get_analysis_results(processed_documents : list,
-                         company_ceo_dict : dict) -> list:
+                         ceo_lookup : CeoLookup = None) -> list:
     """give a list of list of texblocks for a single document this function
     performs the analysis to extract the required data
 
@@ -86,12 +174,7 @@ def get_analysis_results(processed_documents : list,
 
     for processed_doc in processed_documents:
   
-        result = None
-
-        if "Refinitiv" in processed_doc.file_path:
-            result = process_refinitiv_doc(processed_doc)
-        else:
-            result = process_bloomberg_doc(processed_doc,company_ceo_dict)
+        result = get_analysis_result(processed_doc, ceo_lookup)
         
         if result is not None:
             results.append(result)
@@ -100,6 +183,160 @@ def get_analysis_results(processed_documents : list,
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+def init_analysis_worker(options : WorkerOptions = None) -> None:
+    """ProcessPoolExecutor initializer, sets the options and the CEO lookup of the worker
+
+    Args:
+        options (WorkerOptions): options of the run, the defaults if not given
+    """
+    global worker_options
+
+    if options is None:
+        options = WorkerOptions()
+
+    if options.ceo_lookup is None:
+        options = dataclasses.replace(options, ceo_lookup=CeoLookup(read_ceo_file()))
+
+    worker_options = options
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def analyse_file(file_path : str,
+                 file_data : bytes = None) -> AnalysisResults:
+    """worker task which extracts and analyses a single pdf so that only the
+    AnalysisResults are sent back to the parent process
+
+    Args:
+        file_path (str): file path to the pdf
+        file_data (bytes): content of the pdf if it was prefetched
+
+    Returns:
+        AnalysisResults: results of the analysis
+    """
+    options = worker_options
+
+    default_provider = None if options.strict_provider else DEFAULT_PROVIDER
+
+    if options.trace:
+        start_trace(file_path)
+
+    profile_context = nullcontext()
+    if options.profiler is not None:
+        profile_context = options.profiler.profile(file_path)
+
+    try:
+        with profile_context:
+            processed_doc = get_processed_doc_from_file(file_path, options.extraction_cache, options.columnar, options.lazy,
+                                                        options.prescan, file_data, default_provider)
+
+            result = get_analysis_result(processed_doc, options.ceo_lookup, default_provider)
+
+        if options.hash_content:
+            with trace_stage('hash'):
+                result.content_hash = get_file_hash(file_path, file_data)
+    finally:
+        # a failed document does not leave its trace open for the next one
+        trace = stop_trace()
+
+    result.trace = trace
+
+    return result
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def analyse_files(file_paths : list,
+                  file_datas : list = None) -> (list, int, float):
+    """worker task which runs analyse_file on a group of pdfs, an error only
+    fails the file which raised it
+
+    Args:
+        file_paths (list): file paths to the pdfs
+        file_datas (list): content of each pdf if they were prefetched
+
+    Returns:
+        (list, int, float): (file_path, AnalysisResults, exception) of each file,
+            pid of the worker and time spent on the task
+    """
+    start_time_point = time.perf_counter()
+
+    task_results = []
+
+    for idx, file_path in enumerate(file_paths):
+        file_data = file_datas[idx] if file_datas is not None else None
+
+        try:
+            task_results.append((file_path, analyse_file(file_path, file_data), None))
+        except Exception as e:
+            task_results.append((file_path, None, e))
+
+    return task_results, os.getpid(), time.perf_counter() - start_time_point
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_analysis_results_from_files(file_paths : list,
+                                    options : WorkerOptions = None,
+                                    scheduler : TaskScheduler = None) -> list:
+    """extract and analyse the pdfs in parallel, each worker runs the
+    complete pipeline for a document
+
+    Args:
+        file_paths (list): list of file paths to pdf documents
+        options (WorkerOptions): options sent to the workers
+        scheduler (TaskScheduler): sizes the pool and groups the files into tasks,
+            MAX_WORKERS workers and one file per task if not given
+
+    Returns:
+        list: list of AnalysisResults
+    """
+    results = []
+
+    num_workers = MAX_WORKERS if scheduler is None else scheduler.num_workers
+    utilization = PoolUtilization(num_workers)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers,
+                                                initializer=init_analysis_worker,
+                                                initargs=(options,)) as executor:
+
+        future_results = [executor.submit(analyse_files, task) for task in get_tasks(file_paths, scheduler)]
+        for finished in concurrent.futures.as_completed(future_results):
+            task_results, pid, seconds = finished.result()
+            utilization.add_task(pid, seconds)
+
+            for _, result, error in task_results:
+                if error is not None:
+                    raise error
+
+                if result is not None:
+                    results.append(result)
+
+    utilization.stop()
+    utilization.display()
+
+    return results
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_file_name(result : AnalysisResults,
+                  file_counter : int) -> str:
+    """name of the output file of a result, file_counter tells apart the
+    results of the same CEO, company and year
+
+    Args:
+        result (AnalysisResults): results of the analysis
+        file_counter (int): number added at the end of the name
+
+    Returns:
+        str: file name
+    """
+    file_name = f'{result.ceo_name}_{result.company_name}_{result.report_year}_{file_counter}.txt'
+
+    file_name = file_name.replace(' ', '_')
+    file_name = file_name.replace('/','_')
+
+    return file_name
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 def generate_file_name(result : AnalysisResults,
                        output_dir_path : str) -> str:
     """_summary_
@@ -118,10 +355,7 @@ def generate_file_name(result : AnalysisResults,
     
     while file_exists:
                 
-        file_name = f'{result.ceo_name}_{result.company_name}_{result.report_year}_{file_counter}.txt'
-        
-        file_name = file_name.replace(' ', '_')
-        file_name = file_name.replace('/','_')
+        file_name = get_file_name(result, file_counter)
 
         file_path = os.path.join(output_dir_path, file_name)
 
@@ -132,65 +366,646 @@ def generate_file_name(result : AnalysisResults,
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def save_to_file(results : list,
-                 output_dir_path: str) -> None:
+                 output_dir_path: str) -> list:
     """Save analysis results to files in a given directory
 
     Args:
         results (list): list of AnalysisResults objects
         output_dir_path (str): path to output directoy
+
+    Returns:
+        list: path of the file written for each result, '' if it could not be saved
+            or is a duplicate whose answers are in the file of its canonical pdf
     """
+    output_paths = []
 
     for result in results:
 
-        file_path = generate_file_name(result, output_dir_path)
-        try:
-            with open(file_path, 'w+', encoding='UTF-8',) as out:
-                for answer in result.answer_text:
-                    out.write(answer+'\n')
-        except FileNotFoundError:
-            print(f'Could NOT save file: {file_path}')
+        if result.duplicate_of != '':
+            output_paths.append('')
+            continue
+
+        with trace_stage('write', result.trace):
+            file_path = generate_file_name(result, output_dir_path)
+            try:
+                with open(file_path, 'w+', encoding='UTF-8',) as out:
+                    for answer in result.answer_text:
+                        out.write(answer+'\n')
+
+                    trace_count('bytes_written', out.tell(), result.trace)
+            except FileNotFoundError:
+                print(f'Could NOT save file: {file_path}')
+                file_path = ''
+
+        output_paths.append(file_path)
+
+    return output_paths
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_result_status(result : AnalysisResults) -> str:
+    """classify the outcome of the analysis of a document
+
+    Args:
+        result (AnalysisResults): results of the analysis
+
+    Returns:
+        str: status used in the results table
+    """
+
+    if result.duplicate_of != '':
+        status = 'Duplicate'
+    elif not result.file_readable:
+        status = 'Unreadable'
+    elif not result.format_identified:
+        status = 'Unknown Format'
+    elif not result.qa_section_found:
+        status = 'No Q&A'
+    elif result.num_ceos == 0:
+        status = 'No CEO'
+    elif result.num_ceos > 1:
+        status = 'Multiple CEOs'
+    elif result.num_ceos == 1 and result.num_answers == 0:
+        status = 'No Answers'
+    else:
+        status = 'Success'
+
+    return status
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_duplicate_result(result : AnalysisResults,
+                         file_path : str,
+                         canonical_file_path : str) -> AnalysisResults:
+    """results of a near-duplicate pdf which was not processed, the fields of
+    the results table are those of its canonical pdf
+
+    Args:
+        result (AnalysisResults): results of the canonical pdf
+        file_path (str): file path to the duplicate pdf
+        canonical_file_path (str): file path to the canonical pdf
+
+    Returns:
+        AnalysisResults: results without answers, pointing at the canonical pdf
+    """
+    return AnalysisResults(file_path=file_path,
+                           company_name=result.company_name,
+                           report_year=result.report_year,
+                           ceo_name=result.ceo_name,
+                           num_ceos=result.num_ceos,
+                           ceo_table_company=result.ceo_table_company,
+                           ceo_fuzzy_match=result.ceo_fuzzy_match,
+                           qa_section_page=result.qa_section_page,
+                           qa_section_found=result.qa_section_found,
+                           duplicate_of=canonical_file_path)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def add_duplicate_results(results : list,
+                          duplicates_of : dict) -> list:
+    """follow the results of each canonical pdf with the results of its duplicates
+
+    Args:
+        results (list): list of AnalysisResults objects
+        duplicates_of (dict): file path of each canonical pdf -> file paths of its duplicates
+
+    Returns:
+        list: list of AnalysisResults objects including the duplicates
+    """
+    all_results = []
+
+    for result in results:
+        all_results.append(result)
+
+        for file_path in duplicates_of.get(result.file_path, []):
+            all_results.append(get_duplicate_result(result, file_path, result.file_path))
+
+    return all_results
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def find_duplicates(file_paths : list,
+                    max_workers : int = None,
+                    manifest : Manifest = None,
+                    all_file_paths : list = ()) -> dict:
+    """near-duplicates among the pdfs to process and, with a manifest, of the
+    pdfs processed by the previous runs. The signatures are kept in the
+    manifest, so a pdf is only fingerprinted again when it changes.
+
+    Args:
+        file_paths (list): pdfs to process
+        max_workers (int): number of worker processes computing the signatures
+        manifest (Manifest): record of the processed pdfs
+        all_file_paths (list): all the pdfs in the tree
+
+    Returns:
+        dict: file path of each duplicate of file_paths -> file path of its canonical pdf
+    """
+    detector = DuplicateDetector()
+
+    if manifest is None:
+        return detector.find_duplicates(file_paths, max_workers)
+
+    # the pdfs processed before which are not themselves duplicates
+    pending_file_paths = set(file_paths)
+    previous_duplicates = manifest.get_duplicates()
+    processed_file_paths = [file_path for file_path in all_file_paths
+                            if file_path not in pending_file_paths and file_path not in previous_duplicates]
+
+    signatures = manifest.get_signatures(list(file_paths) + processed_file_paths)
+
+    new_file_paths = [file_path for file_path in list(file_paths) + processed_file_paths if file_path not in signatures]
+
+    if len(new_file_paths) > 0:
+        new_signatures = detector.get_signatures(new_file_paths, max_workers)
+        manifest.record_signatures(new_file_paths, new_signatures)
+
+        signatures.update(zip(new_file_paths, new_signatures))
+
+    known_signatures = {file_path : signatures[file_path] for file_path in processed_file_paths}
+
+    return detector.find_duplicates(file_paths, max_workers,
+                                    [signatures[file_path] for file_path in file_paths], known_signatures)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def record_previous_duplicates(duplicates : dict,
+                               manifest : Manifest,
+                               result_store : ResultStore = None) -> None:
+    """record the near-duplicates of pdfs processed by the previous runs, with
+    the row of their canonical pdf in the manifest
+
+    Args:
+        duplicates (dict): file path of each duplicate -> file path of its canonical pdf
+        manifest (Manifest): record of the processed pdfs
+        result_store (ResultStore): store the duplicate rows are added to
+    """
+    canonical_results = {result.file_path : result
+                         for result, _ in manifest.get_results(sorted(set(duplicates.values())))}
+
+    for file_path, canonical_file_path in duplicates.items():
+        duplicate_result = get_duplicate_result(canonical_results[canonical_file_path], file_path, canonical_file_path)
+        status = get_result_status(duplicate_result)
+
+        if result_store is not None:
+            result_store.add(duplicate_result, status)
+
+        # the answers are in the output file of the canonical pdf
+        manifest.remove_previous_output(file_path)
+        manifest.record(file_path, duplicate_result, status)
+
+    if result_store is not None:
+        result_store.flush()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_result_row(num : int,
+                   result : AnalysisResults,
+                   status : str) -> str:
+    """format a row of the results table, every row has the same columns
+
+    Args:
+        num (int): row number
+        result (AnalysisResults): results of the analysis
+        status (str): status of the analysis
+
+    Returns:
+        str: '+' delimited row, ending with the file path of the canonical pdf of
+            a duplicate and the company of the CEO table of a CEO found by a fuzzy
+            match, each empty when it does not apply
+    """
+    fuzzy_ceo_company = result.ceo_table_company if result.ceo_fuzzy_match else ''
+
+    return f'{num}+{status}+{result.company_name}+{result.report_year}+{result.ceo_name}+{result.num_ceos}+{result.num_answers}+' \
+           f'{result.file_path}+{result.duplicate_of}+{fuzzy_ceo_company}'
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_status_counts(status_counts : dict) -> None:
+
+    print(  f'num_year_range: {status_counts.get("Year Range", 0)}\n'
+            f'num_no_ceo: {status_counts.get("No CEO", 0)}\n' 
+            f'num_multiple_ceo: {status_counts.get("Multiple CEOs", 0)}\n'
+            f'num_no_answer: {status_counts.get("No Answers", 0)}\n'
+            f'num_no_qa: {status_counts.get("No Q&A", 0)}\n'
+            f'num_success: {status_counts.get("Success", 0)}')
+
+    if status_counts.get('Duplicate', 0) > 0:
+        print(f'num_duplicate: {status_counts["Duplicate"]}')
+
+    if status_counts.get('Unreadable', 0) > 0:
+        print(f'num_unreadable: {status_counts["Unreadable"]}')
+
+    if status_counts.get('Unknown Format', 0) > 0:
+        print(f'num_unknown_format: {status_counts["Unknown Format"]}')
+
+    if status_counts.get('Failed', 0) > 0:
+        print(f'num_failed: {status_counts["Failed"]}')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def write_traces(results : list,
+                 trace_writer : TraceWriter) -> None:
+    """write the trace of each result with the status of its analysis
+
+    Args:
+        results (list): list of AnalysisResults objects
+        trace_writer (TraceWriter): JSONL file the traces are written to
+    """
+    for result in results:
+        if result.trace is not None:
+            result.trace.outcome = get_result_status(result)
+            trace_writer.write(result.trace)
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def display_results(results : list) -> None:
    
-    num_no_ceo = 0
-    num_multiple_ceo = 0
-    num_year_range = 0
-    num_no_answer = 0
-    num_success = 0
+    status_counts = {}
    
-    with open('results_table.dat', 'w+', encoding='UTF-8') as output_file:
+    with open(RESULTS_TABLE_PATH, 'w+', encoding='UTF-8') as output_file:
         for num, result in enumerate(results):
-            status = ''
-
-            if result.num_ceos == 0:
-                status = 'No CEO'
-                num_no_ceo = num_no_ceo + 1
-            elif result.num_ceos > 1:
-                num_multiple_ceo =  num_multiple_ceo + 1
-                status = 'Multiple CEOs'
-            elif result.num_ceos == 1 and result.num_answers == 0:
-                status = 'No Answers'
-                num_no_answer = num_no_answer + 1
-            else:
-                status = 'Success'
-                num_success = num_success + 1
+            status = get_result_status(result)
+            status_counts[status] = status_counts.get(status, 0) + 1
         
-            row = f'{num}+{status}+{result.company_name}+{result.report_year}+{result.ceo_name}+{result.num_ceos}+{result.num_answers}+{result.file_path}'
-
-            output_file.write(row+'\n')
+            output_file.write(get_result_row(num, result, status)+'\n')
                         
-        print(  f'num_year_range: {num_year_range}\n'
-                f'num_no_ceo: {num_no_ceo}\n' 
-                f'num_multiple_ceo: {num_multiple_ceo}\n'
-                f'num_no_answer: {num_no_answer}\n'
-                f'num_success: {num_success}')
+        display_status_counts(status_counts)
         
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+def save_to_manifest(results : list,
+                     output_paths : list,
+                     manifest : Manifest) -> None:
+    """record the results saved by save_to_file in the manifest
+
+    Args:
+        results (list): list of AnalysisResults objects
+        output_paths (list): paths returned by save_to_file
+        manifest (Manifest): record of the processed pdfs
+    """
+    for result, output_path in zip(results, output_paths):
+        manifest.record(result.file_path, result, get_result_status(result), output_path)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def record_in_manifest(outcomes : list,
+                       manifest : Manifest) -> None:
+    """record the outcome of each pdf in the manifest
+
+    Args:
+        outcomes (list): (file_path, AnalysisResults, status, output_path) of each pdf
+        manifest (Manifest): record of the processed pdfs
+    """
+    for file_path, result, status, output_path in outcomes:
+        manifest.record(file_path, result, status, output_path)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_manifest_results(manifest : Manifest,
+                             file_paths : list) -> None:
+    """regenerate the results table from the manifest, merging the rows of the
+    pdfs processed in this run with the unchanged rows of the previous runs
+
+    Args:
+        manifest (Manifest): record of the processed pdfs
+        file_paths (list): all the pdfs in the tree, in the order of the table
+    """
+    status_counts = {}
+
+    with open(RESULTS_TABLE_PATH, 'w+', encoding='UTF-8') as output_file:
+        for num, (result, status) in enumerate(manifest.get_results(file_paths)):
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+            output_file.write(get_result_row(num, result, status)+'\n')
+
+    display_status_counts(status_counts)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TaskSubmitter:
+    """
+    Submits the tasks of a streaming run to the workers as the earlier tasks
+    finish, so at most max_in_flight documents are submitted at any time and
+    memory use does not grow with the size of the corpus. A task larger than
+    max_in_flight runs on its own.
+    """
+
+    def __init__(self,
+                 executor : concurrent.futures.Executor,
+                 tasks_iter,
+                 max_in_flight : int = MAX_IN_FLIGHT):
+
+        self.executor = executor
+        self.tasks_iter = tasks_iter
+        self.max_in_flight = max_in_flight
+
+        # future -> file paths of the task
+        self.in_flight = {}
+        self.num_in_flight = 0
+
+        self.next_task, self.next_task_data = next(tasks_iter, (None, None))
+
+    def is_done(self) -> bool:
+        """check if every task was submitted and has finished
+        """
+        return self.next_task is None and len(self.in_flight) == 0
+
+    def submit(self) -> None:
+        """submit the next tasks while they fit in max_in_flight
+        """
+        while self.next_task is not None and (len(self.in_flight) == 0 or
+                                              self.num_in_flight + len(self.next_task) <= self.max_in_flight):
+            self.in_flight[self.executor.submit(analyse_files, self.next_task, self.next_task_data)] = self.next_task
+            self.num_in_flight = self.num_in_flight + len(self.next_task)
+
+            self.next_task, self.next_task_data = next(self.tasks_iter, (None, None))
+
+    def wait(self) -> list:
+        """wait for at least one of the submitted tasks to finish
+
+        Returns:
+            list: (file paths, future) of each finished task
+        """
+        done, _ = concurrent.futures.wait(self.in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+
+        finished_tasks = []
+
+        for finished in done:
+            task = self.in_flight.pop(finished)
+            self.num_in_flight = self.num_in_flight - len(task)
+
+            finished_tasks.append((task, finished))
+
+        return finished_tasks
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_task_results(task : list,
+                     finished : concurrent.futures.Future,
+                     utilization : PoolUtilization) -> list:
+    """results of a finished analyse_files task, every file of the task fails
+    if the task itself raised (e.g. its worker died)
+
+    Args:
+        task (list): file paths of the task
+        finished (concurrent.futures.Future): future of the task
+        utilization (PoolUtilization): busy time of the workers
+
+    Returns:
+        list: (file_path, AnalysisResults, exception) of each file
+    """
+    try:
+        task_results, pid, seconds = finished.result()
+        utilization.add_task(pid, seconds)
+    except Exception as e:
+        task_results = [(file_path, None, e) for file_path in task]
+
+    return task_results
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class StreamingRecorder:
+    """
+    Saves the results of a streaming run as they arrive: the answers (to the
+    result store or one text file each), the row of the results table, the
+    trace and the manifest entry. The near-duplicates of a pdf are recorded
+    with it, and a pdf is only recorded in the manifest once its results are
+    in the store.
+    """
+
+    def __init__(self,
+                 output_dir_path : str,
+                 manifest : Manifest = None,
+                 result_store : ResultStore = None,
+                 trace_writer : TraceWriter = None,
+                 duplicates_of : dict = None,
+                 results_table_path : str = RESULTS_TABLE_PATH):
+
+        self.output_dir_path = output_dir_path
+        self.manifest = manifest
+        self.result_store = result_store
+        self.trace_writer = trace_writer
+        # file path of each canonical pdf -> file paths of its near-duplicates
+        self.duplicates_of = duplicates_of if duplicates_of is not None else {}
+
+        self.output_file = open(results_table_path, 'w+', encoding='UTF-8')
+
+        self.status_counts = {}
+        self.num_rows = 0
+
+        # (file_path, AnalysisResults, status, output_path) waiting for the result store
+        self.unrecorded = []
+
+    def save_result(self,
+                    file_path : str,
+                    result : AnalysisResults,
+                    error : Exception = None) -> (AnalysisResults, str, str):
+        """save the answers of a pdf, a pdf whose analysis or saving failed is
+        saved as Failed
+
+        Args:
+            file_path (str): file path to the pdf
+            result (AnalysisResults): results of the analysis
+            error (Exception): exception raised by the worker
+
+        Returns:
+            (AnalysisResults, str, str): results, status and the file the answers were written to
+        """
+        output_path = ''
+
+        try:
+            if error is not None:
+                raise error
+
+            status = get_result_status(result)
+
+            if self.result_store is not None:
+                self.result_store.add(result, status)
+            else:
+                if self.manifest is not None:
+                    self.manifest.remove_previous_output(file_path)
+
+                output_path = save_to_file([result], self.output_dir_path)[0]
+        except Exception as e:
+            print(f'Failed to process file: {file_path} ({e})')
+            result = AnalysisResults(file_path=file_path)
+            status = 'Failed'
+
+            if self.result_store is not None:
+                self.result_store.add(result, status)
+
+        return result, status, output_path
+
+    def get_outcomes(self,
+                     file_path : str,
+                     result : AnalysisResults,
+                     status : str,
+                     output_path : str) -> list:
+        """outcome of a pdf followed by the outcomes of its near-duplicates, which
+        are not processed and take the fields of their canonical pdf
+
+        Returns:
+            list: (file_path, AnalysisResults, status, output_path) of each pdf
+        """
+        outcomes = [(file_path, result, status, output_path)]
+
+        for duplicate_file_path in self.duplicates_of.get(file_path, []):
+            duplicate_result = get_duplicate_result(result, duplicate_file_path, file_path)
+            duplicate_status = get_result_status(duplicate_result)
+
+            if self.result_store is not None:
+                self.result_store.add(duplicate_result, duplicate_status)
+
+            outcomes.append((duplicate_file_path, duplicate_result, duplicate_status, ''))
+
+        return outcomes
+
+    def write_outcome(self,
+                      file_path : str,
+                      result : AnalysisResults,
+                      status : str) -> None:
+        """append the row of a pdf to the results table and write its trace
+        """
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+        self.output_file.write(get_result_row(self.num_rows, result, status)+'\n')
+        self.num_rows = self.num_rows + 1
+
+        if self.trace_writer is not None and result.duplicate_of == '':
+            trace = result.trace
+            if trace is None:
+                trace = DocumentTrace(file_path=file_path)
+
+            trace.outcome = status
+            self.trace_writer.write(trace)
+
+    def add(self,
+            file_path : str,
+            result : AnalysisResults,
+            error : Exception = None) -> None:
+        """save and record the result of a pdf returned by a worker
+
+        Args:
+            file_path (str): file path to the pdf
+            result (AnalysisResults): results of the analysis, None if it failed
+            error (Exception): exception raised by the worker
+        """
+        outcomes = self.get_outcomes(file_path, *self.save_result(file_path, result, error))
+
+        for outcome_file_path, outcome_result, outcome_status, _ in outcomes:
+            self.write_outcome(outcome_file_path, outcome_result, outcome_status)
+
+        self.output_file.flush()
+
+        if self.manifest is not None:
+            self.unrecorded.extend(outcomes)
+
+            if self.result_store is None or len(self.result_store.pending_rows) == 0:
+                self.record_unrecorded()
+
+    def record_unrecorded(self) -> None:
+        """record the pdfs whose results are saved in the manifest
+        """
+        record_in_manifest(self.unrecorded, self.manifest)
+        self.unrecorded = []
+
+    def close(self) -> None:
+        """save the remaining results and close the results table
+        """
+        if self.result_store is not None:
+            self.result_store.flush()
+
+        if self.manifest is not None:
+            self.record_unrecorded()
+            self.manifest.flush()
+
+        self.output_file.close()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def run_streaming_pipeline(file_paths : list,
+                           recorder : StreamingRecorder,
+                           options : WorkerOptions = None,
+                           scheduler : TaskScheduler = None,
+                           prefetcher : PdfPrefetcher = None,
+                           max_in_flight : int = MAX_IN_FLIGHT) -> dict:
+    """extract and analyse the pdfs in parallel, saving each result and appending
+    its row to the results table as soon as it is available
+
+    The extraction cache is pruned every CACHE_PRUNE_INTERVAL documents, so
+    a long run does not grow it past its size until the run ends.
+
+    Args:
+        file_paths (list): list of file paths to pdf documents
+        recorder (StreamingRecorder): saves the results, closed at the end of the run
+        options (WorkerOptions): options sent to the workers
+        scheduler (TaskScheduler): sizes the pool and groups the files into tasks,
+            MAX_WORKERS workers and one file per task if not given
+        prefetcher (PdfPrefetcher): reads the pdfs ahead of the workers and sends
+            them their bytes, the workers read the pdfs if not given
+        max_in_flight (int): maximum number of documents submitted at once
+
+    Returns:
+        dict: number of documents per status
+    """
+    num_workers = MAX_WORKERS if scheduler is None else scheduler.num_workers
+    utilization = PoolUtilization(num_workers)
+
+    tasks_iter = get_task_data(get_tasks(file_paths, scheduler), prefetcher)
+
+    extraction_cache = options.extraction_cache if options is not None else None
+    num_analysed = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers,
+                                                initializer=init_analysis_worker,
+                                                initargs=(options,)) as executor:
+
+        submitter = TaskSubmitter(executor, tasks_iter, max_in_flight)
+
+        while not submitter.is_done():
+            submitter.submit()
+
+            for task, finished in submitter.wait():
+                for file_path, result, error in get_task_results(task, finished, utilization):
+                    recorder.add(file_path, result, error)
+
+                    num_analysed = num_analysed + 1
+
+                    if extraction_cache is not None and num_analysed % CACHE_PRUNE_INTERVAL == 0:
+                        extraction_cache.prune()
+
+        recorder.close()
+
+    utilization.stop()
+    utilization.display()
+
+    return recorder.status_counts
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_profile(profile_dir : str) -> None:
+    """merge the worker profiles and print the functions with the largest cumulative time
+
+    Args:
+        profile_dir (str): directory the workers wrote their profiles to
+    """
+    stats = merge_profiles(profile_dir)
+
+    if stats is None:
+        print('No document was profiled')
+        return
+
+    report_path = write_allocation_report(profile_dir)
+
+    stats.sort_stats('cumulative').print_stats(20)
+
+    print(f'Allocations : {report_path}')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 def read_ceo_file() -> dict:
-    input_file = open('./docs/company_name_ceo.csv', 'r')
+    input_file = open(CEO_FILE_PATH, 'r')
     lines = input_file.readlines()
     
     all_companies_dict = {}
@@ -219,9 +1034,84 @@ def main():
     """
     Main function for running the QA extraction pipeline in parallel
     """
+    parser = argparse.ArgumentParser(description='Extract the CEO answers from earnings call transcripts')
+    parser.add_argument('--streaming', action='store_true',
+                        help='save each result as soon as it is available')
+    parser.add_argument('--max-in-flight', type=int, default=MAX_IN_FLIGHT,
+                        help='maximum number of documents being processed at once in streaming mode')
+    parser.add_argument('--cache-dir', default=None,
+                        help='directory of the extraction cache, disabled if not given')
+    parser.add_argument('--cache-size-mb', type=int, default=2048,
+                        help='maximum size of the extraction cache')
+    parser.add_argument('--columnar', action='store_true',
+                        help='store the extracted text_blocks in flat arrays')
+    parser.add_argument('--lazy', action='store_true',
+                        help='only extract the pages of a pdf which are searched')
+    parser.add_argument('--prescan', action='store_true',
+                        help='scan the plain text for a Q&A section before extracting a pdf')
+    parser.add_argument('--trace', default=None,
+                        help='JSONL file the stage timings of each document are written to')
+    parser.add_argument('--profile-dir', default=None,
+                        help='directory the cProfile and tracemalloc results of the workers are written to')
+    parser.add_argument('--profile-fraction', type=float, default=1.,
+                        help='fraction of the documents which are profiled')
+    parser.add_argument('--schedule', action='store_true',
+                        help='size the pool from the CPUs and memory and send the largest files first, batching small ones')
+    parser.add_argument('--max-workers', type=int, default=MAX_WORKERS,
+                        help='maximum number of workers of a scheduled run')
+    parser.add_argument('--page-count-costs', action='store_true',
+                        help='estimate the cost of a file from its page count instead of its size')
+    parser.add_argument('--manifest', default=None,
+                        help='SQLite manifest of the processed pdfs, only new, changed or failed pdfs are processed')
+    parser.add_argument('--result-store', default=None,
+                        help='SQLite file the results are saved to instead of one text file per result')
+    parser.add_argument('--prefetch-threads', type=int, default=0,
+                        help='threads reading the pdfs ahead of the workers in streaming mode, disabled if 0')
+    parser.add_argument('--read-ahead', type=int, default=16,
+                        help='number of pdfs read ahead of the workers when prefetching')
+    parser.add_argument('--dedup', action='store_true',
+                        help='only process one pdf of each group of near-duplicate transcripts, with a manifest '
+                             'the new pdfs are also compared with the pdfs already processed')
+    parser.add_argument('--strict-provider', action='store_true',
+                        help='report the pdfs identified by neither their first page nor their path as Unknown Format '
+                             'instead of analysing them as Bloomberg transcripts')
+    parser.add_argument('--retry-status', action='append', default=None, choices=RETRY_STATUSES,
+                        help='status processed again in an incremental run, all the failures except No Q&A if not given')
+    args = parser.parse_args()
+
+    # all the documents are submitted at once without streaming, prefetching them would hold the whole tree in memory
+    if args.prefetch_threads > 0 and not args.streaming:
+        parser.error('--prefetch-threads requires --streaming')
+
     start_time_point = time.time()
 
-    company_ceo_dict = read_ceo_file()
+    extraction_cache = None
+    if args.cache_dir is not None:
+        extraction_cache = ExtractionCache(args.cache_dir, args.cache_size_mb*1024**2)
+
+    trace_writer = None
+    if args.trace is not None:
+        trace_writer = TraceWriter(args.trace)
+
+    profiler = None
+    if args.profile_dir is not None:
+        profiler = WorkerProfiler(args.profile_dir, args.profile_fraction)
+        profiler.prepare()
+
+    scheduler = None
+    if args.schedule:
+        scheduler = TaskScheduler(args.max_workers, args.page_count_costs)
+
+    # the CEO table is indexed once and sent to every worker
+    options = WorkerOptions(extraction_cache=extraction_cache,
+                            columnar=args.columnar,
+                            lazy=args.lazy,
+                            prescan=args.prescan,
+                            trace=trace_writer is not None,
+                            profiler=profiler,
+                            ceo_lookup=CeoLookup(read_ceo_file()),
+                            hash_content=args.manifest is not None,
+                            strict_provider=args.strict_provider)
 
     # get all the file_paths
     file_paths = get_data_file_paths()
@@ -229,20 +1119,114 @@ def main():
     # file_paths = get_file_paths_from_file()
     print(f'# of files: {len(file_paths)}')
 
-    # open all the files with fitz and get there text_blocks in order
-    processed_documents = get_processed_documents(file_paths)
+    manifest = None
+    if args.manifest is not None:
+        # the pdfs of an unknown format are analysed again when --strict-provider is turned off
+        config = {'strict_provider' : True} if args.strict_provider else None
 
-    print(f'# of processed docs: {len(processed_documents)}')
+        manifest = Manifest(args.manifest, get_pipeline_version(config, [CEO_FILE_PATH]))
 
-    # search the text_blocks for data we are interested in
-    results = get_analysis_results(processed_documents,company_ceo_dict)
+        all_file_paths = file_paths
+        file_paths = manifest.get_pending_file_paths(all_file_paths, args.retry_status or FAILURE_STATUSES)
 
-    end_time_point = time.time()
-    print(f'Total : {end_time_point - start_time_point}')
-    
-    # print('saving')
-    save_to_file(results, OUTPUT_PATH)
-    display_results(results)
+        print(f'# of new, changed or failed files: {len(file_paths)}')
+
+    result_store = None
+    if args.result_store is not None:
+        result_store = ResultStore(args.result_store)
+
+    duplicates_of = {}
+    if args.dedup:
+        if manifest is not None:
+            duplicates = find_duplicates(file_paths, get_pool_size(args.max_workers), manifest, all_file_paths)
+        else:
+            duplicates = find_duplicates(file_paths, get_pool_size(args.max_workers))
+
+        # the duplicates of a pdf processed by a previous run are recorded now,
+        # the others with their canonical pdf
+        pending_file_paths = set(file_paths)
+        previous_duplicates = {file_path : canonical_file_path for file_path, canonical_file_path in duplicates.items()
+                               if canonical_file_path not in pending_file_paths}
+
+        if len(previous_duplicates) > 0:
+            record_previous_duplicates(previous_duplicates, manifest, result_store)
+
+        duplicates_of = get_duplicates_of({file_path : canonical_file_path for file_path, canonical_file_path in duplicates.items()
+                                           if file_path not in previous_duplicates})
+
+        file_paths = [file_path for file_path in file_paths if file_path not in duplicates]
+
+        print(f'# of near-duplicate files: {len(duplicates)}')
+
+    prefetcher = None
+    if args.prefetch_threads > 0:
+        # the workers load the cache hits from the cache without opening the pdf
+        skip_file = extraction_cache.contains if extraction_cache is not None else None
+
+        prefetcher = PdfPrefetcher(args.prefetch_threads, args.read_ahead, skip_file)
+
+    if args.streaming:
+        recorder = StreamingRecorder(OUTPUT_PATH, manifest, result_store, trace_writer, duplicates_of)
+
+        status_counts = run_streaming_pipeline(file_paths, recorder, options, scheduler, prefetcher,
+                                               args.max_in_flight)
+
+        end_time_point = time.time()
+        print(f'Total : {end_time_point - start_time_point}')
+
+        if manifest is not None:
+            display_manifest_results(manifest, all_file_paths)
+        else:
+            display_status_counts(status_counts)
+    else:
+        # open all the files with fitz and search their text_blocks for the data 
+        # we are interested in, each worker returns only the AnalysisResults
+        results = get_analysis_results_from_files(file_paths, options, scheduler)
+
+        print(f'# of processed docs: {len(results)}')
+
+        end_time_point = time.time()
+        print(f'Total : {end_time_point - start_time_point}')
+
+        results = add_duplicate_results(results, duplicates_of)
+        
+        # print('saving')
+        if result_store is not None:
+            for result in results:
+                result_store.add(result, get_result_status(result))
+            result_store.flush()
+
+            output_paths = ['']*len(results)
+        else:
+            if manifest is not None:
+                for result in results:
+                    manifest.remove_previous_output(result.file_path)
+
+            output_paths = save_to_file(results, OUTPUT_PATH)
+
+        if manifest is not None:
+            save_to_manifest(results, output_paths, manifest)
+            display_manifest_results(manifest, all_file_paths)
+        else:
+            display_results(results)
+
+        if trace_writer is not None:
+            write_traces(results, trace_writer)
+
+    if extraction_cache is not None:
+        extraction_cache.prune()
+
+    if trace_writer is not None:
+        trace_writer.close()
+
+    if profiler is not None:
+        display_profile(profiler.profile_dir)
+
+    if manifest is not None:
+        manifest.close()
+
+    if result_store is not None:
+        result_store.close()
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -3,10 +3,21 @@ import re
 
 import unicodedata
 
-from extraction_utilities import only_block_on_line, get_previous_text_block
-from extraction_utilities import AnalysisResults, QA_HEADINGS
+from block_geometry import BlockGeometry
+from ceo_lookup import CeoLookup
+from extraction_utilities import AnalysisResults, QA_HEADING_MATCHER
 from extraction_utilities import get_processed_doc_from_fitz_doc
+from pipeline_trace import trace_count, trace_stage
 from processed_document import ProcessedDocument
+from providers import BLOOMBERG
+from speaker_turns import segment_speaker_turns
+from text_normalization import contains_tokens, normalize_text
+
+# characters removed from the text and the tokens before a token search,
+# after NFKD an accented e is an 'e' followed by a combining acute accent
+REGEX_STRIP_PATTERN = re.compile('[()".]|e\u0301')
+
+CEO_TOKENS = ['CEO','Chief Executive Officer']
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -23,49 +34,20 @@ def text_contains(  text : str,
         bool: True if token in text_box
     """
 
-    token_found = False
-
-    # replace ligature with ascii characters
-    cleaned_text = unicodedata.normalize("NFKD", text).strip()
-    
-    cleaned_text = cleaned_text.replace('(', '')
-    cleaned_text = cleaned_text.replace(')', '')    
-    cleaned_text = cleaned_text.replace('"', '')    
-    cleaned_text = cleaned_text.replace('.', '') 
-    cleaned_text = cleaned_text.replace('é', '') 
-    
-    for token in tokens:
-
-        token = token.replace('(', '')
-        token = token.replace(')', '')    
-        token = token.replace('"', '') 
-        token = token.replace('.', '') 
-        token = token.replace('é', '') 
-    
-        search_pattern = r'\b' + token + r'\b'
-        matches = re.findall(search_pattern, cleaned_text)
-
-        if len(matches) > 0:
-            token_found = True
+    # replace ligature with ascii characters and remove punctuation
+    cleaned_text = normalize_text(text, REGEX_STRIP_PATTERN)
 
-    return token_found
+    return contains_tokens(cleaned_text, tokens, REGEX_STRIP_PATTERN)
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def text_matches(text: str,
                        tokens : list) -> bool:
 
-    token_found = False
-
     # replace ligature with ascii characters
-    cleaned_text = unicodedata.normalize("NFKD", text).strip()
-
-    for token in tokens:
-
-        if token == cleaned_text.strip():
-            token_found = True
+    cleaned_text = normalize_text(text)
 
-    return token_found
+    return cleaned_text in tokens
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -84,14 +66,30 @@ def extract_company_name(processed_doc : ProcessedDocument,
     results.company_name = 'UNKNOWN'
     results.report_year = 0
 
-    for block in processed_doc.document_text_blocks:
-        if block.contains_text('Company Name: '):
-            split_block = block.get_text().split('\n')
-            results.company_name = split_block[0].split(':')[1].strip()
-        
-        if block.contains_text('Date: '):
-            split_block = block.get_text().split('\n')
-            results.report_year = split_block[2].split(':')[1].split('-')[0].strip()
+    company_name_found = False
+    report_year_found = False
+
+    # the header is repeated on every page, stop at the first page which has it,
+    # a document without a header in its first pages does not have one
+    first_page = 0
+    if processed_doc.prescan_result is not None and processed_doc.prescan_result.header_page != -1:
+        first_page = processed_doc.prescan_result.header_page
+
+    for page_number in range(first_page, min(processed_doc.num_pages, first_page + BLOOMBERG.header_pages)):
+
+        if company_name_found and report_year_found:
+            break
+
+        for block in processed_doc.get_page_text_blocks(page_number):
+            if block.contains_text('Company Name: '):
+                split_block = block.get_text().split('\n')
+                results.company_name = split_block[0].split(':')[1].strip()
+                company_name_found = True
+
+            if block.contains_text('Date: '):
+                split_block = block.get_text().split('\n')
+                results.report_year = split_block[2].split(':')[1].split('-')[0].strip()
+                report_year_found = True
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -100,22 +98,28 @@ def extract_ceo_name(processed_doc : ProcessedDocument,
     ceo_name = 'UNKNOWN'
     success = False
     # extract the "Company Participants" section text blocks
-    start_idx = processed_doc.get_heading_idx(['Company Participants'], {'name':'AvenirNextPForBBG-Medium'})
-    end_idx = processed_doc.get_next_heading_idx(start_idx+1, {'name':'AvenirNextPForBBG-Medium'})
+    start_idx = processed_doc.get_heading_idx(['Company Participants'], BLOOMBERG.heading_font,
+                                              processed_doc.get_prescan_start_idx('participants_page'))
+    end_idx = processed_doc.get_next_heading_idx(start_idx+1, BLOOMBERG.heading_font)
 
     participants_section = processed_doc.get_text_blocks(start_idx,end_idx+1)
 
     # search the "Company Participants" section for the CEO name
     ceo_count = 0
+    participants_geometry = None
        
     for block in participants_section:
         
-        if text_contains(block.get_text(), ['CEO','Chief Executive Officer']):
+        if block.contains_tokens(CEO_TOKENS, REGEX_STRIP_PATTERN, REGEX_STRIP_PATTERN):
             ceo_count = ceo_count + 1
-            if only_block_on_line(block, participants_section):             
+
+            if participants_geometry is None:
+                participants_geometry = BlockGeometry(participants_section)
+
+            if participants_geometry.only_block_on_line(block):             
                 ceo_name = block.get_text().split(',')[0]
             else:
-                tb_ceo_name = get_previous_text_block(block, participants_section)
+                tb_ceo_name = participants_geometry.get_previous_text_block(block)
                 ceo_name = tb_ceo_name.get_text().strip()
     # clean up the name
     ceo_name = unicodedata.normalize("NFKD", ceo_name)
@@ -166,29 +170,41 @@ def extract_answers(processed_doc : ProcessedDocument,
     """
     ceo_name = results.ceo_name
 
-    qa_start_idx = processed_doc.get_heading_idx(QA_HEADINGS, {'name':'AvenirNextPForBBG-Medium'})
+    with trace_stage('heading_search'):
+        qa_start_idx = processed_doc.get_heading_idx(QA_HEADING_MATCHER, BLOOMBERG.heading_font,
+                                                     processed_doc.get_prescan_start_idx('qa_page'))
+
+    if qa_start_idx == -1:
+        results.qa_section_found = False
+        return
+
     qa_end_idx = processed_doc.num_text_blocks
     
     results.qa_section_page = processed_doc.get_text_block(qa_start_idx).page_number
+
+    # every block with a line in the heading font names a speaker
+    with trace_stage('speaker_turns'):
+        results.speaker_turns = segment_speaker_turns(processed_doc, BLOOMBERG.heading_font, qa_start_idx, qa_end_idx)
     
-    for idx in range(qa_start_idx, qa_end_idx):
-        text_block = processed_doc.get_text_block(idx)
-            
-        if text_block.contains_section(ceo_name, {'name':'AvenirNextPForBBG-Medium'}):
-            end_idx = processed_doc.get_next_heading_idx(idx+1, {'name':'AvenirNextPForBBG-Medium'})
+    for speaker_turn in results.speaker_turns:
             
-            answer_text = clean_answer_text(processed_doc.get_text_blocks(idx+1,end_idx+1))
+        if speaker_turn.names_speaker(ceo_name):
+            # the answer includes the block of the next speaker, the last turn has no answer
+            with trace_stage('answer_cleaning'):
+                answer_text = clean_answer_text(processed_doc.get_text_blocks(speaker_turn.start_idx+1, speaker_turn.end_idx+1))
             
             results.answer_text.append(answer_text)
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def process_bloomberg_doc(processed_doc : ProcessedDocument,
-                          company_ceo_dict : dict) -> AnalysisResults:
+                          ceo_lookup : CeoLookup = None) -> AnalysisResults:
     """_summary_
 
     Args:
         doc (list): _description_
+        ceo_lookup (CeoLookup): fallback table of CEO names, used when the
+            participants do not name the CEO
 
     Returns:
         AnalysisResults: _description_
@@ -196,22 +212,31 @@ def process_bloomberg_doc(processed_doc : ProcessedDocument,
     results = AnalysisResults()
     results.file_path = processed_doc.file_path
     
-    if processed_doc.num_text_blocks > 0:
+    if processed_doc.has_text_blocks():
 
         # Get the name of the company
-        extract_company_name(processed_doc, results)
+        with trace_stage('company_name'):
+            extract_company_name(processed_doc, results)
 
         # Get the name of the CEO from the first page
-        if not extract_ceo_name(processed_doc, results):
-            if results.company_name in company_ceo_dict.keys():
-                if results.report_year in company_ceo_dict[results.company_name].keys():
-                    ceo_name = company_ceo_dict[results.company_name][results.report_year]
-                    if ceo_name != '':
-                        results.ceo_name =  ceo_name
-                        results.num_ceos = 1
-
-        # now search pages for answers from the CEO
-        extract_answers(processed_doc, results)
+        with trace_stage('ceo_detection'):
+            if not extract_ceo_name(processed_doc, results) and ceo_lookup is not None:
+                # the company name of the header may be spelled differently in the table
+                ceo_name, table_company, fuzzy = ceo_lookup.get_ceo_match(results.company_name, results.report_year)
+                if ceo_name != '':
+                    results.ceo_name =  ceo_name
+                    results.num_ceos = 1
+                    results.ceo_table_company = table_company
+                    results.ceo_fuzzy_match = fuzzy
+
+        # now search pages for answers from the CEO, unless the pre-scan found no Q&A section
+        if processed_doc.prescan_result is None or processed_doc.prescan_result.qa_section_found:
+            extract_answers(processed_doc, results)
+        else:
+            results.qa_section_found = False
+
+    trace_count('text_blocks', processed_doc.num_extracted_text_blocks)
+    trace_count('answers', results.num_answers)
        
     return results
 
@@ -3,14 +3,24 @@ import glob
 import re
 import math 
 import unicodedata
-from difflib import SequenceMatcher
 
-from extraction_utilities import AnalysisResults, QA_HEADINGS
+from extraction_utilities import AnalysisResults, QA_HEADING_MATCHER
 from processed_document import ProcessedDocument
+from providers import REFINITIV
+from speaker_matching import SpeakerMatcher
+from pipeline_trace import trace_count, trace_stage
+from speaker_turns import segment_speaker_turns
+from text_normalization import contains_tokens, normalize_text
 
 REGEX_CLEAN_UP_PATTERN = '[^0-9a-zA-Z\s]+'
+REGEX_CLEAN_UP = re.compile(REGEX_CLEAN_UP_PATTERN)
 REGEX_COMPANY_NAME_PATTERN = 'Q[0-9] 2([0-9]*)'
 
+CEO_TOKENS = ['CEO','Chief Executive Officer']
+
+# titles whose fonts are collected by detect_heading_font
+HEADING_TITLES = ('CORPORATE PARTICIPANTS',)
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 def text_contains(  text : str,
@@ -26,25 +36,13 @@ def text_contains(  text : str,
         bool: True if token in text_box
     """
 
-    token_found = False
+    # replace ligature with ascii characters and remove punctuation
+    if exact_match:
+        cleaned_text = normalize_text(text, REGEX_CLEAN_UP, lower=True)
 
-    # replace ligature with ascii characters
-    cleaned_text = unicodedata.normalize("NFKD", text)
-    cleaned_text = re.sub(REGEX_CLEAN_UP_PATTERN, '', cleaned_text)
-    
-    for token in tokens:
+        return cleaned_text in [token.lower() for token in tokens]
 
-        if exact_match:
-            if token.lower() == cleaned_text.lower().strip():
-                token_found = True
-        else:
-            search_pattern = r'\b' + token + r'\b'
-            matches = re.findall(search_pattern, cleaned_text.strip())
-            
-            if len(matches) > 0:
-                token_found = True
-
-    return token_found
+    return contains_tokens(normalize_text(text, REGEX_CLEAN_UP), tokens)
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -76,13 +74,16 @@ def get_previous_text_bock(target_text_block : tuple,
 def detect_heading_font(processed_doc : ProcessedDocument,
                          results : AnalysisResults) -> None:
 
-    for block in processed_doc.document_text_blocks:
+    # the heading font is only detected in documents with a second page
+    if len(processed_doc.get_page_text_blocks(1)) > 0:
+        font_statistics = processed_doc.get_font_statistics(HEADING_TITLES)
 
-            if block.page_number == 1:
-                heading_idx = processed_doc.get_heading_idx(['CORPORATE PARTICIPANTS'], {})
-                
-                heading_text_block = processed_doc.get_text_block(heading_idx)
-                results.heading_font_dict = heading_text_block.get_line_font()
+        heading_font_dict = font_statistics.get_title_font('CORPORATE PARTICIPANTS')
+        if heading_font_dict is None:
+            # heading not found, the font of the last block is used
+            heading_font_dict = processed_doc.get_text_block(-1).get_line_font()
+
+        results.heading_font_dict = heading_font_dict
                 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -100,10 +101,9 @@ def extract_company_name(processed_doc : ProcessedDocument,
     found = False
     results.company_name = 'UNKNOWN'
 
-    for block in processed_doc.document_text_blocks:
+    for page_number in range(min(processed_doc.num_pages, REFINITIV.header_pages)):
+        for block in processed_doc.get_page_text_blocks(page_number):
 
-        if block.page_number == 0:
-            
             for line in block.lines:
                 match = re.findall(REGEX_COMPANY_NAME_PATTERN, line.text)
                 if len(match) > 0:
@@ -120,7 +120,8 @@ def extract_ceo_name(processed_doc : ProcessedDocument,
     found = False
 
     # extract the "Company Participants" section text blocks
-    start_idx = processed_doc.get_heading_idx(['CORPORATE PARTICIPANTS'], results.heading_font_dict)
+    start_idx = processed_doc.get_heading_idx(['CORPORATE PARTICIPANTS'], results.heading_font_dict,
+                                              processed_doc.get_prescan_start_idx('participants_page'))
     end_idx = processed_doc.get_next_heading_idx(start_idx+1, results.heading_font_dict)
 
     participants_section = processed_doc.get_text_blocks(start_idx,end_idx+1)
@@ -131,7 +132,7 @@ def extract_ceo_name(processed_doc : ProcessedDocument,
 
     for block in participants_section:
         for line in block.lines:
-            if text_contains(line.text,['CEO','Chief Executive Officer']):
+            if line.contains_tokens(CEO_TOKENS, REGEX_CLEAN_UP):
                 ceo_count = ceo_count + 1
                 ceo_name = block.get_text().replace('\n', ' ')
    
@@ -178,20 +179,42 @@ def extract_answers(processed_doc : ProcessedDocument,
     
     ceo_name = results.ceo_name.strip()
 
-    qa_start_idx = processed_doc.get_heading_idx(QA_HEADINGS, results.heading_font_dict)
+    with trace_stage('heading_search'):
+        qa_start_idx = processed_doc.get_heading_idx(QA_HEADING_MATCHER, results.heading_font_dict,
+                                                     processed_doc.get_prescan_start_idx('qa_page'))
+
+    if qa_start_idx == -1:
+        results.qa_section_found = False
+        return
+
     qa_end_idx = processed_doc.num_text_blocks
 
-    qa_section = processed_doc.document_text_blocks[qa_start_idx:qa_end_idx]
-    results.qa_section_page = qa_section[0].page_number
-    
-    for idx in range(qa_start_idx, qa_end_idx):
-        text_block = processed_doc.get_text_block(idx)
+    results.qa_section_page = processed_doc.get_text_block(qa_start_idx).page_number
+
+    ceo_name_matcher = SpeakerMatcher(ceo_name)
+
+    with trace_stage('speaker_turns'):
+        # the speakers are named in the font of the first block which is the entire ceo name
+        speaker_font = None
+
+        for idx in range(qa_start_idx, qa_end_idx):
+            text_block = processed_doc.get_text_block(idx)
 
-        # if the text is the entire ceo name then we have 
-        if SequenceMatcher(None, text_block.get_text(), ceo_name).ratio() > 0.9:            
-            end_idx = processed_doc.get_next_heading_idx(idx+1, text_block.get_line_font())
+            if ceo_name_matcher.matches(text_block.get_text()):
+                speaker_font = text_block.get_line_font()
+                break
 
-            answer_text = clean_answer_text(processed_doc.get_text_blocks(idx+1,end_idx))
+        if speaker_font is None:
+            return
+
+        results.speaker_turns = segment_speaker_turns(processed_doc, speaker_font, idx, qa_end_idx)
+
+    for speaker_turn in results.speaker_turns:
+
+        if ceo_name_matcher.matches(speaker_turn.text):
+            # the last turn runs up to the last block of the document
+            with trace_stage('answer_cleaning'):
+                answer_text = clean_answer_text(processed_doc.get_text_blocks(speaker_turn.start_idx+1, speaker_turn.end_idx))
             
             results.answer_text.append(answer_text)
 
@@ -210,19 +233,28 @@ def process_refinitiv_doc(processed_doc : ProcessedDocument) -> AnalysisResults:
     results = AnalysisResults()
     results.file_path = processed_doc.file_path
     
-    if processed_doc.num_text_blocks > 0:
+    if processed_doc.has_text_blocks():
 
-        detect_heading_font(processed_doc, results)
+        with trace_stage('heading_font'):
+            detect_heading_font(processed_doc, results)
 
         # Get the name of the company
-        extract_company_name(processed_doc, results)
+        with trace_stage('company_name'):
+            extract_company_name(processed_doc, results)
 
         # Get the name of the CEO from the first page
-        extract_ceo_name(processed_doc, results)
+        with trace_stage('ceo_detection'):
+            extract_ceo_name(processed_doc, results)
 
-        # now search pages for answers from the CEO
-        extract_answers(processed_doc, results)
+        # now search pages for answers from the CEO, unless the pre-scan found no Q&A section
+        if processed_doc.prescan_result is None or processed_doc.prescan_result.qa_section_found:
+            extract_answers(processed_doc, results)
+        else:
+            results.qa_section_found = False
     else:
         print(f'File contained no data: {processed_doc.file_path}')
 
+    trace_count('text_blocks', processed_doc.num_extracted_text_blocks)
+    trace_count('answers', results.num_answers)
+
     return results
@@ -0,0 +1,307 @@
+import hashlib
+import itertools
+import marshal
+import os
+import zlib
+
+from array import array
+
+from processed_document import ProcessedDocument
+from columnar_document import ColumnarDocument
+
+# bump when the layout of the cached data changes
+CACHE_FORMAT_VERSION = 1
+
+CACHE_FILE_EXTENSION = '.pdcache'
+
+DEFAULT_MAX_CACHE_SIZE = 2*1024**3
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def encode_processed_document(processed_document : ProcessedDocument) -> bytes:
+    """pack the blocks, lines and fonts of a document into a compact binary form.
+    Fonts are stored once in a table, block coordinates, page numbers and line
+    data are stored as flat arrays and all the text in a single string.
+
+    Args:
+        processed_document (ProcessedDocument): document to encode
+
+    Returns:
+        bytes: compressed representation of the document
+    """
+    if isinstance(processed_document, ColumnarDocument):
+        return encode_columnar_document(processed_document)
+
+    font_ids = {}
+    fonts = []
+
+    bboxes = array('d')
+    page_numbers = array('i')
+    lines_per_block = array('i')
+    line_font_ids = array('i')
+    line_lengths = array('i')
+    texts = []
+
+    for text_block in processed_document.document_text_blocks:
+        bboxes.extend((text_block.x_1, text_block.y_1, text_block.x_2, text_block.y_2))
+        page_numbers.append(text_block.page_number)
+        lines_per_block.append(text_block.num_lines)
+
+        for line in text_block.lines:
+            font = (line.font_name, line.font_size, line.font_colour)
+
+            if font not in font_ids:
+                font_ids[font] = len(fonts)
+                fonts.append(font)
+
+            line_font_ids.append(font_ids[font])
+            line_lengths.append(len(line.text))
+            texts.append(line.text)
+
+    data = (CACHE_FORMAT_VERSION,
+            fonts,
+            bboxes.tobytes(),
+            page_numbers.tobytes(),
+            lines_per_block.tobytes(),
+            line_font_ids.tobytes(),
+            line_lengths.tobytes(),
+            ''.join(texts))
+
+    return zlib.compress(marshal.dumps(data), 1)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def encode_columnar_document(columnar_document : ColumnarDocument) -> bytes:
+    """encode_processed_document for a ColumnarDocument, which already holds its
+    data in the cached layout
+
+    Args:
+        columnar_document (ColumnarDocument): document to encode
+
+    Returns:
+        bytes: compressed representation of the document
+    """
+    block_line_offsets = columnar_document.block_line_offsets
+    line_text_offsets = columnar_document.line_text_offsets
+
+    fonts = [(font['name'], font['size'], font['colour']) for font in columnar_document.font_registry.fonts]
+    lines_per_block = array('i', (block_line_offsets[i+1] - block_line_offsets[i] for i in range(len(block_line_offsets)-1)))
+    line_lengths = array('i', (line_text_offsets[i+1] - line_text_offsets[i] for i in range(len(line_text_offsets)-1)))
+
+    data = (CACHE_FORMAT_VERSION,
+            fonts,
+            columnar_document.bboxes.tobytes(),
+            columnar_document.page_numbers.tobytes(),
+            lines_per_block.tobytes(),
+            columnar_document.line_font_ids.tobytes(),
+            line_lengths.tobytes(),
+            columnar_document.text_store)
+
+    return zlib.compress(marshal.dumps(data), 1)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def decode_processed_document(data : bytes,
+                              columnar : bool = False) -> ProcessedDocument:
+    """rebuild a ProcessedDocument from the output of encode_processed_document
+
+    Args:
+        data (bytes): compressed representation of the document
+        columnar (bool): return a ColumnarDocument built directly from the arrays
+
+    Returns:
+        ProcessedDocument: the decoded document
+    """
+    version, fonts, bbox_bytes, page_bytes, lines_bytes, font_id_bytes, length_bytes, text = marshal.loads(zlib.decompress(data))
+
+    if version != CACHE_FORMAT_VERSION:
+        raise ValueError(f'Unsupported cache format version: {version}')
+
+    bboxes = array('d')
+    bboxes.frombytes(bbox_bytes)
+    page_numbers = array('i')
+    page_numbers.frombytes(page_bytes)
+    lines_per_block = array('i')
+    lines_per_block.frombytes(lines_bytes)
+    line_font_ids = array('i')
+    line_font_ids.frombytes(font_id_bytes)
+    line_lengths = array('i')
+    line_lengths.frombytes(length_bytes)
+
+    if columnar:
+        columnar_document = ColumnarDocument()
+
+        for font in fonts:
+            columnar_document.font_registry.get_font_id(*font)
+
+        columnar_document.bboxes = bboxes
+        columnar_document.page_numbers = page_numbers
+        columnar_document.block_line_offsets = array('i', itertools.accumulate(lines_per_block, initial=0))
+        columnar_document.line_font_ids = line_font_ids
+        columnar_document.line_text_offsets = array('i', itertools.accumulate(line_lengths, initial=0))
+        columnar_document._text_store = text
+
+        return columnar_document
+
+    processed_document = ProcessedDocument()
+
+    line_idx = 0
+    text_idx = 0
+
+    for block_idx, page_number in enumerate(page_numbers):
+        spans = []
+
+        for _ in range(lines_per_block[block_idx]):
+            font_name, font_size, font_colour = fonts[line_font_ids[line_idx]]
+            text_end = text_idx + line_lengths[line_idx]
+
+            spans.append({'text' : text[text_idx:text_end],
+                          'font' : font_name,
+                          'size' : font_size,
+                          'color' : font_colour})
+
+            line_idx = line_idx + 1
+            text_idx = text_end
+
+        # same layout as the blocks returned by page.get_text("dict")
+        block = {'bbox' : bboxes[4*block_idx:4*block_idx+4],
+                 'lines' : [{'spans' : spans}]}
+
+        processed_document.add_text_block(block, page_number)
+
+    return processed_document
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class ExtractionCache:
+    """
+    On disk cache of extracted ProcessedDocuments. Entries are keyed by the path,
+    size and modification time of the pdf, and the least recently used entries
+    are evicted once the cache grows past max_size bytes.
+    """
+
+    def __init__(self,
+                 cache_dir : str,
+                 max_size : int = DEFAULT_MAX_CACHE_SIZE):
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_cache_file_path(self,
+                            file_path : str) -> str:
+        """name of the cache entry for a pdf
+
+        Args:
+            file_path (str): file path to the pdf
+
+        Returns:
+            str: file path to the cache entry
+        """
+        stat = os.stat(file_path)
+
+        key = f'{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_FORMAT_VERSION}'
+        file_name = hashlib.sha1(key.encode('UTF-8')).hexdigest() + CACHE_FILE_EXTENSION
+
+        return os.path.join(self.cache_dir, file_name)
+
+    def contains(self,
+                 file_path : str) -> bool:
+        """check if a pdf has an entry in the cache, without reading the entry
+
+        Args:
+            file_path (str): file path to the pdf
+
+        Returns:
+            bool: True if the entry exists
+        """
+        try:
+            return os.path.exists(self.get_cache_file_path(file_path))
+        except OSError:
+            return False
+
+    def load(self,
+             file_path : str,
+             columnar : bool = False) -> ProcessedDocument:
+        """get the cached document for a pdf
+
+        Args:
+            file_path (str): file path to the pdf
+            columnar (bool): return the document as a ColumnarDocument
+
+        Returns:
+            ProcessedDocument: the cached document, None if it is not in the cache
+        """
+        try:
+            cache_file_path = self.get_cache_file_path(file_path)
+
+            with open(cache_file_path, 'rb') as cache_file:
+                processed_document = decode_processed_document(cache_file.read(), columnar)
+
+            # the modification time of an entry records when it was last used
+            os.utime(cache_file_path)
+
+        except (OSError, ValueError, EOFError, zlib.error):
+            return None
+
+        processed_document.file_path = file_path
+
+        return processed_document
+
+    def store(self,
+              file_path : str,
+              processed_document : ProcessedDocument) -> None:
+        """add the document extracted from a pdf to the cache
+
+        Args:
+            file_path (str): file path to the pdf
+            processed_document (ProcessedDocument): document extracted from the pdf
+        """
+        try:
+            cache_file_path = self.get_cache_file_path(file_path)
+
+            # write to a temporary file first so other workers never see a partial entry
+            tmp_file_path = f'{cache_file_path}.{os.getpid()}.tmp'
+            with open(tmp_file_path, 'wb') as cache_file:
+                cache_file.write(encode_processed_document(processed_document))
+
+            os.replace(tmp_file_path, cache_file_path)
+
+        except OSError as e:
+            print(f'Could NOT cache file: {file_path} ({e})')
+
+    @property
+    def size(self) -> int:
+        """total size of the cache entries in bytes
+        """
+        return sum(entry.stat().st_size for entry in self.get_entries())
+
+    def get_entries(self) -> list:
+
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith(CACHE_FILE_EXTENSION)]
+
+    def prune(self) -> int:
+        """evict the least recently used entries until the cache fits in max_size
+
+        Returns:
+            int: number of entries evicted
+        """
+        entries = sorted(self.get_entries(), key=lambda entry: entry.stat().st_mtime_ns)
+
+        cache_size = sum(entry.stat().st_size for entry in entries)
+        num_evicted = 0
+
+        for entry in entries:
+            if cache_size <= self.max_size:
+                break
+
+            try:
+                cache_size = cache_size - entry.stat().st_size
+                os.remove(entry.path)
+                num_evicted = num_evicted + 1
+            except FileNotFoundError:
+                pass
+
+        return num_evicted
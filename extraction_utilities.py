@@ -1,10 +1,17 @@
 import math
+import os
 
 import fitz
 from dataclasses import dataclass, field
 from typing import List
 
+from heading_matcher import HeadingMatcher
 from processed_document import ProcessedDocument
+from columnar_document import ColumnarDocument
+from extraction_cache import ExtractionCache
+from lazy_document import LazyProcessedDocument
+from pipeline_trace import DocumentTrace, trace_count, trace_stage
+from providers import DEFAULT_PROVIDER, Provider, sniff_fitz_doc, sniff_processed_doc
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -17,10 +24,10 @@ QA_HEADINGS = ['Question & Answer',
               '(Questions & Answers)',
               '(Question and Answer)',
               '(Question And Answer)',
-              '(Questions and Answers)',
-              'QUESTIONS AND ANSWERS',
-              'QUESTION AND ANSWER',
-              'QUESTION & ANSWER']
+              '(Questions and Answers)']
+
+# matches the QA_HEADINGS in any case, e.g. 'QUESTIONS AND ANSWERS'
+QA_HEADING_MATCHER = HeadingMatcher(QA_HEADINGS, ignore_case=True)
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -37,11 +44,34 @@ class AnalysisResults:
     participants_text_box_end : int = -1
     ceo_name : str = ''
     num_ceos : int = 0
+    # company of the CEO table the CEO was taken from when the transcript does
+    # not name one, and whether only a fuzzy match of the names found it
+    ceo_table_company : str = ''
+    ceo_fuzzy_match : bool = False
     qa_section_page: int = -1
+    qa_section_found : bool = True
     answer_text : List = field(default_factory=lambda: [])
 
     heading_font_dict : dict = field(default_factory=lambda: {})
 
+    # SpeakerTurns of the Q&A section
+    speaker_turns : List = field(default_factory=lambda: [], repr=False)
+
+    # stage timings of the document when the run is traced
+    trace : DocumentTrace = field(default=None, repr=False)
+
+    # file path of the canonical pdf when the document is a near-duplicate which was not processed
+    duplicate_of : str = ''
+
+    # False when no provider recognises the format, the pdf was not extracted
+    format_identified : bool = True
+
+    # False when the pdf could not be opened, e.g. a truncated download
+    file_readable : bool = True
+
+    # sha1 of the pdf, computed by the worker when the run keeps a manifest
+    content_hash : str = ''
+
     @property
     def num_answers(self) -> int:
         """property to return the number of answers found
@@ -57,45 +87,173 @@ class AnalysisResults:
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-def get_processed_doc_from_fitz_doc(fitz_doc : fitz.fitz.Document) -> ProcessedDocument:
+def get_processed_doc_from_fitz_doc(fitz_doc : fitz.fitz.Document,
+                                    columnar : bool = False,
+                                    first_page : tuple = None) -> ProcessedDocument:
     """gets the text_blocks out of a fitz document and stores them in a ProcessedDocument
 
     Args:
         fitz_doc (fitz.fitz.document): document object containing the text blocks
+        columnar (bool): store the text_blocks in a ColumnarDocument
+        first_page (tuple): page 0 and its TextPage returned by read_first_page,
+            the page is not read again
 
     Returns:
         ProcessedDocument: Dataclass containing the extracted text_blocks
     """
-    processed_document = ProcessedDocument()
+    if columnar:
+        processed_document = ColumnarDocument()
+    else:
+        processed_document = ProcessedDocument()
 
     for page_num , page in enumerate(fitz_doc):
 
-        blocks = page.get_text("dict", flags=11, sort=True)["blocks"]
+        with trace_stage('get_text'):
+            if page_num == 0 and first_page is not None:
+                page, text_page = first_page
+                blocks = page.get_text("dict", textpage=text_page, sort=True)["blocks"]
+            else:
+                blocks = page.get_text("dict", flags=11, sort=True)["blocks"]
 
-        processed_document.add_text_blocks(blocks, page_num)
+        with trace_stage('blocks'):
+            processed_document.add_text_blocks(blocks, page_num)
 
     return processed_document
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-def get_processed_doc_from_file(file_path : str) -> ProcessedDocument:
-    """ returns the text_blocks from a single pdf
+def read_first_page(fitz_doc : fitz.fitz.Document) -> tuple:
+    """plain text of page 0, read from a TextPage which is kept to extract
+    the text blocks of the page
+
+    Args:
+        fitz_doc (fitz.fitz.document): the open pdf, with at least one page
+
+    Returns:
+        tuple: the page and its TextPage, which only holds a weak reference to
+            the page, and the plain text of the page
+    """
+    with trace_stage('get_text'):
+        page = fitz_doc[0]
+        text_page = page.get_textpage(flags=11)
+
+        page_text = page.get_text("text", textpage=text_page)
+
+    return (page, text_page), page_text
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_processed_doc_from_file(file_path : str,
+                                extraction_cache : ExtractionCache = None,
+                                columnar : bool = False,
+                                lazy : bool = False,
+                                prescan : bool = False,
+                                file_data : bytes = None,
+                                default_provider : Provider = DEFAULT_PROVIDER) -> ProcessedDocument:
+    """ returns the text_blocks from a single pdf. The provider is identified
+    from the first page before anything else is extracted, a pdf of an
+    unknown format is returned without text blocks or provider when there
+    is no default provider.
 
     Args:
         file_path (str): file path to the pdf
+        extraction_cache (ExtractionCache): cache of previously extracted documents
+        columnar (bool): store the text_blocks in a ColumnarDocument
+        lazy (bool): return a LazyProcessedDocument which only extracts the pages
+            that are accessed, used when the pdf is not in the cache
+        prescan (bool): scan the plain text of the pdf for the Q&A heading first
+            and return a LazyProcessedDocument which only extracts the pages from
+            the ones found, a document without a Q&A section is never extracted.
+            The provider gives the titles and the header looked for
+        file_data (bytes): content of the pdf already read, e.g. by a PdfPrefetcher,
+            opened from memory instead of reading file_path
+        default_provider (Provider): provider of a pdf identified by neither its
+            first page nor its path
 
     Returns:
         list: List of lists of text_block tuples
     """
+    if extraction_cache is not None:
+        with trace_stage('cache_load'):
+            processed_document = extraction_cache.load(file_path, columnar)
+
+        if processed_document is not None:
+            trace_count('pages', processed_document.num_pages)
+
+            with trace_stage('provider'):
+                provider = sniff_processed_doc(processed_document, default_provider)
+
+            if provider is not None:
+                processed_document.provider_name = provider.name
+
+            return processed_document
+
     processed_document = ProcessedDocument()
 
     try:
-        fitz_doc = fitz.open(file_path)
-        processed_document = get_processed_doc_from_fitz_doc(fitz_doc)
-        processed_document.file_path = file_path
+        with trace_stage('open'):
+            if file_data is not None:
+                fitz_doc = fitz.open(stream=file_data, filetype='pdf')
+            else:
+                fitz_doc = fitz.open(file_path)
+
+        trace_count('bytes_read', len(file_data) if file_data is not None else os.path.getsize(file_path))
+        trace_count('pages', fitz_doc.page_count)
+
+        lazy_document = None
+        if lazy or prescan:
+            lazy_document = LazyProcessedDocument(fitz_doc, file_path)
+
+        # page 0 is read once, its TextPage gives the plain text the provider
+        # is identified from and then the text blocks of the page
+        first_page = None
+        page_text = None
+
+        if fitz_doc.page_count > 0:
+            if lazy_document is not None:
+                first_page = lazy_document.read_page_text()
+                page_text = lazy_document.get_page_text(0)
+            else:
+                first_page, page_text = read_first_page(fitz_doc)
+
+        with trace_stage('provider'):
+            provider = sniff_fitz_doc(fitz_doc, file_path, page_text, default_provider)
+
+        if provider is None:
+            # nothing is extracted from a pdf of an unknown format
+            return ProcessedDocument(file_path=file_path)
+
+        if lazy_document is not None:
+            lazy_document.provider_name = provider.name
+
+            # page 0 holds the header of every provider
+            if first_page is not None:
+                lazy_document.parse_page(0, first_page)
+
+            if prescan:
+                with trace_stage('prescan'):
+                    lazy_document.prescan_result = lazy_document.prescan(QA_HEADING_MATCHER,
+                                                                         provider.participants_matcher,
+                                                                         provider.header_pattern,
+                                                                         provider.header_pages)
+
+            # partially extracted documents are not cached, the heading searches
+            # of a pre-scanned document start at the pages it found
+            return lazy_document
+        else:
+            processed_document = get_processed_doc_from_fitz_doc(fitz_doc, columnar, first_page)
+            processed_document.file_path = file_path
+            processed_document.provider_name = provider.name
+
+        if extraction_cache is not None:
+            with trace_stage('cache_store'):
+                extraction_cache.store(file_path, processed_document)
     except fitz.fitz.FileDataError:
         print('Can not open file: ', file_path)
 
+        # reported with its path, so a broken download is retried by the next run
+        processed_document = ProcessedDocument(file_path=file_path, readable=False)
+
     return processed_document
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
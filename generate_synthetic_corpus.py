@@ -0,0 +1,377 @@
+import argparse
+import os
+import random
+
+import fitz
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 54
+
+BODY_FONT_SIZE = 10
+LINE_SPACING = 1.2
+BLOCK_GAP = 14
+LINE_WIDTH_CHARS = 95
+COLUMN_WIDTH = 86
+
+BLOOMBERG_HEADING_FONT = 'AvenirNextPForBBG-Medium'
+BLOOMBERG_BODY_FONT = 'AvenirNextPForBBG-Regular'
+
+REFINITIV_HEADING_FONT = 'Arial-BoldMT'
+REFINITIV_SPEAKER_FONT = 'Arial-BoldItalicMT'
+REFINITIV_BODY_FONT = 'ArialMT'
+
+# base 14 fonts used to draw the text, renamed afterwards so that the
+# extracted span fonts look like the ones found in the real transcripts
+FONT_ALIASES = {'hebo' : 'heading',
+                'hebi' : 'speaker',
+                'helv' : 'body'}
+
+WORDS = ('the quarter revenue margin growth guidance capital store sales customers '
+         'demand pricing inventory we our team expect continue strong results year '
+         'market share cost expansion new program digital traffic basket operating '
+         'cash flow balance sheet dividend outlook supply chain freight labour wage '
+         'comparable fiscal second third fourth first half momentum execution value').split()
+
+FIRST_NAMES = ['John', 'Mary', 'Neil', 'Sarah', 'Tomas', 'Aisha', 'Pierre', 'Linda', 'Rahul', 'Grace']
+LAST_NAMES = ['Rossy', 'Smith', 'Tremblay', 'Nguyen', 'Larson', 'Okafor', 'Martin', 'Chen', 'Garcia', 'Booth']
+COMPANY_WORDS = ['Northern', 'Maple', 'Atlas', 'Summit', 'Frontier', 'Harbour', 'Granite', 'Polar', 'Cedar', 'Aurora']
+COMPANY_SUFFIXES = ['Inc', 'Corp', 'Ltd', 'Group Inc', 'Resources Ltd']
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TranscriptWriter:
+    """
+    Lays out text blocks page by page, adding a header and footer to every page
+    """
+
+    def __init__(self,
+                 header_lines : list,
+                 footer_lines : list,
+                 font_names : dict,
+                 first_footer_page : int = 0):
+
+        self.fitz_doc = fitz.open()
+        self.header_lines = header_lines
+        self.footer_lines = footer_lines
+        self.font_names = font_names
+        self.first_footer_page = first_footer_page
+        self.page = None
+        self.y = 0.
+
+        self.new_page()
+
+    @property
+    def num_pages(self) -> int:
+        return self.fitz_doc.page_count
+
+    def new_page(self) -> None:
+
+        self.page = self.fitz_doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.y = MARGIN
+
+        self.add_block(self.header_lines, 'body', font_size=8, new_page_allowed=False)
+
+        if self.num_pages <= self.first_footer_page:
+            return
+
+        footer_y = PAGE_HEIGHT - MARGIN - 7*LINE_SPACING*len(self.footer_lines)
+        for num, line in enumerate(self.footer_lines):
+            line = line.replace('{page}', str(self.num_pages))
+            self.page.insert_text((MARGIN, footer_y + num*7*LINE_SPACING), line,
+                                  fontname='helv', fontsize=7)
+
+    def add_block(self,
+                  lines : list,
+                  style : str = 'body',
+                  font_size : float = BODY_FONT_SIZE,
+                  new_page_allowed : bool = True) -> None:
+        """draw a block of lines, starting a new page when the current one is full
+
+        Args:
+            lines (list): lines of text in the block
+            style (str): one of heading, speaker, body
+            font_size (float): font size
+            new_page_allowed (bool): start a new page if the block does not fit
+        """
+        self.add_rows([[lines]], style, font_size, new_page_allowed)
+
+    def add_rows(self,
+                 rows : list,
+                 style : str = 'body',
+                 font_size : float = BODY_FONT_SIZE,
+                 new_page_allowed : bool = True) -> None:
+        """draw rows of side by side blocks, one column at a time so that
+        every cell is extracted as a separate block
+
+        Args:
+            rows (list): each row is a list of cells, each cell a list of lines
+            style (str): one of heading, speaker, body
+            font_size (float): font size
+            new_page_allowed (bool): start a new page if the rows do not fit
+        """
+        fontname = {'heading' : 'hebo', 'speaker' : 'hebi', 'body' : 'helv'}[style]
+        line_height = font_size*LINE_SPACING
+
+        row_heights = [line_height*max(len(cell) for cell in row) for row in rows]
+        total_height = sum(row_heights) + BLOCK_GAP*len(rows)
+
+        if new_page_allowed and self.y + total_height > PAGE_HEIGHT - 2*MARGIN - 30:
+            self.new_page()
+
+        num_columns = max(len(row) for row in rows)
+        for column in range(num_columns):
+            y = self.y
+            for row, row_height in zip(rows, row_heights):
+                if column < len(row):
+                    for num, line in enumerate(row[column]):
+                        self.page.insert_text((MARGIN + column*COLUMN_WIDTH, y + font_size + num*line_height),
+                                              line, fontname=fontname, fontsize=font_size)
+                y = y + row_height + BLOCK_GAP
+
+        self.y = self.y + total_height
+
+    def add_paragraph(self,
+                      rand : random.Random,
+                      num_words : int) -> None:
+        words = [rand.choice(WORDS) for _ in range(num_words)]
+
+        lines = []
+        line = ''
+        for word in words:
+            if len(line) + len(word) + 1 > LINE_WIDTH_CHARS:
+                lines.append(line)
+                line = ''
+            line = (line + ' ' + word).strip()
+        lines.append(line.capitalize() + '.')
+
+        self.add_block(lines)
+
+    def to_bytes(self) -> bytes:
+        """rename the base 14 fonts and serialise the document
+        """
+        for page in self.fitz_doc:
+            for font in page.get_fonts():
+                xref, reference_name = font[0], font[4]
+                if reference_name in FONT_ALIASES:
+                    base_font = self.font_names[FONT_ALIASES[reference_name]]
+                    self.fitz_doc.xref_set_key(xref, 'BaseFont', '/' + base_font)
+
+        return self.fitz_doc.tobytes(garbage=3, deflate=True)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def random_person(rand : random.Random) -> str:
+    return f'{rand.choice(FIRST_NAMES)} {rand.choice(LAST_NAMES)}'
+
+def random_company(rand : random.Random) -> str:
+    return f'{rand.choice(COMPANY_WORDS)} {rand.choice(COMPANY_WORDS)} {rand.choice(COMPANY_SUFFIXES)}'
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def generate_bloomberg_transcript(rand : random.Random,
+                                  num_pages : int,
+                                  has_qa : bool = True) -> bytes:
+    """generate a pdf laid out like a Bloomberg transcript
+
+    Args:
+        rand (random.Random): random number generator
+        num_pages (int): approximate number of pages
+        has_qa (bool): include a Q&A section
+
+    Returns:
+        bytes: the pdf
+    """
+    company = random_company(rand)
+    year = rand.randint(2015, 2023)
+    ceo_name = random_person(rand)
+    cfo_name = random_person(rand)
+
+    header = [f'Company Name: {company}',
+              f'Company Ticker: {company[:4].upper()} CN Equity',
+              f'Date: {year}-0{rand.randint(1, 9)}-1{rand.randint(0, 9)}']
+    footer = ['Bloomberg Transcript', 'Page {page} of ' + str(num_pages), 'FINAL']
+
+    writer = TranscriptWriter(header, footer, {'heading' : BLOOMBERG_HEADING_FONT,
+                                               'speaker' : BLOOMBERG_HEADING_FONT,
+                                               'body' : BLOOMBERG_BODY_FONT})
+
+    writer.add_block([f'Q{rand.randint(1, 4)} {year} Earnings Call'], 'heading', font_size=16)
+    writer.add_block(['Company Participants'], 'heading', font_size=12)
+
+    participants = [(ceo_name, 'President & Chief Executive Officer'),
+                    (cfo_name, 'Chief Financial Officer')]
+    writer.y = writer.y + BLOCK_GAP
+    writer.add_rows([[[name], [title]] for name, title in participants])
+
+    writer.add_block(['Other Participants'], 'heading', font_size=12)
+    analysts = [random_person(rand) for _ in range(rand.randint(2, 6))]
+    for name in analysts:
+        writer.add_block([f'{name}, Analyst'])
+
+    writer.add_block(['Presentation'], 'heading', font_size=12)
+    qa_page = max(2, int(num_pages*0.4)) if has_qa else num_pages
+
+    speakers = [ceo_name, cfo_name]
+    while writer.num_pages < qa_page:
+        writer.add_block([f'{rand.choice(speakers)} {{BIO {rand.randint(10**6, 10**7)} <GO>}}'], 'speaker')
+        for _ in range(rand.randint(2, 5)):
+            writer.add_paragraph(rand, rand.randint(40, 140))
+
+    if has_qa:
+        writer.add_block(['Questions And Answers'], 'heading', font_size=12)
+
+        while writer.num_pages < num_pages:
+            writer.add_block(['Operator'], 'speaker')
+            writer.add_paragraph(rand, 12)
+            writer.add_block([f'{rand.choice(analysts)} {{BIO {rand.randint(10**6, 10**7)} <GO>}}'], 'speaker')
+            writer.add_paragraph(rand, rand.randint(20, 60))
+            writer.add_block([f'{rand.choice(speakers)} {{BIO {rand.randint(10**6, 10**7)} <GO>}}'], 'speaker')
+            for _ in range(rand.randint(1, 4)):
+                writer.add_paragraph(rand, rand.randint(40, 140))
+
+    return writer.to_bytes()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def generate_refinitiv_transcript(rand : random.Random,
+                                  num_pages : int,
+                                  has_qa : bool = True) -> bytes:
+    """generate a pdf laid out like a Refinitiv StreetEvents transcript
+
+    Args:
+        rand (random.Random): random number generator
+        num_pages (int): approximate number of pages
+        has_qa (bool): include a Q&A section
+
+    Returns:
+        bytes: the pdf
+    """
+    company = random_company(rand)
+    year = rand.randint(2015, 2023)
+    quarter = rand.randint(1, 4)
+    ticker = company[:4].upper()
+    call_name = f'Q{quarter} {year} {company} Earnings Call'
+
+    ceo = f'{random_person(rand)} {company} - President & CEO'
+    cfo = f'{random_person(rand)} {company} - CFO'
+
+    header = ['REFINITIV STREETEVENTS']
+    footer = [f'NOVEMBER 0{rand.randint(1, 9)}, {year} / 2:00PM, {ticker}.TO - {call_name}',
+              f'©{year} Refinitiv. All rights reserved.',
+              'REFINITIV STREETEVENTS | www.refinitiv.com | Contact Us']
+
+    writer = TranscriptWriter(header, footer, {'heading' : REFINITIV_HEADING_FONT,
+                                               'speaker' : REFINITIV_SPEAKER_FONT,
+                                               'body' : REFINITIV_BODY_FONT},
+                              first_footer_page=1)
+
+    writer.add_block(['EDITED TRANSCRIPT'], 'body', font_size=12)
+    writer.add_block([call_name], 'body', font_size=14)
+    writer.add_block([f'EVENT DATE/TIME: NOVEMBER 03, {year} / 2:00PM GMT'])
+    writer.new_page()
+
+    writer.add_block(['CORPORATE PARTICIPANTS'], 'heading', font_size=12)
+    for person in [ceo, cfo]:
+        name, title = person.split(f' {company} ')
+        writer.add_block([name, f'{company} {title}'])
+
+    writer.add_block(['CONFERENCE CALL PARTICIPANTS'], 'heading', font_size=12)
+    analysts = [f'{random_person(rand)} Bank Securities - Analyst' for _ in range(rand.randint(2, 6))]
+    for analyst in analysts:
+        writer.add_block(analyst.split(' Bank ', 1)[0:1] + ['Bank ' + analyst.split(' Bank ', 1)[1]])
+
+    writer.add_block(['PRESENTATION'], 'heading', font_size=12)
+    qa_page = max(3, int(num_pages*0.4)) if has_qa else num_pages
+
+    speakers = [ceo, cfo]
+    while writer.num_pages < qa_page:
+        name, title = rand.choice(speakers).split(f' {company} ')
+        writer.add_block([name, f'{company} {title}'], 'speaker')
+        for _ in range(rand.randint(2, 5)):
+            writer.add_paragraph(rand, rand.randint(40, 140))
+
+    if has_qa:
+        writer.add_block(['QUESTIONS AND ANSWERS'], 'heading', font_size=12)
+
+        while writer.num_pages < num_pages:
+            writer.add_block(['Operator'], 'speaker')
+            writer.add_paragraph(rand, 12)
+            analyst = rand.choice(analysts).split(' Bank ', 1)
+            writer.add_block([analyst[0], 'Bank ' + analyst[1]], 'speaker')
+            writer.add_paragraph(rand, rand.randint(20, 60))
+            name, title = rand.choice(speakers).split(f' {company} ')
+            writer.add_block([name, f'{company} {title}'], 'speaker')
+            for _ in range(rand.randint(1, 4)):
+                writer.add_paragraph(rand, rand.randint(40, 140))
+
+    return writer.to_bytes()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def generate_corpus(output_dir : str,
+                    num_docs : int,
+                    min_pages : int = 10,
+                    max_pages : int = 40,
+                    no_qa_fraction : float = 0.1,
+                    seed : int = 0) -> list:
+    """write a synthetic corpus using the same directory layout as the Transcripts tree
+
+    Args:
+        output_dir (str): root of the corpus
+        num_docs (int): number of pdfs to generate
+        min_pages (int): minimum page count per pdf
+        max_pages (int): maximum page count per pdf
+        no_qa_fraction (float): fraction of presentation only pdfs
+        seed (int): random seed
+
+    Returns:
+        list: file paths of the generated pdfs
+    """
+    rand = random.Random(seed)
+    file_paths = []
+
+    for provider in ['Bloomberg', 'Refinitiv']:
+        os.makedirs(os.path.join(output_dir, provider), exist_ok=True)
+
+    for num in range(num_docs):
+        provider = 'Bloomberg' if num % 2 == 0 else 'Refinitiv'
+        num_pages = rand.randint(min_pages, max_pages)
+        has_qa = rand.random() >= no_qa_fraction
+
+        if provider == 'Bloomberg':
+            pdf_bytes = generate_bloomberg_transcript(rand, num_pages, has_qa)
+        else:
+            pdf_bytes = generate_refinitiv_transcript(rand, num_pages, has_qa)
+
+        file_path = os.path.join(output_dir, provider, f'transcript_{num:05d}.pdf')
+        with open(file_path, 'wb') as output_file:
+            output_file.write(pdf_bytes)
+
+        file_paths.append(file_path)
+
+    return file_paths
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Bloomberg/Refinitiv transcript corpus')
+    parser.add_argument('output_dir')
+    parser.add_argument('--num-docs', type=int, default=20)
+    parser.add_argument('--min-pages', type=int, default=10)
+    parser.add_argument('--max-pages', type=int, default=40)
+    parser.add_argument('--no-qa-fraction', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    file_paths = generate_corpus(args.output_dir, args.num_docs, args.min_pages,
+                                 args.max_pages, args.no_qa_fraction, args.seed)
+
+    print(f'# of files: {len(file_paths)}')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__ == '__main__':
+    main()
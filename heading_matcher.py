@@ -0,0 +1,92 @@
+import functools
+import re
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class HeadingMatcher:
+    """
+    Matches text against a list of section titles with a single compiled
+    alternation, optionally ignoring case, so a line is scanned once
+    instead of once per title.
+    """
+
+    def __init__(self,
+                 titles : list,
+                 ignore_case : bool = False):
+
+        self.titles = list(titles)
+        self.ignore_case = ignore_case
+
+        if len(self.titles) == 0:
+            # never matches
+            pattern = r'(?!)'
+        else:
+            # longest titles first so the reported match is the most specific one
+            unique_titles = sorted(set(self.titles), key=len, reverse=True)
+            pattern = '|'.join(re.escape(title) for title in unique_titles)
+
+        self.pattern = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+    def __repr__(self):
+        return f'HeadingMatcher({self.titles}, ignore_case={self.ignore_case})'
+
+    def search(self,
+               text : str) -> bool:
+        """check if any of the titles is contained in text
+
+        Args:
+            text (str): text being searched
+
+        Returns:
+            bool: True if a title is found
+        """
+        return self.pattern.search(text) is not None
+
+    def find(self,
+             text : str) -> str:
+        """the title found in text
+
+        Args:
+            text (str): text being searched
+
+        Returns:
+            str: the matched text, '' if no title is found
+        """
+        match = self.pattern.search(text)
+
+        if match is None:
+            return ''
+
+        return match.group(0)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@functools.lru_cache(maxsize=256)
+def get_cached_matcher(titles : tuple,
+                       ignore_case : bool = False) -> HeadingMatcher:
+    """compile a list of titles once and reuse the matcher on later calls
+
+    Args:
+        titles (tuple): titles to match
+        ignore_case (bool): match regardless of case
+
+    Returns:
+        HeadingMatcher: matcher for the titles
+    """
+    return HeadingMatcher(titles, ignore_case)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def as_heading_matcher(titles) -> HeadingMatcher:
+    """accept either a HeadingMatcher or a list of titles
+
+    Args:
+        titles (HeadingMatcher | list): titles to match
+
+    Returns:
+        HeadingMatcher: matcher for the titles
+    """
+    if isinstance(titles, HeadingMatcher):
+        return titles
+
+    return get_cached_matcher(tuple(titles))
@@ -0,0 +1,415 @@
+from bisect import bisect_right
+
+import re
+
+import fitz
+from unidecode import unidecode
+
+from document_prescan import HEADER_PATTERN, PARTICIPANTS_HEADING_MATCHER, DocumentPreScan
+from heading_matcher import HeadingMatcher, as_heading_matcher
+from pipeline_trace import trace_stage
+from processed_document import DocumentTextBlock, ProcessedDocument, TextBlockView
+
+# same flags as get_processed_doc_from_fitz_doc
+TEXT_FLAGS = 11
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def count_text_page_blocks(text_page : fitz.TextPage) -> int:
+    """number of blocks of a TextPage, including the ones the "blocks" and
+    "dict" modes leave out, without extracting their text
+
+    Args:
+        text_page (fitz.TextPage): TextPage of a page
+
+    Returns:
+        int: number of blocks
+    """
+    return sum(1 for _ in text_page.this)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class LazyProcessedDocument(ProcessedDocument):
+    """
+    ProcessedDocument backed by an open fitz document which only parses a page
+    into DocumentTextBlocks when one of its blocks is accessed.
+
+    Block indices are the same as for a fully extracted document, the pages are
+    numbered in order as they are reached. A page reached by a block access is
+    parsed in the "dict" mode, which numbers it. The heading searches first read
+    the pages they reach in the cheaper "blocks" mode, which gives the number of
+    blocks and the plain text used to skip pages that can not contain a heading,
+    and parse the pages which can with the same TextPage. No TextPage is kept
+    once the page has been read.
+
+    The "blocks" mode leaves out the blocks without a visible character, which
+    the "dict" mode keeps, so a page is only numbered from the "blocks" mode
+    when no block of its TextPage was left out, and parsed when it is read
+    otherwise. A page whose parsed blocks still do not match its count is
+    numbered again with the pages after it.
+    """
+
+    def __init__(self,
+                 fitz_doc : fitz.fitz.Document,
+                 file_path : str = ''):
+
+        super().__init__(file_path=file_path)
+
+        self.fitz_doc = fitz_doc
+
+        # per numbered page: index of its first block and its plain text, None
+        # if the page was parsed without reading the plain text
+        self.page_offsets = [0]
+        self.page_texts = []
+
+        # page number -> list of DocumentTextBlocks
+        self.parsed_pages = {}
+
+        self.document_text_blocks = TextBlockView(self)
+
+    @property
+    def num_pages(self) -> int:
+        return self.fitz_doc.page_count
+
+    @property
+    def num_counted_pages(self) -> int:
+        return len(self.page_texts)
+
+    @property
+    def num_parsed_pages(self) -> int:
+        return len(self.parsed_pages)
+
+    @property
+    def num_text_blocks(self) -> int:
+        self.count_pages(self.num_pages)
+
+        return self.page_offsets[-1]
+
+    @property
+    def num_extracted_text_blocks(self) -> int:
+        return sum(len(text_blocks) for text_blocks in self.parsed_pages.values())
+
+    def has_text_blocks(self) -> bool:
+        """True if a page has a text block, the pages are parsed until one is found
+        """
+        while self.page_offsets[-1] == 0 and self.num_counted_pages < self.num_pages:
+            self.count_pages(self.num_counted_pages + 1)
+
+        return self.page_offsets[-1] > 0
+
+    def count_pages(self,
+                    num_pages : int) -> None:
+        """number the blocks of the first num_pages pages, the pages which are
+        not numbered yet are parsed
+
+        Args:
+            num_pages (int): number of pages which have to be counted
+        """
+        for page_number in range(self.num_counted_pages, min(num_pages, self.num_pages)):
+            self.parse_page(page_number)
+
+    def read_page_text(self) -> tuple:
+        """number the next page from its plain text, read in the "blocks" mode.
+        The text is passed through unidecode like the text of the lines.
+
+        Returns:
+            tuple: the page and its TextPage, which only holds a weak reference
+                to the page, to parse the page without reading it again
+        """
+        page_number = self.num_counted_pages
+
+        with trace_stage('get_text'):
+            page = self.fitz_doc[page_number]
+            text_page = page.get_textpage(flags=TEXT_FLAGS)
+
+            blocks = page.get_text('blocks', textpage=text_page, sort=True)
+
+        self.page_texts.append(unidecode(''.join(block[4] for block in blocks)))
+        self.page_offsets.append(self.page_offsets[-1] + len(blocks))
+
+        if count_text_page_blocks(text_page) != len(blocks):
+            self.parse_page(page_number, (page, text_page))
+
+        return page, text_page
+
+    def get_page_text(self,
+                      page_number : int) -> str:
+        """plain text of a page, the pages up to it which are not numbered yet
+        are read in the "blocks" mode
+
+        Args:
+            page_number (int): page whose text is returned
+
+        Returns:
+            str: text of the page, joined from its text blocks if it was parsed
+                without reading the plain text
+        """
+        while self.num_counted_pages <= page_number:
+            self.read_page_text()
+
+        page_text = self.page_texts[page_number]
+
+        if page_text is None:
+            page_text = '\n'.join(text_block.get_text() for text_block in self.parsed_pages[page_number])
+
+        return page_text
+
+    def get_page_number(self,
+                        idx : int) -> int:
+        """page containing the block idx, parsing pages until it is found
+
+        Returns:
+            int: page number, -1 if idx is past the last block
+        """
+        while idx >= self.page_offsets[-1] and self.num_counted_pages < self.num_pages:
+            self.count_pages(self.num_counted_pages + 1)
+
+        if idx >= self.page_offsets[-1]:
+            return -1
+
+        return bisect_right(self.page_offsets, idx) - 1
+
+    def get_page_start_idx(self,
+                           page_number : int) -> int:
+
+        if page_number == -1:
+            return -1
+
+        self.count_pages(page_number)
+
+        return self.page_offsets[min(page_number, self.num_counted_pages)]
+
+    def get_page_blocks(self,
+                        page_number : int,
+                        text_page : tuple = None) -> list:
+        """text blocks of a page as returned by page.get_text("dict")
+
+        Args:
+            page_number (int): page to extract
+            text_page (tuple): page and TextPage returned by read_page_text, the
+                page is read again if None
+
+        Returns:
+            list: text block dicts of the page
+        """
+        with trace_stage('get_text'):
+            if text_page is None:
+                return self.fitz_doc[page_number].get_text('dict', flags=TEXT_FLAGS, sort=True)['blocks']
+
+            page, text_page = text_page
+
+            return page.get_text('dict', textpage=text_page, sort=True)['blocks']
+
+    def parse_page(self,
+                   page_number : int,
+                   text_page : tuple = None) -> list:
+        """DocumentTextBlocks of a page, extracting them on first access. The
+        pages before it are numbered first.
+
+        Args:
+            page_number (int): page to parse
+            text_page (tuple): page and TextPage returned by read_page_text
+
+        Returns:
+            list: text blocks of the page
+        """
+        text_blocks = self.parsed_pages.get(page_number)
+
+        if text_blocks is None:
+            self.count_pages(page_number)
+
+            blocks = self.get_page_blocks(page_number, text_page)
+
+            with trace_stage('blocks'):
+                text_blocks = [DocumentTextBlock(block, page_number, self.font_registry) for block in blocks]
+
+            self.parsed_pages[page_number] = text_blocks
+
+            if page_number == self.num_counted_pages:
+                self.page_texts.append(None)
+                self.page_offsets.append(self.page_offsets[-1] + len(text_blocks))
+            elif self.page_offsets[page_number+1] - self.page_offsets[page_number] != len(text_blocks):
+                self.renumber_pages(page_number, len(text_blocks))
+
+        return text_blocks
+
+    def renumber_pages(self,
+                       page_number : int,
+                       num_text_blocks : int) -> None:
+        """correct the number of blocks of a page counted in the "blocks" mode
+        and shift the pages after it
+
+        Args:
+            page_number (int): page whose count is corrected
+            num_text_blocks (int): number of text blocks parsed from the page
+        """
+        shift = num_text_blocks - (self.page_offsets[page_number+1] - self.page_offsets[page_number])
+
+        for idx in range(page_number+1, len(self.page_offsets)):
+            self.page_offsets[idx] = self.page_offsets[idx] + shift
+
+    def get_text_block(self,
+                       idx : int) -> DocumentTextBlock:
+
+        if idx < 0:
+            idx = idx + self.num_text_blocks
+
+        page_number = self.get_page_number(idx)
+        if idx < 0 or page_number == -1:
+            raise IndexError('text block index out of range')
+
+        return self.parse_page(page_number)[idx - self.page_offsets[page_number]]
+
+    def get_text_blocks(self,
+                        start_idx : int,
+                        end_idx : int) -> list:
+
+        # negative indices count from the end of the document
+        if start_idx < 0 or end_idx < 0:
+            return super().get_text_blocks(start_idx, end_idx)
+
+        text_blocks = []
+
+        for idx in range(start_idx, end_idx):
+            page_number = self.get_page_number(idx)
+            if page_number == -1:
+                break
+
+            text_blocks.append(self.parse_page(page_number)[idx - self.page_offsets[page_number]])
+
+        return text_blocks
+
+    def get_page_text_blocks(self,
+                             page_number : int) -> list:
+
+        if page_number >= self.num_pages:
+            return []
+
+        return self.parse_page(page_number)
+
+    def load_all_pages(self) -> None:
+        for page_number in range(self.num_pages):
+            self.parse_page(page_number)
+
+    def prescan(self,
+                qa_heading_matcher : HeadingMatcher,
+                participants_matcher : HeadingMatcher = PARTICIPANTS_HEADING_MATCHER,
+                header_pattern : re.Pattern = HEADER_PATTERN,
+                header_pages : int = None) -> DocumentPreScan:
+        """find the pages of interest from the plain text of the pages, up to
+        the Q&A heading. The pages found are parsed with the TextPage their
+        text was read from, the analysis starts its searches there.
+
+        Args:
+            qa_heading_matcher (HeadingMatcher): titles of the Q&A section
+            participants_matcher (HeadingMatcher): titles of the participants section
+            header_pattern (re.Pattern): company header
+            header_pages (int): number of first pages the header is looked for on,
+                every page if None
+
+        Returns:
+            DocumentPreScan: pages found
+        """
+        prescan_result = DocumentPreScan(num_pages=self.num_pages)
+
+        for page_number in range(self.num_pages):
+            text_page = None
+            if page_number == self.num_counted_pages:
+                text_page = self.read_page_text()
+
+            if prescan_result.scan_page(page_number, self.get_page_text(page_number),
+                                        qa_heading_matcher, participants_matcher,
+                                        header_pattern, header_pages):
+                self.parse_page(page_number, text_page)
+
+            if prescan_result.qa_section_found:
+                break
+
+        return prescan_result
+
+    def add_text_block(self,
+                       text_block : dict,
+                       page_number : int) -> None:
+        raise TypeError('Text blocks are read from the pdf and can not be added to a LazyProcessedDocument')
+
+    def get_heading_idx(self,
+                        titles,
+                        font_dict: dict,
+                        start_idx = -1,
+                        end_idx = -1) -> int:
+        """find the section heading, pages whose plain text does not contain
+        any of the titles are skipped without being parsed
+
+        Args:
+            titles (HeadingMatcher | list): titles of the section
+            font_dict (dict): font type used in headings
+
+        Returns:
+            int: index of text_block containing the heading
+        """
+        if start_idx == -1:
+            start_idx = 0
+
+        heading_matcher = as_heading_matcher(titles)
+
+        # first page which can contain start_idx, the pages are numbered in order
+        if start_idx < self.page_offsets[-1]:
+            first_page = bisect_right(self.page_offsets, start_idx) - 1
+        else:
+            first_page = self.num_counted_pages
+
+        for page_number in range(first_page, self.num_pages):
+            page_offset = self.page_offsets[page_number]
+            if end_idx != -1 and page_offset >= end_idx:
+                break
+
+            text_page = None
+            if page_number == self.num_counted_pages:
+                text_page = self.read_page_text()
+
+            if page_number not in self.parsed_pages:
+                if self.page_offsets[page_number+1] <= start_idx or not heading_matcher.search(self.page_texts[page_number]):
+                    continue
+
+            text_blocks = self.parse_page(page_number, text_page)
+
+            # parsing the page can add new fonts to the registry
+            font_ids = self.get_matching_font_ids(font_dict)
+
+            for block_num, text_block in enumerate(text_blocks):
+                idx = page_offset + block_num
+
+                if idx >= start_idx and (end_idx == -1 or idx < end_idx) and text_block.contains_heading(heading_matcher, font_ids):
+                    return idx
+
+        return -1
+
+    def get_next_heading_idx(self,
+                             start_idx : int,
+                             font: dict) -> int:
+        """index of the first block from start_idx which contains a line in font,
+        pages are parsed in order until it is found
+
+        Args:
+            start_idx (int): index of the first block searched
+            font (dict): name, colour, size
+
+        Returns:
+            int: index of the block, -1 if not found
+        """
+        page_number = self.get_page_number(max(start_idx, 0))
+        if page_number == -1:
+            return -1
+
+        for page_number in range(page_number, self.num_pages):
+            page_offset = self.page_offsets[page_number]
+            text_blocks = self.parse_page(page_number)
+
+            # parsing the page can add new fonts to the registry
+            font_ids = self.get_matching_font_ids(font)
+
+            for block_num in range(max(start_idx - page_offset, 0), len(text_blocks)):
+                if text_blocks[block_num].contains_font_ids(font_ids):
+                    return page_offset + block_num
+
+        return -1
@@ -0,0 +1,435 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from extraction_utilities import AnalysisResults
+
+# statuses of get_result_status which an incremental run can process again,
+# e.g. the Unknown Format pdfs once their provider is registered
+RETRY_STATUSES = ('No CEO', 'Multiple CEOs', 'No Answers', 'No Q&A', 'Unknown Format', 'Unreadable', 'Failed')
+
+# statuses retried when none are given, a pdf without a Q&A section (e.g. a
+# presentation only transcript) gives the same result on every run
+FAILURE_STATUSES = ('No CEO', 'Multiple CEOs', 'No Answers', 'Unreadable', 'Failed')
+
+# modules whose content, along with the config, decides the results, the
+# tooling (benchmark, trace summary, corpus generator, exporter) and the
+# modules which only schedule, profile or store the work are left out
+PIPELINE_MODULES = ('block_geometry.py',
+                    'ceo_lookup.py',
+                    'columnar_document.py',
+                    'dedup.py',
+                    'document_prescan.py',
+                    'extract_QA.py',
+                    'extract_QA_bloomberg.py',
+                    'extract_QA_refinitiv.py',
+                    'extraction_cache.py',
+                    'extraction_utilities.py',
+                    'heading_matcher.py',
+                    'lazy_document.py',
+                    'processed_document.py',
+                    'providers.py',
+                    'speaker_matching.py',
+                    'speaker_turns.py',
+                    'text_normalization.py')
+
+HASH_BLOCK_SIZE = 1024**2
+
+# records buffered before they are written in one transaction
+RECORD_BATCH_SIZE = 500
+
+# columns added to the documents table after the first manifests were written
+ADDED_COLUMNS = (('duplicate_of', "TEXT DEFAULT ''"),
+                 ('ceo_table_company', "TEXT DEFAULT ''"),
+                 ('ceo_fuzzy_match', 'INTEGER DEFAULT 0'))
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_file_hash(file_path : str,
+                  file_data : bytes = None) -> str:
+    """sha1 of the content of a file
+
+    Args:
+        file_path (str): file being hashed
+        file_data (bytes): content of the file if it was already read
+
+    Returns:
+        str: hex digest, '' if the file can not be read
+    """
+    if file_data is not None:
+        return hashlib.sha1(file_data).hexdigest()
+
+    sha1 = hashlib.sha1()
+
+    try:
+        with open(file_path, 'rb') as input_file:
+            for block in iter(lambda: input_file.read(HASH_BLOCK_SIZE), b''):
+                sha1.update(block)
+    except OSError:
+        return ''
+
+    return sha1.hexdigest()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_pipeline_version(config : dict = None,
+                         config_file_paths : list = ()) -> str:
+    """version of the code and config the documents are processed with, a hash of
+    the pipeline modules next to this module, of config and of the content of
+    the config files (e.g. the CEO table)
+
+    Args:
+        config (dict): options which change the results
+        config_file_paths (list): data files which change the results
+
+    Returns:
+        str: hex digest
+    """
+    sha1 = hashlib.sha1()
+
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+
+    source_file_paths = [os.path.join(source_dir, file_name) for file_name in PIPELINE_MODULES]
+
+    for file_path in source_file_paths + list(config_file_paths):
+        sha1.update(os.path.basename(file_path).encode('UTF-8'))
+        sha1.update(get_file_hash(file_path).encode('UTF-8'))
+
+    sha1.update(json.dumps(config or {}, sort_keys=True).encode('UTF-8'))
+
+    return sha1.hexdigest()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class Manifest:
+    """
+    SQLite record of the pdfs already processed: their identity (path, size,
+    modification time and content hash), the pipeline version they were
+    processed with, the status and the row of the results table, the output
+    file written and the canonical pdf of a near-duplicate. An incremental run only processes the pdfs which are new,
+    changed, processed by another version or whose status was a failure, and
+    the near-duplicates of the pdfs it processes again. Records are buffered
+    and written in batches, one transaction per batch.
+    """
+
+    def __init__(self,
+                 manifest_path : str,
+                 version : str,
+                 batch_size : int = RECORD_BATCH_SIZE):
+
+        self.manifest_path = manifest_path
+        self.version = version
+        self.batch_size = batch_size
+
+        # records waiting to be written
+        self.pending_rows = []
+
+        self.connection = sqlite3.connect(manifest_path)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS documents (
+                                       file_path TEXT PRIMARY KEY,
+                                       size INTEGER,
+                                       mtime_ns INTEGER,
+                                       content_hash TEXT,
+                                       version TEXT,
+                                       status TEXT,
+                                       company_name TEXT,
+                                       report_year TEXT,
+                                       ceo_name TEXT,
+                                       num_ceos INTEGER,
+                                       num_answers INTEGER,
+                                       output_path TEXT,
+                                       processed_at REAL,
+                                       duplicate_of TEXT,
+                                       ceo_table_company TEXT,
+                                       ceo_fuzzy_match INTEGER)""")
+
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(documents)')]
+        for column, definition in ADDED_COLUMNS:
+            if column not in columns:
+                self.connection.execute(f'ALTER TABLE documents ADD COLUMN {column} {definition}')
+
+        # MinHash signature of each pdf, so the pdfs of a later run are compared
+        # with the pdfs already processed, NULL if the pdf has no text
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS signatures (
+                                       file_path TEXT PRIMARY KEY,
+                                       size INTEGER,
+                                       mtime_ns INTEGER,
+                                       signature BLOB)""")
+
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
+
+    def get_entry(self,
+                  file_path : str) -> sqlite3.Row:
+        """the recorded entry of a pdf, without the records which are not written yet
+        """
+        cursor = self.connection.execute('SELECT size, mtime_ns, content_hash, version, status, output_path '
+                                         'FROM documents WHERE file_path = ?', (file_path,))
+
+        return cursor.fetchone()
+
+    def is_pending(self,
+                   file_path : str,
+                   retry_statuses : tuple = FAILURE_STATUSES) -> bool:
+        """check if a pdf has to be processed
+
+        Args:
+            file_path (str): file path to the pdf
+            retry_statuses (tuple): statuses which are processed again
+
+        Returns:
+            bool: True if the pdf is new, changed, processed by another
+                version or its status is one of retry_statuses
+        """
+        self.flush()
+
+        entry = self.get_entry(file_path)
+        if entry is None:
+            return True
+
+        size, mtime_ns, content_hash, version, status, _ = entry
+
+        if version != self.version or status in retry_statuses:
+            return True
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return True
+
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+            return False
+
+        # a pdf copied or touched without changes keeps its results
+        if stat.st_size != size or get_file_hash(file_path) != content_hash:
+            return True
+
+        self.connection.execute('UPDATE documents SET mtime_ns = ? WHERE file_path = ?', (stat.st_mtime_ns, file_path))
+        self.connection.commit()
+
+        return False
+
+    def get_pending_file_paths(self,
+                               file_paths : list,
+                               retry_statuses : tuple = FAILURE_STATUSES) -> list:
+        """the pdfs of file_paths which have to be processed, in the same order
+
+        Args:
+            file_paths (list): list of file paths to pdf documents
+            retry_statuses (tuple): statuses which are processed again
+
+        Returns:
+            list: file paths of the pdfs to process
+        """
+        pending_file_paths = {file_path for file_path in file_paths if self.is_pending(file_path, retry_statuses)}
+
+        # a near-duplicate is processed again along with its canonical pdf, or
+        # on its own once the canonical pdf is no longer in the tree
+        tree_file_paths = set(file_paths)
+
+        for file_path, canonical_file_path in self.get_duplicates().items():
+            if canonical_file_path in pending_file_paths or canonical_file_path not in tree_file_paths:
+                pending_file_paths.add(file_path)
+
+        return [file_path for file_path in file_paths if file_path in pending_file_paths]
+
+    def get_duplicates(self) -> dict:
+        """near-duplicates recorded by the previous runs
+
+        Returns:
+            dict: file path of each duplicate -> file path of its canonical pdf
+        """
+        self.flush()
+
+        cursor = self.connection.execute("SELECT file_path, duplicate_of FROM documents WHERE duplicate_of != ''")
+
+        return dict(cursor.fetchall())
+
+    def record_signatures(self,
+                          file_paths : list,
+                          signatures : list) -> None:
+        """store the MinHash signatures of pdfs, along with the size and
+        modification time they were computed for
+
+        Args:
+            file_paths (list): list of file paths to pdf documents
+            signatures (list): signature of each pdf, None for pdfs without text
+        """
+        rows = []
+
+        for file_path, signature in zip(file_paths, signatures):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+
+            rows.append((file_path, stat.st_size, stat.st_mtime_ns,
+                         signature.tobytes() if signature is not None else None))
+
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?)', rows)
+
+    def get_signatures(self,
+                       file_paths : list) -> dict:
+        """signatures of the pdfs of file_paths which are still the pdf they were
+        computed for
+
+        Args:
+            file_paths (list): list of file paths to pdf documents
+
+        Returns:
+            dict: file path -> signature, None for pdfs without text, pdfs
+                without a signature or which changed are left out
+        """
+        signatures = {}
+        cursor = self.connection.execute('SELECT file_path, size, mtime_ns, signature FROM signatures')
+
+        stored_signatures = {file_path : (size, mtime_ns, signature) for file_path, size, mtime_ns, signature in cursor}
+
+        for file_path in file_paths:
+            if file_path not in stored_signatures:
+                continue
+
+            size, mtime_ns, signature = stored_signatures[file_path]
+
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+
+            if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                signatures[file_path] = np.frombuffer(signature, dtype=np.uint64) if signature is not None else None
+
+        return signatures
+
+    def remove_previous_output(self,
+                               file_path : str) -> None:
+        """delete the output file written the last time the pdf was processed, so
+        processing it again does not add a second file for the same transcript
+
+        Args:
+            file_path (str): file path to the pdf
+        """
+        entry = self.get_entry(file_path)
+
+        if entry is not None and entry[5]:
+            try:
+                os.remove(entry[5])
+            except FileNotFoundError:
+                pass
+
+    def get_content_hash(self,
+                         file_path : str,
+                         size : int,
+                         mtime_ns : int) -> str:
+        """content hash of a pdf, the recorded hash is kept while the size and
+        modification time of the pdf do not change
+
+        Args:
+            file_path (str): file path to the pdf
+            size (int): current size of the pdf
+            mtime_ns (int): current modification time of the pdf
+
+        Returns:
+            str: hex digest
+        """
+        entry = self.get_entry(file_path)
+
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns and entry[2]:
+            return entry[2]
+
+        return get_file_hash(file_path)
+
+    def record(self,
+               file_path : str,
+               result : AnalysisResults,
+               status : str,
+               output_path : str = '') -> None:
+        """store the outcome of processing a pdf, written with the next batch
+
+        Args:
+            file_path (str): file path to the pdf
+            result (AnalysisResults): results of the analysis, with the content
+                hash of the pdf if the worker computed it
+            status (str): status used in the results table
+            output_path (str): file the answers were written to
+        """
+        try:
+            stat = os.stat(file_path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size, mtime_ns = -1, -1
+
+        content_hash = result.content_hash
+        if content_hash == '':
+            content_hash = self.get_content_hash(file_path, size, mtime_ns)
+
+        self.pending_rows.append((file_path, size, mtime_ns, content_hash, self.version, status,
+                                  result.company_name, str(result.report_year), result.ceo_name,
+                                  result.num_ceos, result.num_answers, output_path, time.time(),
+                                  result.duplicate_of, result.ceo_table_company, int(result.ceo_fuzzy_match)))
+
+        if len(self.pending_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """write the buffered records in a single transaction
+        """
+        if len(self.pending_rows) == 0:
+            return
+
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO documents (file_path, size, mtime_ns, content_hash, version, '
+                                        'status, company_name, report_year, ceo_name, num_ceos, num_answers, output_path, '
+                                        'processed_at, duplicate_of, ceo_table_company, ceo_fuzzy_match) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                        self.pending_rows)
+
+        self.pending_rows = []
+
+    def get_results(self,
+                    file_paths : list) -> list:
+        """(AnalysisResults, status) of the recorded pdfs of file_paths, with the
+        fields of the results table filled in
+
+        Args:
+            file_paths (list): pdfs to include, pdfs no longer in the tree are left out
+
+        Returns:
+            list: (AnalysisResults, status) in the order of file_paths
+        """
+        self.flush()
+
+        rows = {}
+        cursor = self.connection.execute('SELECT file_path, status, company_name, report_year, ceo_name, '
+                                         'num_ceos, num_answers, duplicate_of, ceo_table_company, ceo_fuzzy_match FROM documents')
+
+        for (file_path, status, company_name, report_year, ceo_name, num_ceos, num_answers,
+             duplicate_of, ceo_table_company, ceo_fuzzy_match) in cursor:
+            result = AnalysisResults(file_path=file_path,
+                                     company_name=company_name,
+                                     report_year=report_year,
+                                     ceo_name=ceo_name,
+                                     num_ceos=num_ceos,
+                                     ceo_table_company=ceo_table_company or '',
+                                     ceo_fuzzy_match=bool(ceo_fuzzy_match),
+                                     duplicate_of=duplicate_of or '')
+            # the answers are in the output file, only their number is kept
+            result.answer_text = ['']*num_answers
+
+            rows[file_path] = (result, status)
+
+        return [rows[file_path] for file_path in file_paths if file_path in rows]
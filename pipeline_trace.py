@@ -0,0 +1,183 @@
+import json
+import os
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# trace of the document being processed by this process, None when tracing is off
+current_trace = None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class DocumentTrace:
+    """
+    Time spent in each stage of the pipeline and counters for a single document.
+    The time of a stage does not include the stages nested in it, e.g. the pages
+    a LazyProcessedDocument extracts during the heading search are counted in
+    get_text and blocks, so the stage times add up to the time traced.
+    """
+    file_path : str = ''
+    # process which extracted and analysed the document
+    pid : int = 0
+    outcome : str = ''
+    # stage -> seconds
+    stages : dict = field(default_factory=lambda: {})
+    # counter -> value, e.g. pages, text_blocks, bytes_read
+    counts : dict = field(default_factory=lambda: {})
+    # [stage, start time, seconds spent in nested stages] of the stages being timed
+    open_stages : list = field(default_factory=lambda: [], repr=False)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stages.values())
+
+    def add_count(self,
+                  name : str,
+                  value : int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def to_record(self) -> dict:
+        """JSON record of the trace
+
+        Returns:
+            dict: one line of the trace file
+        """
+        return {'file_path' : self.file_path,
+                'pid' : self.pid,
+                'outcome' : self.outcome,
+                'total' : self.total_seconds,
+                'stages' : self.stages,
+                'counts' : self.counts}
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def start_trace(file_path : str) -> DocumentTrace:
+    """start tracing a document in this process, the stages timed until
+    stop_trace are added to it
+
+    Args:
+        file_path (str): file path to the pdf
+
+    Returns:
+        DocumentTrace: the new trace
+    """
+    global current_trace
+
+    current_trace = DocumentTrace(file_path=file_path, pid=os.getpid())
+
+    return current_trace
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def stop_trace() -> DocumentTrace:
+    """stop tracing the current document
+
+    Returns:
+        DocumentTrace: the trace of the document, None if tracing is off
+    """
+    global current_trace
+
+    trace = current_trace
+    current_trace = None
+
+    return trace
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@contextmanager
+def trace_stage(stage : str,
+                trace : DocumentTrace = None):
+    """time the body of a with statement as a stage of the current trace,
+    or of trace if given. Does nothing when there is no trace.
+
+    Args:
+        stage (str): name of the stage
+        trace (DocumentTrace): trace to add the time to instead of the current one
+    """
+    if trace is None:
+        trace = current_trace
+
+    if trace is None:
+        yield
+        return
+
+    open_stage = [stage, time.perf_counter(), 0.]
+    trace.open_stages.append(open_stage)
+
+    try:
+        yield
+    finally:
+        trace.open_stages.pop()
+
+        seconds = time.perf_counter() - open_stage[1]
+        trace.stages[stage] = trace.stages.get(stage, 0.) + seconds - open_stage[2]
+
+        # the enclosing stage does not count this time
+        if len(trace.open_stages) > 0:
+            trace.open_stages[-1][2] = trace.open_stages[-1][2] + seconds
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def trace_count(name : str,
+                value : int = 1,
+                trace : DocumentTrace = None) -> None:
+    """add value to a counter of the current trace, or of trace if given
+
+    Args:
+        name (str): name of the counter
+        value (int): amount added
+        trace (DocumentTrace): trace to count in instead of the current one
+    """
+    if trace is None:
+        trace = current_trace
+
+    if trace is not None:
+        trace.add_count(name, value)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TraceWriter:
+    """
+    Writes one JSON record per document to a JSONL file
+    """
+
+    def __init__(self,
+                 trace_path : str):
+
+        self.trace_file = open(trace_path, 'w+', encoding='UTF-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self,
+              trace : DocumentTrace) -> None:
+        self.trace_file.write(json.dumps(trace.to_record())+'\n')
+        self.trace_file.flush()
+
+    def close(self) -> None:
+        self.trace_file.close()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def read_trace_file(trace_path : str) -> list:
+    """read the records of a trace file
+
+    Args:
+        trace_path (str): path to the JSONL file
+
+    Returns:
+        list: one dict per document
+    """
+    records = []
+
+    with open(trace_path, 'r', encoding='UTF-8') as trace_file:
+        for line in trace_file:
+            if line.strip() != '':
+                records.append(json.loads(line))
+
+    return records
@@ -0,0 +1,126 @@
+import concurrent.futures
+
+from collections import deque
+
+DEFAULT_NUM_THREADS = 4
+
+# number of files read ahead of the task handed out
+DEFAULT_READ_AHEAD = 16
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def read_file(file_path : str) -> bytes:
+    """content of a file
+
+    Args:
+        file_path (str): file being read
+
+    Returns:
+        bytes: the content, None if the file can not be read so the worker
+            opens it from its path and reports the error
+    """
+    try:
+        with open(file_path, 'rb') as input_file:
+            return input_file.read()
+    except OSError:
+        return None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_results(futures : list) -> list:
+    """wait for the reads of a task
+
+    Args:
+        futures (list): future of each read, None for the files which are not read
+
+    Returns:
+        list: content of each file, None for the files which are not read
+    """
+    return [future.result() if future is not None else None for future in futures]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class PdfPrefetcher:
+    """
+    Reads the pdfs of the upcoming tasks with a small pool of threads, so the
+    workers get the bytes of a pdf with their task and open it with
+    fitz.open(stream=...) instead of waiting on the storage. Only read_ahead
+    files beyond the task being handed out are read, which bounds the memory
+    held by the prefetched bytes. The files skip_file returns True for, e.g.
+    the extraction cache hits, are not read and the worker gets None for them.
+    """
+
+    def __init__(self,
+                 num_threads : int = DEFAULT_NUM_THREADS,
+                 read_ahead : int = DEFAULT_READ_AHEAD,
+                 skip_file = None):
+
+        self.num_threads = num_threads
+        self.read_ahead = read_ahead
+        self.skip_file = skip_file
+
+    def submit_reads(self,
+                     executor : concurrent.futures.Executor,
+                     task : list) -> list:
+        """start reading the files of a task which are not skipped
+
+        Returns:
+            list: future of the read of each file, None for the skipped files
+        """
+        return [None if self.skip_file is not None and self.skip_file(file_path) else executor.submit(read_file, file_path)
+                for file_path in task]
+
+    def prefetch(self,
+                 tasks):
+        """read the files of the tasks ahead of time
+
+        Args:
+            tasks: iterable of lists of file paths
+
+        Yields:
+            (list, list): the file paths of a task and the bytes of each file
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+
+            # (task, futures of its reads, number of files read) in task order
+            pending = deque()
+            num_pending_files = 0
+
+            for task in tasks:
+                futures = self.submit_reads(executor, task)
+                num_reads = sum(1 for future in futures if future is not None)
+
+                pending.append((task, futures, num_reads))
+                num_pending_files = num_pending_files + num_reads
+
+                while len(pending) > 1 and num_pending_files - pending[0][2] >= self.read_ahead:
+                    task, futures, num_reads = pending.popleft()
+                    num_pending_files = num_pending_files - num_reads
+
+                    yield task, get_results(futures)
+
+            while len(pending) > 0:
+                task, futures, num_reads = pending.popleft()
+
+                yield task, get_results(futures)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_task_data(tasks,
+                  prefetcher : PdfPrefetcher = None):
+    """pair each task with the bytes of its files
+
+    Args:
+        tasks: iterable of lists of file paths
+        prefetcher (PdfPrefetcher): reads the files ahead of time, the workers
+            read the files themselves if not given
+
+    Yields:
+        (list, list): the file paths of a task and their bytes, None without a prefetcher
+    """
+    if prefetcher is not None:
+        yield from prefetcher.prefetch(tasks)
+        return
+
+    for task in tasks:
+        yield task, None
@@ -1,8 +1,79 @@
+from bisect import bisect_left
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from typing import List
 
 from unidecode import unidecode
 
+from document_prescan import DocumentPreScan
+from heading_matcher import HeadingMatcher, as_heading_matcher
+from text_normalization import contains_tokens, normalize_text
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class FontRegistry:
+    """
+    Table of the distinct fonts used in a document. Each (name, size, colour)
+    combination is stored once and identified by an integer id, and the ids
+    matching a (possibly partial) font dict are computed once per query.
+    """
+
+    def __init__(self):
+
+        self.fonts = []
+        self.font_ids = {}
+        self.matching_font_ids = {}
+
+    @property
+    def num_fonts(self) -> int:
+        return len(self.fonts)
+
+    def get_font_id(self,
+                    font_name : str,
+                    font_size : float,
+                    font_colour : int) -> int:
+        """id of a font, the font is added to the registry if it is new
+
+        Returns:
+            int: index of the font in self.fonts
+        """
+        font = (font_name, font_size, font_colour)
+
+        font_id = self.font_ids.get(font)
+        if font_id is None:
+            font_id = len(self.fonts)
+            self.font_ids[font] = font_id
+            self.fonts.append({'name' : font_name, 'size' : font_size, 'colour' : font_colour})
+
+            # a new font can match the previous queries
+            self.matching_font_ids = {}
+
+        return font_id
+
+    def get_font_dict(self,
+                      font_id : int) -> dict:
+        return self.fonts[font_id]
+
+    def get_matching_font_ids(self,
+                              font_dict : dict) -> frozenset:
+        """ids of all the fonts which match the (possibly partial) font_dict
+
+        Args:
+            font_dict (dict): name, colour, size
+
+        Returns:
+            frozenset: ids of the matching fonts
+        """
+        query = tuple(sorted(font_dict.items()))
+
+        font_ids = self.matching_font_ids.get(query)
+        if font_ids is None:
+            font_ids = frozenset(font_id for font_id, font in enumerate(self.fonts)
+                                 if all(font[key] == value for key, value in query))
+            self.matching_font_ids[query] = font_ids
+
+        return font_ids
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 @dataclass
@@ -13,16 +84,52 @@ class DocumentLine:
     text : str = ''
     font_dict :  dict = field(default_factory= lambda: {})
     font_style : List = field(default_factory=lambda: [])
+    font_id : int = -1
+    # (strip pattern, lower) -> normalized text, filled on first use
+    normalized_texts : dict = field(default=None, repr=False, compare=False)
 
     def __init__(self,
-                 init_dict : dict):
+                 init_dict : dict,
+                 font_registry : FontRegistry = None):
 
         self.text = unidecode(init_dict['text'])
+        self.normalized_texts = None
 
-        self.font_dict = {}
-        self.font_dict['name'] = init_dict['font']
-        self.font_dict['size'] = init_dict['size']
-        self.font_dict['colour'] = init_dict['color']
+        if font_registry is not None:
+            # share the interned font dict instead of building one per span
+            self.font_id = font_registry.get_font_id(init_dict['font'], init_dict['size'], init_dict['color'])
+            self.font_dict = font_registry.get_font_dict(self.font_id)
+        else:
+            self.font_id = -1
+            self.font_dict = {}
+            self.font_dict['name'] = init_dict['font']
+            self.font_dict['size'] = init_dict['size']
+            self.font_dict['colour'] = init_dict['color']
+
+    @classmethod
+    def from_font_id(cls,
+                     text : str,
+                     font_id : int,
+                     font_registry : FontRegistry):
+        """line of a document which already stores its text normalized and its
+        fonts interned, e.g. a ColumnarDocument
+
+        Args:
+            text (str): text of the line, already passed through unidecode
+            font_id (int): id of the font in font_registry
+            font_registry (FontRegistry): fonts of the document
+
+        Returns:
+            DocumentLine: the line
+        """
+        line = cls.__new__(cls)
+
+        line.text = text
+        line.normalized_texts = None
+        line.font_id = font_id
+        line.font_dict = font_registry.get_font_dict(font_id)
+
+        return line
 
     def __str__(self):
         return  f'Text: {self.text} \n' \
@@ -55,6 +162,51 @@ class DocumentLine:
                 return False
         
         return True        
+
+    def contains_font_id(self, font_ids : frozenset) -> bool:
+        """check the font of the line against the ids from FontRegistry.get_matching_font_ids
+        """
+        return self.font_id in font_ids
+
+    def get_normalized_text(self,
+                            strip_pattern = None,
+                            lower : bool = False) -> str:
+        """normalize_text of the line, computed once for each strip_pattern
+
+        Args:
+            strip_pattern (re.Pattern): characters to remove, nothing is removed if None
+            lower (bool): lower case the text
+
+        Returns:
+            str: normalized text
+        """
+        if self.normalized_texts is None:
+            self.normalized_texts = {}
+
+        key = (strip_pattern, lower)
+
+        normalized_text = self.normalized_texts.get(key)
+        if normalized_text is None:
+            normalized_text = normalize_text(self.text, strip_pattern, lower)
+            self.normalized_texts[key] = normalized_text
+
+        return normalized_text
+
+    def contains_tokens(self,
+                        tokens : list,
+                        strip_pattern = None,
+                        token_strip_pattern = None) -> bool:
+        """check if any of the tokens is a whole word of the normalized text
+
+        Args:
+            tokens (list): list of strings which are being searched for
+            strip_pattern (re.Pattern): characters removed from the text
+            token_strip_pattern (re.Pattern): characters removed from the tokens
+
+        Returns:
+            bool: True if a token is found
+        """
+        return contains_tokens(self.get_normalized_text(strip_pattern), tokens, token_strip_pattern)
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 @dataclass
@@ -68,10 +220,13 @@ class DocumentTextBlock:
     x_2 : float = 0.
     y_2 : float = 0.
     page_number : int = -1
+    # text of the lines joined by get_text, filled on first use
+    text : str = field(default=None, repr=False, compare=False)
 
     def __init__(self,
                  init_dict : dict,
-                 page_number : int):
+                 page_number : int,
+                 font_registry : FontRegistry = None):
 
         self.x_1 = init_dict['bbox'][0]
         self.y_1 = init_dict['bbox'][1]
@@ -83,7 +238,33 @@ class DocumentTextBlock:
         self.lines = []
         for line in init_dict['lines']:
             for span in line['spans']:
-                self.lines.append(DocumentLine(span))
+                self.lines.append(DocumentLine(span, font_registry))
+
+        self.text = None
+
+    @classmethod
+    def from_lines(cls,
+                   lines : list,
+                   bbox,
+                   page_number : int):
+        """text block made of already built DocumentLines
+
+        Args:
+            lines (list): DocumentLines of the block
+            bbox: x_1, y_1, x_2, y_2 of the block
+            page_number (int): page the text block is on
+
+        Returns:
+            DocumentTextBlock: the text block
+        """
+        text_block = cls.__new__(cls)
+
+        text_block.x_1, text_block.y_1, text_block.x_2, text_block.y_2 = bbox
+        text_block.page_number = page_number
+        text_block.lines = lines
+        text_block.text = None
+
+        return text_block
 
     def __str__(self):
         ret_str =  f'Page #{self.page_number} \n ({self.x_1}, {self.y_1}), ({self.x_2}, {self.y_2})\n' 
@@ -102,11 +283,10 @@ class DocumentTextBlock:
         Returns:
             str: all text contained in lines
         """
-        text = ''
-        for line in self.lines:
-            text = text + line.text + '\n'
+        if self.text is None:
+            self.text = '\n'.join(line.text for line in self.lines).strip()
 
-        return text.strip()
+        return self.text
     
     def contains_text(self, token : str) -> bool:
         """check if token in contained in text_block
@@ -131,6 +311,27 @@ class DocumentTextBlock:
 
         return False
 
+    def contains_tokens(self,
+                        tokens : list,
+                        strip_pattern = None,
+                        token_strip_pattern = None) -> bool:
+        """check if any line contains one of the tokens as a whole word, see
+        DocumentLine.contains_tokens
+        """
+        for line in self.lines:
+            if line.contains_tokens(tokens, strip_pattern, token_strip_pattern):
+                return True
+
+        return False
+
+    def contains_font_ids(self, font_ids : frozenset) -> bool:
+
+        for line in self.lines:
+            if line.font_id in font_ids:
+                return True
+
+        return False
+
     def contains_section(   self,  
                             title : str,
                             font : dict) -> bool:
@@ -147,6 +348,42 @@ class DocumentTextBlock:
                 return True
 
         return False
+
+    def contains_section_ids(self,
+                             title : str,
+                             font_ids : frozenset) -> bool:
+        """contains_section using the font ids from FontRegistry.get_matching_font_ids
+
+        Args:
+            title (str): text searched for
+            font_ids (frozenset): ids of the fonts the title can be in
+
+        Returns:
+            bool: True if a line in one of the fonts contains the title
+        """
+        for line in self.lines:
+            if line.font_id in font_ids and title in line.text:
+                return True
+
+        return False
+
+    def contains_heading(self,
+                         heading_matcher : HeadingMatcher,
+                         font_ids : frozenset) -> bool:
+        """check if a line in one of the fonts matches any of the titles of heading_matcher
+
+        Args:
+            heading_matcher (HeadingMatcher): compiled section titles
+            font_ids (frozenset): ids of the fonts the title can be in
+
+        Returns:
+            bool: True if a line in one of the fonts contains a title
+        """
+        for line in self.lines:
+            if line.font_id in font_ids and heading_matcher.search(line.text):
+                return True
+
+        return False
     
     def get_line_font(self,
                       idx : int = 0) -> dict:
@@ -159,6 +396,79 @@ class DocumentTextBlock:
         return font_dict
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
+class TextBlockView(Sequence):
+    """
+    Read only list of DocumentTextBlocks for documents which do not keep their
+    blocks in a list. Blocks are built on access by document.get_text_block
+    """
+
+    def __init__(self,
+                 document):
+
+        self.document = document
+
+    def __len__(self) -> int:
+        return self.document.num_text_blocks
+
+    def __getitem__(self, idx):
+
+        if isinstance(idx, slice):
+            return [self.document.get_text_block(i) for i in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx = idx + len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError('text block index out of range')
+
+        return self.document.get_text_block(idx)
+
+    def __iter__(self):
+
+        # the blocks are built in order until the end of the document, without
+        # asking for the number of blocks, which a lazy document does not know
+        idx = 0
+        while True:
+            try:
+                text_block = self.document.get_text_block(idx)
+            except IndexError:
+                return
+
+            yield text_block
+            idx = idx + 1
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class FontStatistics:
+    """
+    Fonts of the section titles of a document, collected in a single scan
+    which stops once every title has been found
+    """
+    # title -> index of the first block with a line containing the title
+    title_block_indices : dict = field(default_factory=lambda: {})
+    # title -> font of the first line of that block
+    title_fonts : dict = field(default_factory=lambda: {})
+
+    @property
+    def heading_fonts(self) -> list:
+        """distinct fonts of the title blocks, the candidate heading fonts
+        """
+        heading_fonts = []
+
+        for font_dict in self.title_fonts.values():
+            if font_dict not in heading_fonts:
+                heading_fonts.append(font_dict)
+
+        return heading_fonts
+
+    def get_title_font(self,
+                       title : str) -> dict:
+        """font of the block containing the title, None if it was not found
+        """
+        return self.title_fonts.get(title)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
 @dataclass
 class ProcessedDocument:
     """
@@ -168,6 +478,27 @@ class ProcessedDocument:
 
     file_path : str = ''
 
+    # name of the data provider identified from the first page, '' if not identified yet
+    provider_name : str = ''
+
+    # False if fitz could not open the pdf
+    readable : bool = True
+
+    font_registry : FontRegistry = field(default_factory=FontRegistry, repr=False, compare=False)
+
+    # font id -> sorted indices of the blocks using the font, built on first use
+    font_block_index : dict = field(default=None, repr=False, compare=False)
+    # matching font ids -> sorted indices of the blocks using any of the fonts
+    heading_index : dict = field(default=None, repr=False, compare=False)
+    # page number of each block, in block order, built on first use
+    block_page_numbers : list = field(default=None, repr=False, compare=False)
+
+    # pages found by the plain text pre-scan, None if the document was not scanned
+    prescan_result : DocumentPreScan = field(default=None, repr=False, compare=False)
+
+    # titles -> FontStatistics, built on first use
+    font_statistics : dict = field(default=None, repr=False, compare=False)
+
     @property
     def num_text_blocks(self) -> int:
         """returns the number of elements in the document_text_blocks list
@@ -177,6 +508,36 @@ class ProcessedDocument:
         """
         return len(self.document_text_blocks)
 
+    @property
+    def num_extracted_text_blocks(self) -> int:
+        """number of text blocks extracted from the pdf, fewer than num_text_blocks
+        for a document which only extracts the pages it accesses
+
+        Returns:
+            int: # of text blocks extracted
+        """
+        return self.num_text_blocks
+
+    def has_text_blocks(self) -> bool:
+        """check if the document contains any text block
+
+        Returns:
+            bool: True if there is at least one text block
+        """
+        return self.num_text_blocks > 0
+
+    @property
+    def num_pages(self) -> int:
+        """number of pages, up to the last page with a text block
+
+        Returns:
+            int: # of pages
+        """
+        if self.num_text_blocks == 0:
+            return 0
+
+        return self.document_text_blocks[-1].page_number + 1
+
     def add_text_block(self,
                        text_block : DocumentTextBlock,
                        page_number : int) -> None:
@@ -186,7 +547,9 @@ class ProcessedDocument:
             text_block (DocumentTextBlock): text block to be added
         """
 
-        self.document_text_blocks.append(DocumentTextBlock(text_block, page_number))
+        self.document_text_blocks.append(DocumentTextBlock(text_block, page_number, self.font_registry))
+
+        self.invalidate_heading_index()
 
     def add_text_blocks(self,
                         text_blocks : list,
@@ -227,16 +590,129 @@ class ProcessedDocument:
         
         return self.document_text_blocks[idx]
 
+    def get_page_text_blocks(self,
+                             page_number : int) -> list:
+        """text blocks on a single page
+
+        Args:
+            page_number (int): page the text blocks are on
+
+        Returns:
+            list: text blocks of the page
+        """
+        # blocks are added in page order
+        start_idx = self.get_page_start_idx(page_number)
+        end_idx = self.get_page_start_idx(page_number+1)
+
+        return self.document_text_blocks[start_idx:end_idx]
+
+    def get_page_start_idx(self,
+                           page_number : int) -> int:
+        """index of the first text block on or after a page
+
+        Args:
+            page_number (int): page number, -1 for the start of the document
+
+        Returns:
+            int: block index, -1 if page_number is -1
+        """
+        if page_number == -1:
+            return -1
+
+        if self.block_page_numbers is None:
+            self.block_page_numbers = [text_block.page_number for text_block in self.document_text_blocks]
+
+        return bisect_left(self.block_page_numbers, page_number)
+
+    def get_prescan_start_idx(self,
+                              prescan_page : str) -> int:
+        """index a heading search starts from, the first block of the page on
+        which the pre-scan found the title first, so the pages before it are
+        not searched
+
+        Args:
+            prescan_page (str): page field of DocumentPreScan, e.g. 'qa_page'
+
+        Returns:
+            int: block index, -1 to search from the first block
+        """
+        if self.prescan_result is None:
+            return -1
+
+        return self.get_page_start_idx(getattr(self.prescan_result, prescan_page))
+
+    def get_matching_font_ids(self,
+                              font_dict : dict) -> frozenset:
+        """ids of the fonts used in the document which match font_dict
+
+        Args:
+            font_dict (dict): name, colour, size, any of the keys can be left out
+
+        Returns:
+            frozenset: font ids
+        """
+        return self.font_registry.get_matching_font_ids(font_dict)
+
+    def invalidate_heading_index(self) -> None:
+        """drop the heading index, it is rebuilt on the next search
+        """
+        self.font_block_index = None
+        self.heading_index = None
+        self.block_page_numbers = None
+        self.font_statistics = None
+
+    def build_font_block_index(self) -> dict:
+        """map each font id to the sorted indices of the blocks which use it
+
+        Returns:
+            dict: font id -> list of block indices
+        """
+        font_block_index = {}
+
+        for idx, text_block in enumerate(self.document_text_blocks):
+            for font_id in {line.font_id for line in text_block.lines}:
+                font_block_index.setdefault(font_id, []).append(idx)
+
+        return font_block_index
+
+    def get_font_block_indices(self,
+                               font_dict : dict) -> list:
+        """sorted indices of the blocks containing a line in a font matching font_dict
+
+        Args:
+            font_dict (dict): name, colour, size, any of the keys can be left out
+
+        Returns:
+            list: block indices
+        """
+        if self.font_block_index is None:
+            self.font_block_index = self.build_font_block_index()
+            self.heading_index = {}
+
+        font_ids = self.get_matching_font_ids(font_dict)
+
+        block_indices = self.heading_index.get(font_ids)
+        if block_indices is None:
+            if len(font_ids) == 1:
+                block_indices = self.font_block_index.get(next(iter(font_ids)), [])
+            else:
+                block_indices = sorted({idx for font_id in font_ids
+                                        for idx in self.font_block_index.get(font_id, [])})
+            self.heading_index[font_ids] = block_indices
+
+        return block_indices
+
     def get_heading_idx(self,
-                        titles : list,
+                        titles,
                         font_dict: dict,
                         start_idx = -1,
                         end_idx = -1) -> int:
         """find the section heading
 
         Args:
-            title (str): title of section
-            font (str): font type used in headings
+            titles (HeadingMatcher | list): titles of the section, a list is 
+                compiled into a HeadingMatcher
+            font_dict (dict): font type used in headings
 
         Returns:
             int: index of text_block containing the heading
@@ -247,29 +723,81 @@ class ProcessedDocument:
         if end_idx == -1:
             end_idx = self.num_text_blocks
 
-        for idx, text_block in enumerate(self.document_text_blocks[start_idx:end_idx]):
-            for title in titles:
-                if text_block.contains_section(title, font_dict):
-                    return idx+start_idx
+        heading_matcher = as_heading_matcher(titles)
+        font_ids = self.get_matching_font_ids(font_dict)
+
+        # only the blocks using the heading font can contain the heading
+        block_indices = self.get_font_block_indices(font_dict)
+
+        for idx in block_indices[bisect_left(block_indices, start_idx):]:
+            if idx >= end_idx:
+                break
+
+            if self.get_text_block(idx).contains_heading(heading_matcher, font_ids):
+                return idx
 
         return -1
 
+    def get_font_statistics(self,
+                            titles : tuple) -> FontStatistics:
+        """fonts of the blocks containing the titles, found in one scan of the
+        document and kept for later calls
+
+        Args:
+            titles (tuple): titles of the sections
+
+        Returns:
+            FontStatistics: blocks and fonts of the titles
+        """
+        titles = tuple(titles)
+
+        if self.font_statistics is None:
+            self.font_statistics = {}
+
+        font_statistics = self.font_statistics.get(titles)
+        if font_statistics is None:
+            font_statistics = self.build_font_statistics(titles)
+            self.font_statistics[titles] = font_statistics
+
+        return font_statistics
+
+    def build_font_statistics(self,
+                              titles : tuple) -> FontStatistics:
+
+        font_statistics = FontStatistics()
+        remaining_titles = list(titles)
+
+        for idx, text_block in enumerate(self.document_text_blocks):
+            if len(remaining_titles) == 0:
+                break
+
+            for line in text_block.lines:
+                for title in [title for title in remaining_titles if title in line.text]:
+                    font_statistics.title_block_indices[title] = idx
+                    font_statistics.title_fonts[title] = text_block.get_line_font()
+                    remaining_titles.remove(title)
+
+        return font_statistics
+
     def get_next_heading_idx(self,
                              start_idx : int,
                              font: dict) -> int:
-        """_summary_
+        """index of the first block from start_idx which contains a line in font,
+        found with a binary search of the heading index
 
         Args:
-            start_idx (int): _description_
+            start_idx (int): index of the first block searched
             font (dict): name, colour, size
 
         Returns:
-            int: _description_
+            int: index of the block, -1 if not found
         """
         
-        for idx, text_block in enumerate(self.document_text_blocks[start_idx:]):
-            if text_block.contains_font(font):
-                return idx + start_idx
+        block_indices = self.get_font_block_indices(font)
+
+        position = bisect_left(block_indices, start_idx)
+        if position < len(block_indices):
+            return block_indices[position]
         
         return -1
     
@@ -0,0 +1,220 @@
+import re
+from dataclasses import dataclass
+
+import fitz
+from unidecode import unidecode
+
+from document_prescan import PARTICIPANTS_HEADING_MATCHER
+from heading_matcher import HeadingMatcher
+from processed_document import ProcessedDocument
+
+# font of every section heading and speaker name in a Bloomberg transcript
+BLOOMBERG_HEADING_FONT = {'name':'AvenirNextPForBBG-Medium'}
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class Provider:
+    """
+    Data provider of a transcript format, the markers identifying it on the
+    first page and what its analysis needs from the extraction
+    """
+    name : str = ''
+    # prefixes of the font names used by the format
+    font_prefixes : tuple = ()
+    # text found on the first page, e.g. in the header or the footer
+    text_markers : tuple = ()
+    # directory name used before the format was identified from the content
+    path_marker : str = ''
+
+    # company header and the number of first pages the analysis reads it from,
+    # the pre-scan only looks for the header on these pages
+    header_pattern : re.Pattern = None
+    header_pages : int = 1
+
+    # font of the section headings, None if it is detected in each document
+    heading_font : dict = None
+    # titles of the participants section, looked for by the pre-scan
+    participants_matcher : HeadingMatcher = PARTICIPANTS_HEADING_MATCHER
+
+    def get_marker_score(self,
+                         font_names : set,
+                         page_text : str) -> int:
+        """number of the markers of the format found on a page
+
+        Args:
+            font_names (set): names of the fonts of the page, without subset prefix
+            page_text (str): plain text of the page
+
+        Returns:
+            int: number of font prefixes and text markers found
+        """
+        score = sum(1 for prefix in self.font_prefixes
+                    if any(font_name.startswith(prefix) for font_name in font_names))
+
+        return score + sum(1 for marker in self.text_markers if marker in page_text)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+BLOOMBERG = Provider(name='Bloomberg',
+                     font_prefixes=('AvenirNextPForBBG',),
+                     text_markers=('Bloomberg Transcript',),
+                     path_marker='Bloomberg',
+                     header_pattern=re.compile('Company Name: '),
+                     header_pages=3,
+                     heading_font=BLOOMBERG_HEADING_FONT,
+                     participants_matcher=HeadingMatcher(['Company Participants']))
+
+REFINITIV = Provider(name='Refinitiv',
+                     text_markers=('REFINITIV STREETEVENTS', 'THOMSON REUTERS STREETEVENTS'),
+                     path_marker='Refinitiv',
+                     header_pattern=re.compile(r'Q[0-9] 2[0-9]*'),
+                     header_pages=1,
+                     participants_matcher=HeadingMatcher(['CORPORATE PARTICIPANTS']))
+
+# in the order the path markers are checked, a tie between the markers of the
+# content goes to the first provider
+PROVIDERS = [REFINITIV, BLOOMBERG]
+
+# provider of a document identified by neither its content nor its path, every
+# pdf outside the Refinitiv directory was read as Bloomberg before the content
+# was sniffed. Passing None instead reports these documents as Unknown Format
+DEFAULT_PROVIDER = BLOOMBERG
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_provider(name : str) -> Provider:
+    """registered provider with the given name
+
+    Args:
+        name (str): name of the provider
+
+    Returns:
+        Provider: the provider, None if no provider has this name
+    """
+    for provider in PROVIDERS:
+        if provider.name == name:
+            return provider
+
+    return None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_provider_from_path(file_path : str) -> Provider:
+    """provider named by a directory of the file path
+
+    Args:
+        file_path (str): file path to the pdf
+
+    Returns:
+        Provider: the first provider whose path marker is in the path, None otherwise
+    """
+    for provider in PROVIDERS:
+        if provider.path_marker and provider.path_marker in file_path:
+            return provider
+
+    return None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def identify_provider(font_names : set,
+                      page_text : str,
+                      file_path : str = '',
+                      default_provider : Provider = DEFAULT_PROVIDER) -> Provider:
+    """provider with the most markers on the first page of a document
+
+    Args:
+        font_names (set): names of the fonts of the first page
+        page_text (str): plain text of the first page
+        file_path (str): file path to the pdf, used when no marker is found
+        default_provider (Provider): provider when neither the markers nor the
+            path identify one
+
+    Returns:
+        Provider: the provider of the document, None if the format is unknown
+            and there is no default provider
+    """
+    best_provider = None
+    best_score = 0
+
+    for provider in PROVIDERS:
+        score = provider.get_marker_score(font_names, page_text)
+
+        if score > best_score:
+            best_provider = provider
+            best_score = score
+
+    if best_provider is None:
+        best_provider = get_provider_from_path(file_path)
+
+    if best_provider is None:
+        return default_provider
+
+    return best_provider
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_base_font_name(font_name : str) -> str:
+    """font name without the 'ABCDEF+' prefix of an embedded subset
+    """
+    return font_name.split('+', 1)[-1]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def sniff_fitz_doc(fitz_doc : fitz.fitz.Document,
+                   file_path : str = '',
+                   page_text : str = None,
+                   default_provider : Provider = DEFAULT_PROVIDER) -> Provider:
+    """identify the provider of a pdf from its first page, before any text
+    block is extracted. The fonts are read from the page resources, which
+    does not parse the page content.
+
+    Args:
+        fitz_doc (fitz.fitz.Document): the open pdf
+        file_path (str): file path to the pdf, used when no marker is found
+        page_text (str): plain text of the first page if it was already read,
+            the page is read in the "text" mode otherwise
+        default_provider (Provider): provider when neither the markers nor the
+            path identify one
+
+    Returns:
+        Provider: the provider of the document, None if the format is unknown
+            and there is no default provider
+    """
+    if fitz_doc.page_count == 0:
+        return identify_provider(set(), '', file_path, default_provider)
+
+    page = fitz_doc[0]
+
+    font_names = {get_base_font_name(font[3]) for font in page.get_fonts()}
+
+    if page_text is None:
+        page_text = page.get_text('text')
+
+    return identify_provider(font_names, unidecode(page_text), file_path, default_provider)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def sniff_processed_doc(processed_doc : ProcessedDocument,
+                        default_provider : Provider = DEFAULT_PROVIDER) -> Provider:
+    """identify the provider of an extracted document from the text blocks of
+    its first page
+
+    Args:
+        processed_doc (ProcessedDocument): the extracted document
+        default_provider (Provider): provider when neither the markers nor the
+            path identify one
+
+    Returns:
+        Provider: the provider of the document, None if the format is unknown
+            and there is no default provider
+    """
+    font_names = set()
+    line_texts = []
+
+    for text_block in processed_doc.get_page_text_blocks(0):
+        for line in text_block.lines:
+            font_names.add(get_base_font_name(line.font_name))
+            line_texts.append(line.text)
+
+    return identify_provider(font_names, '\n'.join(line_texts), processed_doc.file_path, default_provider)
@@ -0,0 +1,149 @@
+import json
+import sqlite3
+import time
+
+from extraction_utilities import AnalysisResults
+
+# results buffered before they are inserted in one transaction
+INSERT_BATCH_SIZE = 500
+
+# columns added to the results table after the first stores were written
+ADDED_COLUMNS = (('duplicate_of', "TEXT DEFAULT ''"),
+                 ('ceo_table_company', "TEXT DEFAULT ''"),
+                 ('ceo_fuzzy_match', 'INTEGER DEFAULT 0'))
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class ResultStore:
+    """
+    Single SQLite file holding every AnalysisResults with its answers and status,
+    in place of one text file per result. Results are buffered and inserted in
+    batches, one transaction per batch, so a run does a few large writes instead
+    of creating and naming a file per document. A pdf processed again replaces
+    its previous row. A near-duplicate has its own row, without answers, which
+    names its canonical pdf.
+
+    The default rollback journal is kept rather than WAL, which needs shared
+    memory and does not work on network filesystems.
+    """
+
+    def __init__(self,
+                 store_path : str,
+                 batch_size : int = INSERT_BATCH_SIZE):
+
+        self.store_path = store_path
+        self.batch_size = batch_size
+
+        # rows waiting to be inserted
+        self.pending_rows = []
+
+        self.connection = sqlite3.connect(store_path)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS results (
+                                       file_path TEXT PRIMARY KEY,
+                                       status TEXT,
+                                       company_name TEXT,
+                                       report_year TEXT,
+                                       ceo_name TEXT,
+                                       num_ceos INTEGER,
+                                       num_answers INTEGER,
+                                       qa_section_page INTEGER,
+                                       qa_section_found INTEGER,
+                                       answers TEXT,
+                                       stored_at REAL,
+                                       duplicate_of TEXT,
+                                       ceo_table_company TEXT,
+                                       ceo_fuzzy_match INTEGER)""")
+
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(results)')]
+        for column, definition in ADDED_COLUMNS:
+            if column not in columns:
+                self.connection.execute(f'ALTER TABLE results ADD COLUMN {column} {definition}')
+
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
+
+    def add(self,
+            result : AnalysisResults,
+            status : str) -> None:
+        """store a result, inserted with the next batch
+
+        Args:
+            result (AnalysisResults): results of the analysis
+            status (str): status used in the results table
+        """
+        self.pending_rows.append((result.file_path,
+                                  status,
+                                  result.company_name,
+                                  str(result.report_year),
+                                  result.ceo_name,
+                                  result.num_ceos,
+                                  result.num_answers,
+                                  result.qa_section_page,
+                                  int(result.qa_section_found),
+                                  json.dumps(result.answer_text),
+                                  time.time(),
+                                  result.duplicate_of,
+                                  result.ceo_table_company,
+                                  int(result.ceo_fuzzy_match)))
+
+        if len(self.pending_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """insert the buffered results in a single transaction
+        """
+        if len(self.pending_rows) == 0:
+            return
+
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO results (file_path, status, company_name, report_year, '
+                                        'ceo_name, num_ceos, num_answers, qa_section_page, qa_section_found, answers, '
+                                        'stored_at, duplicate_of, ceo_table_company, ceo_fuzzy_match) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                        self.pending_rows)
+
+        self.pending_rows = []
+
+    @property
+    def num_results(self) -> int:
+        self.flush()
+
+        return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get_results(self):
+        """iterate over the stored results in the order they were stored
+
+        Yields:
+            (AnalysisResults, str): the results and their status
+        """
+        self.flush()
+
+        cursor = self.connection.execute('SELECT file_path, status, company_name, report_year, ceo_name, num_ceos, '
+                                         'qa_section_page, qa_section_found, answers, duplicate_of, ceo_table_company, ceo_fuzzy_match '
+                                         'FROM results ORDER BY rowid')
+
+        for (file_path, status, company_name, report_year, ceo_name, num_ceos, qa_section_page, qa_section_found, answers,
+             duplicate_of, ceo_table_company, ceo_fuzzy_match) in cursor:
+
+            result = AnalysisResults(file_path=file_path,
+                                     company_name=company_name,
+                                     report_year=report_year,
+                                     ceo_name=ceo_name,
+                                     num_ceos=num_ceos,
+                                     ceo_table_company=ceo_table_company or '',
+                                     ceo_fuzzy_match=bool(ceo_fuzzy_match),
+                                     qa_section_page=qa_section_page,
+                                     qa_section_found=bool(qa_section_found),
+                                     answer_text=json.loads(answers),
+                                     duplicate_of=duplicate_of or '')
+
+            yield result, status
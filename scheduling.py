@@ -0,0 +1,221 @@
+import os
+import time
+
+from dataclasses import dataclass, field
+
+import fitz
+
+# the tasks are cut so that each worker gets about this many, which leaves
+# enough small tasks at the end of the run to even out the workers
+TASKS_PER_WORKER = 4
+
+# upper bound on the number of files sent to a worker in one task
+MAX_FILES_PER_TASK = 64
+
+# memory set aside for each worker when sizing the pool
+MEMORY_PER_WORKER = 512*1024**2
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_num_cpus() -> int:
+    """number of CPUs this process is allowed to run on
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_available_memory() -> int:
+    """memory available to new processes without swapping
+
+    Returns:
+        int: available memory in bytes, None if it can not be found
+    """
+    try:
+        with open('/proc/meminfo', 'r') as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1])*1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES')*os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_pool_size(max_workers : int = None,
+                  memory_per_worker : int = MEMORY_PER_WORKER) -> int:
+    """number of workers the CPUs and the available memory can keep busy
+
+    Args:
+        max_workers (int): upper bound on the number of workers
+        memory_per_worker (int): memory needed by each worker in bytes
+
+    Returns:
+        int: number of workers, at least 1
+    """
+    num_workers = get_num_cpus()
+
+    available_memory = get_available_memory()
+    if available_memory is not None:
+        num_workers = min(num_workers, available_memory//memory_per_worker)
+
+    if max_workers is not None:
+        num_workers = min(num_workers, max_workers)
+
+    return max(1, num_workers)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def estimate_file_cost(file_path : str,
+                       use_page_count : bool = False) -> int:
+    """estimate of the time needed to process a pdf, its size in bytes or its
+    number of pages
+
+    Args:
+        file_path (str): file path to the pdf
+        use_page_count (bool): open the pdf and count its pages instead of using its size
+
+    Returns:
+        int: cost of the file, 0 if it can not be read
+    """
+    try:
+        if use_page_count:
+            with fitz.open(file_path) as fitz_doc:
+                return fitz_doc.page_count
+
+        return os.path.getsize(file_path)
+    except (OSError, RuntimeError):
+        return 0
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class TaskScheduler:
+    """
+    Sizes the worker pool from the CPUs and the memory available and groups
+    the files into tasks. The files are sorted largest first, so a long
+    transcript is never the last document left running. A file costing more
+    than a chunk is a task on its own, and the smaller files are batched into
+    tasks of about the same cost to cut the IPC and future overhead.
+    """
+
+    def __init__(self,
+                 max_workers : int = None,
+                 use_page_count : bool = False,
+                 tasks_per_worker : int = TASKS_PER_WORKER,
+                 max_files_per_task : int = MAX_FILES_PER_TASK):
+
+        self.num_workers = get_pool_size(max_workers)
+        self.use_page_count = use_page_count
+        self.tasks_per_worker = tasks_per_worker
+        self.max_files_per_task = max_files_per_task
+
+    def schedule(self,
+                 file_paths : list) -> list:
+        """group the files into tasks
+
+        Args:
+            file_paths (list): list of file paths to pdf documents
+
+        Returns:
+            list: lists of file paths, in decreasing order of cost
+        """
+        costs = {file_path : estimate_file_cost(file_path, self.use_page_count) for file_path in file_paths}
+
+        sorted_file_paths = sorted(file_paths, key=costs.__getitem__, reverse=True)
+
+        chunk_cost = sum(costs.values())/(self.num_workers*self.tasks_per_worker)
+
+        tasks = []
+        chunk = []
+        current_cost = 0
+
+        for file_path in sorted_file_paths:
+            if costs[file_path] >= chunk_cost:
+                tasks.append([file_path])
+                continue
+
+            chunk.append(file_path)
+            current_cost = current_cost + costs[file_path]
+
+            if current_cost >= chunk_cost or len(chunk) == self.max_files_per_task:
+                tasks.append(chunk)
+                chunk = []
+                current_cost = 0
+
+        if len(chunk) > 0:
+            tasks.append(chunk)
+
+        return tasks
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_tasks(file_paths : list,
+              scheduler : TaskScheduler = None) -> list:
+    """tasks of the scheduler, one file per task in the given order without one
+
+    Args:
+        file_paths (list): list of file paths to pdf documents
+        scheduler (TaskScheduler): groups the files into tasks
+
+    Returns:
+        list: lists of file paths
+    """
+    if scheduler is None:
+        return [[file_path] for file_path in file_paths]
+
+    return scheduler.schedule(file_paths)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class PoolUtilization:
+    """
+    Time the workers spent running tasks compared to the time the pool was open
+    """
+    num_workers : int = 1
+    num_tasks : int = 0
+    # worker pid -> seconds spent running tasks
+    busy_seconds : dict = field(default_factory=lambda: {})
+    start_time_point : float = field(default_factory=time.perf_counter)
+    end_time_point : float = None
+
+    @property
+    def wall_seconds(self) -> float:
+        end_time_point = self.end_time_point
+        if end_time_point is None:
+            end_time_point = time.perf_counter()
+
+        return end_time_point - self.start_time_point
+
+    @property
+    def utilization(self) -> float:
+        """fraction of the worker time spent running tasks
+        """
+        if self.wall_seconds <= 0:
+            return 0.
+
+        return sum(self.busy_seconds.values())/(self.num_workers*self.wall_seconds)
+
+    def add_task(self,
+                 pid : int,
+                 seconds : float) -> None:
+        self.num_tasks = self.num_tasks + 1
+        self.busy_seconds[pid] = self.busy_seconds.get(pid, 0.) + seconds
+
+    def stop(self) -> None:
+        self.end_time_point = time.perf_counter()
+
+    def display(self) -> None:
+
+        busy_seconds = list(self.busy_seconds.values()) or [0.]
+
+        print(f'Workers : {self.num_workers}, tasks : {self.num_tasks}, '
+              f'utilization : {100*self.utilization:.1f}%, '
+              f'busy per worker : {min(busy_seconds):.1f}-{max(busy_seconds):.1f}s '
+              f'of {self.wall_seconds:.1f}s')
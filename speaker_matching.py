@@ -0,0 +1,61 @@
+from difflib import SequenceMatcher
+
+SPEAKER_MATCH_THRESHOLD = 0.9
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class SpeakerMatcher:
+    """
+    Finds the text blocks naming a speaker, a block matches if
+    SequenceMatcher(None, text, speaker_name).ratio() > threshold.
+
+    The speaker name is the second sequence of a single SequenceMatcher, so its
+    index is built once and not for every block. The cheap upper bounds of the
+    ratio, real_quick_ratio (lengths only) and quick_ratio (character counts),
+    reject most blocks before the full ratio is computed.
+    """
+
+    def __init__(self,
+                 speaker_name : str,
+                 threshold : float = SPEAKER_MATCH_THRESHOLD):
+
+        self.speaker_name = speaker_name
+        self.threshold = threshold
+
+        self.sequence_matcher = SequenceMatcher(None)
+        self.sequence_matcher.set_seq2(speaker_name)
+
+    def ratio(self,
+              text : str) -> float:
+        """similarity of text and the speaker name
+
+        Args:
+            text (str): text compared to the speaker name
+
+        Returns:
+            float: SequenceMatcher ratio
+        """
+        self.sequence_matcher.set_seq1(text)
+
+        return self.sequence_matcher.ratio()
+
+    def matches(self,
+                text : str) -> bool:
+        """check if text names the speaker
+
+        Args:
+            text (str): text compared to the speaker name
+
+        Returns:
+            bool: True if the ratio is above the threshold
+        """
+        sequence_matcher = self.sequence_matcher
+        sequence_matcher.set_seq1(text)
+
+        if sequence_matcher.real_quick_ratio() <= self.threshold:
+            return False
+
+        if sequence_matcher.quick_ratio() <= self.threshold:
+            return False
+
+        return sequence_matcher.ratio() > self.threshold
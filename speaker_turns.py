@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+
+from processed_document import ProcessedDocument
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@dataclass
+class SpeakerTurn:
+    """
+    A turn of a speaker in a transcript, starting at the block naming the
+    speaker and running up to the block naming the next speaker
+    """
+    # lines of the speaker block in the speaker font
+    speaker_lines : tuple = ()
+    # all the text of the speaker block
+    text : str = ''
+    start_idx : int = -1
+    # index of the next speaker block, -1 for the last turn of the document
+    end_idx : int = -1
+    page_number : int = -1
+
+    @property
+    def speaker(self) -> str:
+        return '\n'.join(self.speaker_lines)
+
+    def names_speaker(self,
+                      speaker_name : str) -> bool:
+        """check if a line of the speaker block in the speaker font contains speaker_name
+        """
+        for line in self.speaker_lines:
+            if speaker_name in line:
+                return True
+
+        return False
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def segment_speaker_turns(processed_doc : ProcessedDocument,
+                          speaker_font : dict,
+                          start_idx : int = 0,
+                          end_idx : int = -1) -> list:
+    """split a section into speaker turns, every block with a line in the
+    speaker font starts a new turn. The speaker blocks are found with
+    get_next_heading_idx so the blocks in between are never scanned.
+
+    Args:
+        processed_doc (ProcessedDocument): document being looked at
+        speaker_font (dict): font of the speaker names, any of the keys can be left out
+        start_idx (int): index of the first block of the section
+        end_idx (int): index after the last block of the section, -1 for the end of the document
+
+    Returns:
+        list: SpeakerTurns in document order
+    """
+    if end_idx == -1:
+        end_idx = processed_doc.num_text_blocks
+
+    speaker_turns = []
+
+    idx = processed_doc.get_next_heading_idx(start_idx, speaker_font)
+
+    while idx != -1 and idx < end_idx:
+        next_idx = processed_doc.get_next_heading_idx(idx+1, speaker_font)
+
+        text_block = processed_doc.get_text_block(idx)
+        speaker_font_ids = processed_doc.get_matching_font_ids(speaker_font)
+
+        speaker_lines = tuple(line.text for line in text_block.lines if line.font_id in speaker_font_ids)
+
+        speaker_turns.append(SpeakerTurn(speaker_lines=speaker_lines,
+                                         text=text_block.get_text(),
+                                         start_idx=idx,
+                                         end_idx=next_idx,
+                                         page_number=text_block.page_number))
+
+        idx = next_idx
+
+    return speaker_turns
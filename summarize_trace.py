@@ -0,0 +1,128 @@
+import argparse
+import math
+
+from pipeline_trace import read_trace_file
+
+PERCENTILES = (50, 90, 99)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_percentile(sorted_values : list,
+                   percentile : float) -> float:
+    """nearest rank percentile
+
+    Args:
+        sorted_values (list): values in increasing order
+        percentile (float): percentile between 0 and 100
+
+    Returns:
+        float: the percentile, 0 if there are no values
+    """
+    if len(sorted_values) == 0:
+        return 0.
+
+    rank = max(1, math.ceil(percentile/100*len(sorted_values)))
+
+    return sorted_values[rank-1]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_stage_durations(records : list) -> dict:
+    """durations of each stage, total included, with the document they belong to
+
+    Args:
+        records (list): records of a trace file
+
+    Returns:
+        dict: stage -> list of (seconds, record) in decreasing order of seconds
+    """
+    stage_durations = {'total' : []}
+
+    for record in records:
+        stage_durations['total'].append((record['total'], record))
+
+        for stage, seconds in record['stages'].items():
+            stage_durations.setdefault(stage, []).append((seconds, record))
+
+    for durations in stage_durations.values():
+        durations.sort(key=lambda duration: duration[0], reverse=True)
+
+    return stage_durations
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_percentiles(stage_durations : dict) -> None:
+
+    header = f'{"stage":<16}{"docs":>7}{"sum":>10}' + ''.join(f'{"p"+str(p):>10}' for p in PERCENTILES) + f'{"max":>10}'
+    print(header)
+
+    # stages taking the most time first
+    for stage, durations in sorted(stage_durations.items(), key=lambda item: -sum(d[0] for d in item[1])):
+        sorted_values = [seconds for seconds, _ in reversed(durations)]
+
+        row = f'{stage:<16}{len(sorted_values):>7}{sum(sorted_values):>10.3f}'
+        row = row + ''.join(f'{get_percentile(sorted_values, p):>10.4f}' for p in PERCENTILES)
+        row = row + f'{sorted_values[-1]:>10.4f}'
+
+        print(row)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_slowest_documents(stage_durations : dict,
+                              num_slowest : int) -> None:
+
+    for stage, durations in stage_durations.items():
+        print(f'\nslowest {stage}:')
+
+        for seconds, record in durations[:num_slowest]:
+            counts = record['counts']
+            print(f'{seconds:>10.4f}  {counts.get("pages", 0):>4} pages  {record["outcome"]:<14}{record["file_path"]}')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def display_totals(records : list) -> None:
+
+    outcome_counts = {}
+    counts = {}
+
+    for record in records:
+        outcome_counts[record['outcome']] = outcome_counts.get(record['outcome'], 0) + 1
+
+        for name, value in record['counts'].items():
+            counts[name] = counts.get(name, 0) + value
+
+    print(f'# of documents: {len(records)}')
+    print(f'# of workers: {len(set(record["pid"] for record in records))}')
+
+    for outcome, num in sorted(outcome_counts.items()):
+        print(f'{outcome}: {num}')
+
+    for name, value in sorted(counts.items()):
+        print(f'{name}: {value}')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def main():
+    """
+    Print the stage percentiles and the slowest documents of a trace written by extract_QA --trace
+    """
+    parser = argparse.ArgumentParser(description='Summarise a JSONL stage trace')
+    parser.add_argument('trace_path')
+    parser.add_argument('--slowest', type=int, default=5,
+                        help='number of slowest documents listed per stage')
+    args = parser.parse_args()
+
+    records = read_trace_file(args.trace_path)
+
+    display_totals(records)
+    print()
+
+    stage_durations = get_stage_durations(records)
+
+    display_percentiles(stage_durations)
+    display_slowest_documents(stage_durations, args.slowest)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+if __name__ == '__main__':
+    main()
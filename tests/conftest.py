@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# the pipeline modules are imported from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_synthetic_corpus import generate_corpus
+
+@pytest.fixture(scope='session')
+def synthetic_corpus(tmp_path_factory) -> list:
+    """file paths of a small corpus of Bloomberg and Refinitiv transcripts,
+    some without a Q&A section
+    """
+    return generate_corpus(str(tmp_path_factory.mktemp('corpus')), 8, min_pages=4, max_pages=12,
+                           no_qa_fraction=0.25, seed=3)
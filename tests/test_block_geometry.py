@@ -0,0 +1,63 @@
+import random
+
+import fitz
+
+from block_geometry import BlockGeometry
+from extraction_utilities import get_previous_text_block, get_processed_doc_from_fitz_doc, only_block_on_line
+from processed_document import DocumentTextBlock
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_grid_text_blocks(seed : int,
+                         num_text_blocks : int = 40) -> list:
+    """blocks on a coarse grid, so that many share a row or are equally close
+    """
+    rand = random.Random(seed)
+
+    text_blocks = []
+
+    for _ in range(num_text_blocks):
+        x_1 = rand.choice([50., 200., 350.])
+        y_1 = rand.choice([100., 150., 200., 250.])
+
+        bbox = (x_1, y_1, x_1 + rand.choice([100., 150.]), y_1 + rand.choice([12., 24.]))
+        text_blocks.append(DocumentTextBlock({'bbox' : bbox, 'lines' : []}, 0))
+
+    return text_blocks
+
+def assert_same_as_the_loops(text_blocks : list) -> None:
+
+    geometry = BlockGeometry(text_blocks)
+
+    for text_block in text_blocks:
+        assert geometry.get_previous_text_block(text_block) is get_previous_text_block(text_block, text_blocks)
+        assert geometry.only_block_on_line(text_block) == only_block_on_line(text_block, text_blocks)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_grid_layouts_match_the_loops():
+
+    for seed in range(20):
+        assert_same_as_the_loops(get_grid_text_blocks(seed))
+
+def test_far_blocks_give_the_first_block():
+
+    text_blocks = [DocumentTextBlock({'bbox' : (0., 0., 10., 10.), 'lines' : []}, 0),
+                   DocumentTextBlock({'bbox' : (5000., 5000., 5100., 5010.), 'lines' : []}, 0)]
+    target_text_block = DocumentTextBlock({'bbox' : (3000., 3000., 3100., 3010.), 'lines' : []}, 0)
+
+    geometry = BlockGeometry(text_blocks)
+
+    assert geometry.get_previous_text_block(target_text_block) is text_blocks[0]
+    assert get_previous_text_block(target_text_block, text_blocks) is text_blocks[0]
+
+def test_corpus_pages_match_the_loops(synthetic_corpus):
+
+    for file_path in synthetic_corpus:
+        processed_doc = get_processed_doc_from_fitz_doc(fitz.open(file_path))
+
+        for page_number in range(processed_doc.num_pages):
+            text_blocks = processed_doc.get_page_text_blocks(page_number)
+
+            if len(text_blocks) > 0:
+                assert_same_as_the_loops(text_blocks)
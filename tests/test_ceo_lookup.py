@@ -0,0 +1,62 @@
+import pytest
+
+from ceo_lookup import CeoLookup, normalize_company_name
+
+COMPANY_CEO_DICT = {'Maple & Birch Co., Inc.' : {'2019' : 'Jane Doe', '2020' : 'John Roe'},
+                    'Enbridge' : {'2020' : 'Al Monaco'},
+                    'Enbridge Gas Distribution' : {'2020' : 'Cynthia Hansen'},
+                    'Northwind Traders Ltd' : {'2021' : 'Ann Smith'}}
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.fixture
+def ceo_lookup() -> CeoLookup:
+
+    return CeoLookup(COMPANY_CEO_DICT)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize('company_name, normalized_name', [('The Maple & Birch Co., Inc.', 'maple and birch'),
+                                                           ('Northwind Traders Ltd', 'northwind traders'),
+                                                           ('Société Générale SA', 'societe generale'),
+                                                           ('The Company', 'company')])
+def test_normalize_company_name(company_name, normalized_name):
+
+    assert normalize_company_name(company_name) == normalized_name
+
+@pytest.mark.parametrize('company_name', ['Maple & Birch Co., Inc.',
+                                          'Maple and Birch Inc',
+                                          'THE MAPLE & BIRCH COMPANY'])
+def test_exact_match(ceo_lookup, company_name):
+
+    assert ceo_lookup.get_ceo_match(company_name, 2019) == ('Jane Doe', 'Maple & Birch Co., Inc.', False)
+    assert ceo_lookup.get_ceo_match(company_name, '2020') == ('John Roe', 'Maple & Birch Co., Inc.', False)
+
+def test_fuzzy_match(ceo_lookup):
+
+    assert ceo_lookup.find_company_match('Northwind Trader Ltd') == (3, True)
+    assert ceo_lookup.get_ceo_match('Northwind Trader Ltd', 2021) == ('Ann Smith', 'Northwind Traders Ltd', True)
+
+def test_fuzzy_match_is_remembered(ceo_lookup):
+
+    ceo_lookup.get_ceo_match('Northwind Trader Ltd', 2021)
+
+    assert ceo_lookup.found_companies['Northwind Trader Ltd'] == (3, True)
+
+def test_names_of_another_length_are_rejected(ceo_lookup):
+
+    # 'enbridge gas' is similar enough to 'enbridge' but is a word longer
+    assert ceo_lookup.find_company_match('Enbridge Gas') == (-1, False)
+    assert ceo_lookup.get_ceo_match('Enbridge Gas', 2020) == ('', '', False)
+
+def test_length_ratio_can_be_lowered():
+
+    ceo_lookup = CeoLookup(COMPANY_CEO_DICT, min_length_ratio=0.0)
+
+    assert ceo_lookup.find_company_match('Enbridge Gas') == (1, True)
+
+def test_unknown_company_or_year(ceo_lookup):
+
+    assert ceo_lookup.get_ceo_match('Contoso Pharmaceuticals', 2020) == ('', '', False)
+    assert ceo_lookup.get_ceo_match('Enbridge', 2018) == ('', '', False)
+    assert ceo_lookup.get_ceo_name('Enbridge', 2020) == 'Al Monaco'
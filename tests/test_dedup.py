@@ -0,0 +1,118 @@
+import random
+import shutil
+
+from dedup import DuplicateDetector, get_duplicates_of, get_minhash_signature, get_shingle_hashes
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_text(seed : int,
+             num_words : int = 400) -> str:
+
+    rand = random.Random(seed)
+
+    return ' '.join(f'word{rand.randrange(5000)}' for _ in range(num_words))
+
+def get_edited_text(text : str,
+                    num_edits : int = 5) -> str:
+    """the same transcript with a few words changed, e.g. another download of the call
+    """
+    words = text.split()
+
+    for idx in range(0, len(words), len(words)//num_edits):
+        words[idx] = 'edited'
+
+    return ' '.join(words)
+
+def get_signature(detector : DuplicateDetector,
+                  text : str):
+
+    return get_minhash_signature(get_shingle_hashes(text), detector.permutations)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_near_duplicates_point_at_the_first_pdf():
+
+    detector = DuplicateDetector()
+
+    texts = {'a.pdf' : get_text(1),
+             'b.pdf' : get_text(2),
+             'c.pdf' : get_edited_text(get_text(1)),
+             'd.pdf' : get_text(1)}
+
+    duplicates = detector.find_duplicates(list(texts), signatures=[get_signature(detector, text) for text in texts.values()])
+
+    assert duplicates == {'c.pdf' : 'a.pdf', 'd.pdf' : 'a.pdf'}
+    assert get_duplicates_of(duplicates) == {'a.pdf' : ['c.pdf', 'd.pdf']}
+
+def test_pdfs_without_text_are_not_duplicates():
+
+    detector = DuplicateDetector()
+
+    duplicates = detector.find_duplicates(['a.pdf', 'b.pdf'], signatures=[None, None],
+                                          known_signatures={'known.pdf' : None})
+
+    assert duplicates == {}
+
+def test_known_pdf_is_the_canonical_pdf():
+
+    detector = DuplicateDetector()
+
+    known_signatures = {'known_1.pdf' : get_signature(detector, get_text(1)),
+                        'known_2.pdf' : get_signature(detector, get_text(2))}
+
+    file_paths = ['new_1.pdf', 'new_2.pdf', 'new_3.pdf']
+    signatures = [get_signature(detector, get_edited_text(get_text(2))),
+                  get_signature(detector, get_text(3)),
+                  get_signature(detector, get_text(1))]
+
+    duplicates = detector.find_duplicates(file_paths, signatures=signatures, known_signatures=known_signatures)
+
+    assert duplicates == {'new_1.pdf' : 'known_2.pdf', 'new_3.pdf' : 'known_1.pdf'}
+
+def test_known_pdfs_are_not_grouped_with_each_other():
+
+    detector = DuplicateDetector()
+
+    # two copies processed by the same earlier run are left as they are
+    known_signatures = {'known_1.pdf' : get_signature(detector, get_text(1)),
+                        'known_2.pdf' : get_signature(detector, get_text(1))}
+
+    assert detector.find_duplicates([], signatures=[], known_signatures=known_signatures) == {}
+    assert detector.get_candidate_pairs(list(known_signatures.values()), num_known=2) == set()
+
+    duplicates = detector.find_duplicates(['new.pdf'], signatures=[get_signature(detector, get_text(1))],
+                                          known_signatures=known_signatures)
+
+    assert duplicates == {'new.pdf' : 'known_1.pdf'}
+
+def test_new_pdfs_in_a_group_of_a_known_pdf_point_at_it():
+
+    detector = DuplicateDetector()
+
+    text = get_text(1)
+    edited_text = get_edited_text(text, 10)
+
+    known_signatures = {'known.pdf' : get_signature(detector, text)}
+
+    duplicates = detector.find_duplicates(['new_1.pdf', 'new_2.pdf'],
+                                          signatures=[get_signature(detector, edited_text),
+                                                      get_signature(detector, get_edited_text(edited_text, 10))],
+                                          known_signatures=known_signatures)
+
+    assert duplicates == {'new_1.pdf' : 'known.pdf', 'new_2.pdf' : 'known.pdf'}
+
+def test_copy_of_a_processed_pdf(synthetic_corpus, tmp_path):
+
+    detector = DuplicateDetector()
+
+    copy_file_path = str(tmp_path / 'copy.pdf')
+    shutil.copy(synthetic_corpus[0], copy_file_path)
+
+    known_file_paths = synthetic_corpus[:4]
+    known_signatures = dict(zip(known_file_paths, detector.get_signatures(known_file_paths, max_workers=2)))
+
+    file_paths = [copy_file_path] + synthetic_corpus[4:]
+
+    duplicates = detector.find_duplicates(file_paths, max_workers=2, known_signatures=known_signatures)
+
+    assert duplicates == {copy_file_path : synthetic_corpus[0]}
@@ -0,0 +1,157 @@
+import fitz
+import pytest
+
+import lazy_document
+
+from extract_QA import get_analysis_result
+from extraction_utilities import QA_HEADING_MATCHER, get_processed_doc_from_file, get_processed_doc_from_fitz_doc
+from generate_synthetic_corpus import REFINITIV_HEADING_FONT, REFINITIV_SPEAKER_FONT
+from lazy_document import LazyProcessedDocument
+from providers import BLOOMBERG
+
+# the same document extracted eagerly, into arrays and page by page
+DOCUMENT_MODES = {'eager' : lambda file_path: get_processed_doc_from_fitz_doc(fitz.open(file_path)),
+                  'columnar' : lambda file_path: get_processed_doc_from_fitz_doc(fitz.open(file_path), columnar=True),
+                  'lazy' : lambda file_path: LazyProcessedDocument(fitz.open(file_path), file_path)}
+
+# options of get_processed_doc_from_file giving each kind of document
+EXTRACTION_MODES = [{},
+                    {'columnar' : True},
+                    {'lazy' : True},
+                    {'prescan' : True},
+                    {'lazy' : True, 'prescan' : True}]
+
+TITLES = [QA_HEADING_MATCHER, ['Company Participants'], ['CORPORATE PARTICIPANTS']]
+
+FONTS = [BLOOMBERG.heading_font, {'name' : REFINITIV_HEADING_FONT}, {'name' : REFINITIV_SPEAKER_FONT}]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def describe_block(text_block) -> tuple:
+
+    return (text_block.page_number,
+            (text_block.x_1, text_block.y_1, text_block.x_2, text_block.y_2),
+            [(line.text, line.font_name, line.font_size, line.font_colour) for line in text_block.lines])
+
+def get_search_ranges(num_text_blocks : int) -> list:
+    """(start_idx, end_idx) of the heading searches, -1 for the ends of the document
+    """
+    return [(-1, -1), (0, -1), (num_text_blocks//3, -1), (0, num_text_blocks//2), (num_text_blocks//2, num_text_blocks)]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize('mode', ['columnar', 'lazy'])
+def test_text_blocks_match_eager(synthetic_corpus, mode):
+
+    for file_path in synthetic_corpus:
+        eager_doc = DOCUMENT_MODES['eager'](file_path)
+        doc = DOCUMENT_MODES[mode](file_path)
+
+        assert doc.num_text_blocks == eager_doc.num_text_blocks
+
+        for idx in range(eager_doc.num_text_blocks):
+            assert describe_block(doc.get_text_block(idx)) == describe_block(eager_doc.get_text_block(idx))
+
+@pytest.mark.parametrize('mode', ['columnar', 'lazy'])
+def test_page_start_indices_match_eager(synthetic_corpus, mode):
+
+    for file_path in synthetic_corpus:
+        eager_doc = DOCUMENT_MODES['eager'](file_path)
+        doc = DOCUMENT_MODES[mode](file_path)
+
+        for page_number in range(eager_doc.num_pages):
+            assert doc.get_page_start_idx(page_number) == eager_doc.get_page_start_idx(page_number)
+
+@pytest.mark.parametrize('mode', ['columnar', 'lazy'])
+def test_heading_indices_match_eager(synthetic_corpus, mode):
+
+    num_found = 0
+
+    for file_path in synthetic_corpus:
+        eager_doc = DOCUMENT_MODES['eager'](file_path)
+        doc = DOCUMENT_MODES[mode](file_path)
+
+        for titles in TITLES:
+            for font in FONTS:
+                for start_idx, end_idx in get_search_ranges(eager_doc.num_text_blocks):
+                    expected = eager_doc.get_heading_idx(titles, font, start_idx, end_idx)
+
+                    # a new lazy document for each search, which numbers the pages as the search reaches them
+                    if mode == 'lazy':
+                        doc = DOCUMENT_MODES[mode](file_path)
+
+                    assert doc.get_heading_idx(titles, font, start_idx, end_idx) == expected
+
+                    num_found = num_found + (expected != -1)
+
+    assert num_found > 0
+
+@pytest.mark.parametrize('mode', ['columnar', 'lazy'])
+def test_next_heading_indices_match_eager(synthetic_corpus, mode):
+
+    for file_path in synthetic_corpus:
+        eager_doc = DOCUMENT_MODES['eager'](file_path)
+        doc = DOCUMENT_MODES[mode](file_path)
+
+        for font in FONTS:
+            for start_idx in range(0, eager_doc.num_text_blocks, 7):
+                assert doc.get_next_heading_idx(start_idx, font) == eager_doc.get_next_heading_idx(start_idx, font)
+
+@pytest.mark.parametrize('counted', [True, False])
+def test_lazy_numbering_with_blocks_left_out(synthetic_corpus, monkeypatch, counted):
+    """the "blocks" mode leaves out the blocks without a visible character,
+    the lazy document must still number the blocks like the "dict" mode.
+    Without the count of the TextPage blocks, the parse of the page corrects it.
+    """
+    get_text = fitz.Page.get_text
+
+    def get_text_leaving_out_a_block(page, option='text', **kwargs):
+        blocks = get_text(page, option, **kwargs)
+
+        if option == 'blocks' and page.number % 2 == 1 and len(blocks) > 1:
+            last_block_number = max(block[5] for block in blocks)
+            blocks = [block for block in blocks if block[5] != last_block_number]
+
+        return blocks
+
+    monkeypatch.setattr(fitz.Page, 'get_text', get_text_leaving_out_a_block)
+
+    if not counted:
+        monkeypatch.setattr(lazy_document, 'count_text_page_blocks',
+                            lambda text_page: len(get_text_leaving_out_a_block(text_page.parent, 'blocks', textpage=text_page)))
+
+    for file_path in synthetic_corpus:
+        eager_doc = DOCUMENT_MODES['eager'](file_path)
+        doc = DOCUMENT_MODES['lazy'](file_path)
+
+        # the plain text of every page is read before any page is parsed
+        doc.get_page_text(doc.num_pages - 1)
+
+        for idx in range(eager_doc.num_text_blocks):
+            assert describe_block(doc.get_text_block(idx)) == describe_block(eager_doc.get_text_block(idx))
+
+        assert doc.num_text_blocks == eager_doc.num_text_blocks
+
+def test_lazy_heading_search_skips_pages(synthetic_corpus):
+
+    for file_path in synthetic_corpus:
+        doc = DOCUMENT_MODES['lazy'](file_path)
+
+        doc.get_heading_idx(QA_HEADING_MATCHER, BLOOMBERG.heading_font)
+
+        assert doc.num_parsed_pages < doc.num_pages
+
+@pytest.mark.parametrize('options', EXTRACTION_MODES[1:])
+def test_analysis_results_match_eager(synthetic_corpus, options):
+
+    for file_path in synthetic_corpus:
+        expected = get_analysis_result(get_processed_doc_from_file(file_path))
+        result = get_analysis_result(get_processed_doc_from_file(file_path, **options))
+
+        assert result.company_name == expected.company_name
+        assert result.report_year == expected.report_year
+        assert result.ceo_name == expected.ceo_name
+        assert result.num_ceos == expected.num_ceos
+        assert result.qa_section_found == expected.qa_section_found
+        assert result.qa_section_page == expected.qa_section_page
+        assert result.answer_text == expected.answer_text
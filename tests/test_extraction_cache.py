@@ -0,0 +1,117 @@
+import os
+import shutil
+
+import fitz
+import pytest
+
+import extraction_cache
+from columnar_document import ColumnarDocument
+from extraction_cache import ExtractionCache
+from extraction_utilities import get_processed_doc_from_fitz_doc
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_block_texts(processed_document) -> list:
+
+    return [(text_block.page_number, text_block.get_text()) for text_block in processed_document.document_text_blocks]
+
+@pytest.fixture
+def cached_pdf(synthetic_corpus, tmp_path) -> (str, ExtractionCache):
+    """copy of a corpus pdf whose extraction is in a new cache
+    """
+    file_path = str(tmp_path / 'transcript.pdf')
+    shutil.copy(synthetic_corpus[0], file_path)
+
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+    cache.store(file_path, get_processed_doc_from_fitz_doc(fitz.open(file_path)))
+
+    return file_path, cache
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_load_returns_the_stored_document(cached_pdf, columnar):
+
+    file_path, cache = cached_pdf
+
+    processed_document = cache.load(file_path, columnar)
+
+    assert isinstance(processed_document, ColumnarDocument) == columnar
+    assert processed_document.file_path == file_path
+    assert get_block_texts(processed_document) == get_block_texts(get_processed_doc_from_fitz_doc(fitz.open(file_path)))
+
+def test_entry_is_invalidated_by_a_new_modification_time(cached_pdf):
+
+    file_path, cache = cached_pdf
+
+    assert cache.contains(file_path)
+
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert not cache.contains(file_path)
+    assert cache.load(file_path) is None
+
+def test_entry_is_invalidated_by_a_new_size(cached_pdf):
+
+    file_path, cache = cached_pdf
+
+    stat = os.stat(file_path)
+
+    with open(file_path, 'ab') as pdf_file:
+        pdf_file.write(b'\n')
+
+    # the same modification time, only the size tells the pdfs apart
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert not cache.contains(file_path)
+    assert cache.load(file_path) is None
+
+def test_entry_is_invalidated_by_a_new_format_version(cached_pdf, monkeypatch):
+
+    file_path, cache = cached_pdf
+
+    monkeypatch.setattr(extraction_cache, 'CACHE_FORMAT_VERSION', extraction_cache.CACHE_FORMAT_VERSION + 1)
+
+    assert not cache.contains(file_path)
+    assert cache.load(file_path) is None
+
+def test_entry_of_another_format_version_is_not_decoded(cached_pdf, monkeypatch):
+
+    file_path, cache = cached_pdf
+
+    cache_file_path = cache.get_cache_file_path(file_path)
+
+    monkeypatch.setattr(extraction_cache, 'CACHE_FORMAT_VERSION', extraction_cache.CACHE_FORMAT_VERSION + 1)
+
+    # an entry written by another version under the key of this one
+    os.rename(cache_file_path, cache.get_cache_file_path(file_path))
+
+    assert cache.load(file_path) is None
+
+def test_missing_pdf_is_not_in_the_cache(cached_pdf):
+
+    file_path, cache = cached_pdf
+
+    os.remove(file_path)
+
+    assert not cache.contains(file_path)
+    assert cache.load(file_path) is None
+
+def test_prune_evicts_the_least_recently_used_entries(synthetic_corpus, tmp_path):
+
+    cache = ExtractionCache(str(tmp_path / 'cache'))
+
+    for file_path in synthetic_corpus[:3]:
+        cache.store(file_path, get_processed_doc_from_fitz_doc(fitz.open(file_path)))
+
+    # the oldest entry is used last
+    for idx, file_path in enumerate([synthetic_corpus[1], synthetic_corpus[2], synthetic_corpus[0]]):
+        os.utime(cache.get_cache_file_path(file_path), ns=(idx*10**9, idx*10**9))
+
+    cache.max_size = os.path.getsize(cache.get_cache_file_path(synthetic_corpus[0]))
+
+    assert cache.prune() == 2
+    assert cache.contains(synthetic_corpus[0])
+    assert not cache.contains(synthetic_corpus[1])
+    assert not cache.contains(synthetic_corpus[2])
@@ -0,0 +1,179 @@
+import os
+
+import pytest
+
+import manifest as manifest_module
+from extraction_utilities import AnalysisResults
+from manifest import FAILURE_STATUSES, RETRY_STATUSES, Manifest, get_file_hash
+
+VERSION = 'version-1'
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.fixture
+def pdf_tree(tmp_path) -> list:
+    """file paths of a few files standing in for pdfs, the manifest only reads their bytes
+    """
+    file_paths = []
+
+    for idx in range(4):
+        file_path = str(tmp_path / f'transcript_{idx}.pdf')
+        with open(file_path, 'wb') as pdf_file:
+            pdf_file.write(f'transcript {idx}'.encode('UTF-8'))
+
+        file_paths.append(file_path)
+
+    return file_paths
+
+@pytest.fixture
+def manifest(tmp_path) -> Manifest:
+
+    with Manifest(str(tmp_path / 'manifest.db'), VERSION) as manifest:
+        yield manifest
+
+def record_all(manifest : Manifest,
+               file_paths : list,
+               status : str = 'Success') -> None:
+
+    for file_path in file_paths:
+        manifest.record(file_path, AnalysisResults(file_path=file_path), status)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_new_pdfs_are_pending(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree[:2])
+
+    assert manifest.get_pending_file_paths(pdf_tree) == pdf_tree[2:]
+
+@pytest.mark.parametrize('status', RETRY_STATUSES)
+def test_each_retry_status_is_pending_when_retried(manifest, pdf_tree, status):
+
+    record_all(manifest, pdf_tree[:1], status)
+    record_all(manifest, pdf_tree[1:])
+
+    assert manifest.get_pending_file_paths(pdf_tree, (status,)) == pdf_tree[:1]
+    assert manifest.get_pending_file_paths(pdf_tree, ()) == []
+
+@pytest.mark.parametrize('status', RETRY_STATUSES)
+def test_default_retry_statuses(manifest, pdf_tree, status):
+
+    record_all(manifest, pdf_tree, status)
+
+    pending_file_paths = manifest.get_pending_file_paths(pdf_tree)
+
+    # a pdf without a Q&A section or of an unknown format gives the same result on every run
+    assert pending_file_paths == (pdf_tree if status in FAILURE_STATUSES else [])
+
+def test_successes_and_duplicates_are_not_retried(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree[:2])
+    manifest.record(pdf_tree[2], AnalysisResults(file_path=pdf_tree[2], duplicate_of=pdf_tree[0]), 'Duplicate')
+    record_all(manifest, pdf_tree[3:])
+
+    assert manifest.get_pending_file_paths(pdf_tree, RETRY_STATUSES) == []
+
+def test_pdfs_of_another_version_are_pending(tmp_path, pdf_tree):
+
+    manifest_path = str(tmp_path / 'manifest.db')
+
+    with Manifest(manifest_path, VERSION) as manifest:
+        record_all(manifest, pdf_tree)
+
+    with Manifest(manifest_path, 'version-2') as manifest:
+        assert manifest.get_pending_file_paths(pdf_tree) == pdf_tree
+
+def test_changed_pdfs_are_pending(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree)
+
+    with open(pdf_tree[1], 'ab') as pdf_file:
+        pdf_file.write(b' changed')
+
+    assert manifest.get_pending_file_paths(pdf_tree) == pdf_tree[1:2]
+
+def test_touched_pdfs_keep_their_results(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree)
+
+    stat = os.stat(pdf_tree[1])
+    os.utime(pdf_tree[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert manifest.get_pending_file_paths(pdf_tree) == []
+    assert manifest.get_entry(pdf_tree[1])[1] == stat.st_mtime_ns + 10**9
+
+def test_duplicates_are_pending_with_their_canonical_pdf(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree[:1], 'No CEO')
+    manifest.record(pdf_tree[1], AnalysisResults(file_path=pdf_tree[1], duplicate_of=pdf_tree[0]), 'Duplicate')
+    record_all(manifest, pdf_tree[2:])
+
+    assert manifest.get_pending_file_paths(pdf_tree) == pdf_tree[:2]
+
+def test_duplicates_are_pending_when_their_canonical_pdf_is_removed(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree[:1])
+    manifest.record(pdf_tree[1], AnalysisResults(file_path=pdf_tree[1], duplicate_of=pdf_tree[0]), 'Duplicate')
+    record_all(manifest, pdf_tree[2:])
+
+    assert manifest.get_pending_file_paths(pdf_tree[1:]) == pdf_tree[1:2]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_records_are_written_in_batches(tmp_path, pdf_tree):
+
+    manifest_path = str(tmp_path / 'manifest.db')
+
+    with Manifest(manifest_path, VERSION, batch_size=3) as manifest:
+        record_all(manifest, pdf_tree[:2])
+
+        assert manifest.get_entry(pdf_tree[0]) is None
+
+        record_all(manifest, pdf_tree[2:3])
+
+        assert manifest.get_entry(pdf_tree[0]) is not None
+
+        record_all(manifest, pdf_tree[3:])
+
+    # the last records are written when the manifest is closed
+    with Manifest(manifest_path, VERSION) as manifest:
+        assert [result.file_path for result, _ in manifest.get_results(pdf_tree)] == pdf_tree
+
+def test_results_include_the_records_not_written_yet(manifest, pdf_tree):
+
+    record_all(manifest, pdf_tree, 'No CEO')
+
+    assert [status for _, status in manifest.get_results(pdf_tree)] == ['No CEO']*len(pdf_tree)
+
+def test_hash_computed_by_the_worker_is_recorded(manifest, pdf_tree, monkeypatch):
+
+    monkeypatch.setattr(manifest_module, 'get_file_hash', lambda *args: pytest.fail('pdf hashed by the manifest'))
+
+    manifest.record(pdf_tree[0], AnalysisResults(file_path=pdf_tree[0], content_hash='worker-hash'), 'Success')
+    manifest.flush()
+
+    assert manifest.get_entry(pdf_tree[0])[2] == 'worker-hash'
+
+def test_hash_is_kept_while_the_pdf_is_unchanged(manifest, pdf_tree, monkeypatch):
+
+    record_all(manifest, pdf_tree[:1])
+    manifest.flush()
+
+    assert manifest.get_entry(pdf_tree[0])[2] == get_file_hash(pdf_tree[0])
+
+    hashed_file_paths = []
+    monkeypatch.setattr(manifest_module, 'get_file_hash', lambda file_path: hashed_file_paths.append(file_path) or 'new-hash')
+
+    record_all(manifest, pdf_tree[:1], 'No CEO')
+    manifest.flush()
+
+    assert hashed_file_paths == []
+
+    with open(pdf_tree[0], 'ab') as pdf_file:
+        pdf_file.write(b' changed')
+
+    record_all(manifest, pdf_tree[:1])
+    manifest.flush()
+
+    assert hashed_file_paths == pdf_tree[:1]
+    assert manifest.get_entry(pdf_tree[0])[2] == 'new-hash'
@@ -0,0 +1,70 @@
+import os
+import shutil
+
+import fitz
+import pytest
+
+from providers import BLOOMBERG, REFINITIV, identify_provider, sniff_fitz_doc
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def save_blank_pdf(file_path : str) -> str:
+    """pdf of one page without any marker of a provider
+    """
+    fitz_doc = fitz.open()
+    fitz_doc.new_page().insert_text((72, 72), 'Earnings Call')
+    fitz_doc.save(file_path)
+
+    return file_path
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize('font_names, page_text, provider', [({'AvenirNextPForBBG-Medium'}, '', BLOOMBERG),
+                                                             (set(), 'Bloomberg Transcript', BLOOMBERG),
+                                                             (set(), 'REFINITIV STREETEVENTS', REFINITIV),
+                                                             (set(), 'THOMSON REUTERS STREETEVENTS', REFINITIV)])
+def test_markers_identify_the_provider(font_names, page_text, provider):
+
+    # the markers of the content win over the directory of the pdf
+    assert identify_provider(font_names, page_text, '/transcripts/Other/a.pdf') is provider
+    assert identify_provider(font_names, page_text, '/transcripts/Refinitiv/a.pdf' if provider is BLOOMBERG
+                                                    else '/transcripts/Bloomberg/a.pdf') is provider
+
+def test_more_markers_win():
+
+    assert identify_provider({'AvenirNextPForBBG-Medium'}, 'REFINITIV STREETEVENTS\nBloomberg Transcript') is BLOOMBERG
+
+def test_path_identifies_the_provider_without_markers():
+
+    assert identify_provider(set(), '', '/transcripts/Refinitiv/a.pdf') is REFINITIV
+    assert identify_provider(set(), '', '/transcripts/Bloomberg/a.pdf', None) is BLOOMBERG
+
+def test_default_provider_without_markers_or_path():
+
+    assert identify_provider(set(), '', '/transcripts/Other/a.pdf') is BLOOMBERG
+    assert identify_provider(set(), '', '/transcripts/Other/a.pdf', REFINITIV) is REFINITIV
+    assert identify_provider(set(), '', '/transcripts/Other/a.pdf', None) is None
+
+def test_sniff_corpus_pdfs_outside_their_directory(synthetic_corpus, tmp_path):
+
+    for idx, file_path in enumerate(synthetic_corpus):
+        copy_file_path = str(tmp_path / f'transcript_{idx}.pdf')
+        shutil.copy(file_path, copy_file_path)
+
+        provider = sniff_fitz_doc(fitz.open(copy_file_path), copy_file_path, default_provider=None)
+
+        assert provider is not None
+        assert provider.path_marker == os.path.basename(os.path.dirname(file_path))
+
+@pytest.mark.parametrize('default_provider', [BLOOMBERG, REFINITIV, None])
+def test_sniff_pdf_without_markers(tmp_path, default_provider):
+
+    file_path = save_blank_pdf(str(tmp_path / 'transcript.pdf'))
+
+    assert sniff_fitz_doc(fitz.open(file_path), file_path, default_provider=default_provider) is default_provider
+
+def test_sniff_pdf_without_pages():
+
+    assert sniff_fitz_doc(fitz.open(), '/transcripts/Refinitiv/a.pdf', default_provider=None) is REFINITIV
+    assert sniff_fitz_doc(fitz.open(), '/transcripts/Other/a.pdf') is BLOOMBERG
+    assert sniff_fitz_doc(fitz.open(), '/transcripts/Other/a.pdf', default_provider=None) is None
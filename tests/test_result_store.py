@@ -0,0 +1,147 @@
+import os
+import sqlite3
+
+import pytest
+
+from export_results import export_results_table, export_text_files
+from extract_QA import get_result_row
+from extraction_utilities import AnalysisResults
+from result_store import ResultStore
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_result(file_path : str,
+               **kwargs) -> AnalysisResults:
+
+    fields = dict(company_name='Maple & Birch', report_year=2020, ceo_name='Jane Doe', num_ceos=1,
+                  qa_section_page=3, answer_text=['First answer.', 'Second answer.'])
+    fields.update(kwargs)
+
+    return AnalysisResults(file_path=file_path, **fields)
+
+def describe_result(result : AnalysisResults) -> tuple:
+
+    return (result.file_path, result.company_name, str(result.report_year), result.ceo_name, result.num_ceos,
+            result.ceo_table_company, result.ceo_fuzzy_match, result.qa_section_page, result.qa_section_found,
+            result.answer_text, result.duplicate_of)
+
+RESULTS = [(get_result('a.pdf'), 'Success'),
+           (get_result('b.pdf', ceo_name='John Roe', ceo_table_company='Maple and Birch Inc', ceo_fuzzy_match=True), 'Success'),
+           (get_result('c.pdf', duplicate_of='a.pdf', answer_text=[]), 'Duplicate'),
+           (get_result('d.pdf', qa_section_found=False, answer_text=[]), 'No Q&A')]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.fixture
+def result_store(tmp_path) -> ResultStore:
+
+    with ResultStore(str(tmp_path / 'results.db')) as result_store:
+        yield result_store
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_results_round_trip(result_store):
+
+    for result, status in RESULTS:
+        result_store.add(result, status)
+
+    assert result_store.num_results == len(RESULTS)
+    assert [(describe_result(result), status) for result, status in result_store.get_results()] == \
+           [(describe_result(result), status) for result, status in RESULTS]
+
+def test_pdf_processed_again_replaces_its_row(result_store):
+
+    result_store.add(get_result('a.pdf', ceo_name=''), 'No CEO')
+    result_store.flush()
+    result_store.add(get_result('a.pdf'), 'Success')
+
+    assert [(result.ceo_name, status) for result, status in result_store.get_results()] == [('Jane Doe', 'Success')]
+
+def test_results_are_inserted_in_batches(tmp_path):
+
+    store_path = str(tmp_path / 'results.db')
+
+    with ResultStore(store_path, batch_size=3) as result_store:
+        for result, status in RESULTS[:2]:
+            result_store.add(result, status)
+
+        assert sqlite3.connect(store_path).execute('SELECT COUNT(*) FROM results').fetchone()[0] == 0
+
+        result_store.add(*RESULTS[2])
+
+        assert sqlite3.connect(store_path).execute('SELECT COUNT(*) FROM results').fetchone()[0] == 3
+
+        result_store.add(*RESULTS[3])
+
+    # the last results are written when the store is closed
+    with ResultStore(store_path) as result_store:
+        assert result_store.num_results == len(RESULTS)
+
+def test_store_without_the_added_columns(tmp_path):
+
+    store_path = str(tmp_path / 'results.db')
+
+    connection = sqlite3.connect(store_path)
+    connection.execute('CREATE TABLE results (file_path TEXT PRIMARY KEY, status TEXT, company_name TEXT, report_year TEXT, '
+                       'ceo_name TEXT, num_ceos INTEGER, num_answers INTEGER, qa_section_page INTEGER, '
+                       'qa_section_found INTEGER, answers TEXT, stored_at REAL)')
+    connection.execute("INSERT INTO results VALUES ('old.pdf', 'Success', 'Maple & Birch', '2019', 'Jane Doe', 1, 1, 2, 1, "
+                       "'[\"Old answer.\"]', 0)")
+    connection.commit()
+    connection.close()
+
+    with ResultStore(store_path) as result_store:
+        result_store.add(*RESULTS[1])
+
+        results = list(result_store.get_results())
+
+    assert describe_result(results[0][0]) == ('old.pdf', 'Maple & Birch', '2019', 'Jane Doe', 1, '', False, 2, True,
+                                              ['Old answer.'], '')
+    assert describe_result(results[1][0]) == describe_result(RESULTS[1][0])
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize('result, status', RESULTS)
+def test_every_row_has_the_same_columns(result, status):
+
+    columns = get_result_row(0, result, status).split('+')
+
+    assert len(columns) == 10
+    assert columns[7] == result.file_path
+    assert columns[8] == result.duplicate_of
+    assert columns[9] == (result.ceo_table_company if result.ceo_fuzzy_match else '')
+
+def test_export_results_table(result_store, tmp_path):
+
+    for result, status in RESULTS:
+        result_store.add(result, status)
+
+    results_table_path = str(tmp_path / 'results.txt')
+
+    status_counts = export_results_table(result_store, results_table_path)
+
+    with open(results_table_path, encoding='UTF-8') as results_table:
+        rows = results_table.read().splitlines()
+
+    assert status_counts == {'Success' : 2, 'Duplicate' : 1, 'No Q&A' : 1}
+    assert rows == [get_result_row(num, result, status) for num, (result, status) in enumerate(RESULTS)]
+
+def test_export_text_files(result_store, tmp_path):
+
+    for result, status in RESULTS:
+        result_store.add(result, status)
+
+    # the same CEO, company and year as a.pdf
+    result_store.add(get_result('e.pdf', answer_text=['Other answer.']), 'Success')
+
+    output_dir_path = str(tmp_path / 'output')
+
+    # the duplicate has no file of its own
+    assert export_text_files(result_store, output_dir_path) == 4
+    assert sorted(os.listdir(output_dir_path)) == ['Jane_Doe_Maple_&_Birch_2020_0.txt',
+                                                   'Jane_Doe_Maple_&_Birch_2020_1.txt',
+                                                   'Jane_Doe_Maple_&_Birch_2020_2.txt',
+                                                   'John_Roe_Maple_&_Birch_2020_0.txt']
+
+    with open(os.path.join(output_dir_path, 'Jane_Doe_Maple_&_Birch_2020_0.txt'), encoding='UTF-8') as text_file:
+        assert text_file.read() == 'First answer.\nSecond answer.\n'
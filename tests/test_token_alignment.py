@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from token_alignment import align_token_lists
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def find_sub_list(sub_list : list,
+                  full_list : list) -> list:
+
+    return [idx for idx in range(len(full_list) - len(sub_list) + 1)
+            if full_list[idx:idx + len(sub_list)] == sub_list]
+
+def get_unique_list_token(input_list : list) -> list:
+
+    token_length = 1
+    while len(find_sub_list(input_list[0:token_length], input_list)) != 1:
+        token_length = token_length + 1
+
+    return input_list[0:token_length]
+
+def get_residuals(list_1 : list,
+                  list_2 : list) -> (list, list):
+
+    residual_1 = []
+    residual_2 = list(list_2)
+
+    for item in list_1:
+        if item in residual_2:
+            residual_2.remove(item)
+        else:
+            residual_1.append(item)
+
+    return residual_1, residual_2
+
+def compare_lists_by_rescanning(list_1 : list,
+                                list_2 : list) -> (list, list):
+    """check_results.compare_lists before it used align_token_lists, rescanning
+    the lists for each unique sublist. check_results runs its comparison when
+    imported, so the old functions are repeated here.
+    """
+    list_1_missed = []
+
+    while len(list_1) > 0:
+        unique_sub_list = get_unique_list_token(list_1)
+
+        idx_list = find_sub_list(unique_sub_list, list_2)
+
+        if len(idx_list) == 0:
+            list_1_missed = list_1_missed + unique_sub_list
+        else:
+            idx = idx_list[0]
+            list_2 = list_2[0:idx] + list_2[idx + len(unique_sub_list):]
+
+        list_1 = list_1[len(unique_sub_list):]
+
+    return get_residuals(list_1_missed, list_2)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_edited_copy(rand : random.Random,
+                    tokens : list,
+                    vocabulary : list) -> list:
+    """tokens with sections moved, dropped and inserted, like an answer file
+    compared with the answers extracted from a transcript
+    """
+    edited = list(tokens)
+
+    for _ in range(rand.randint(0, 4)):
+        operation = rand.choice(['move', 'drop', 'insert'])
+        start = rand.randrange(len(edited) + 1)
+        end = min(len(edited), start + rand.randint(1, 8))
+
+        if operation == 'move':
+            section = edited[start:end]
+            del edited[start:end]
+            position = rand.randrange(len(edited) + 1)
+            edited[position:position] = section
+        elif operation == 'drop':
+            del edited[start:end]
+        else:
+            edited[start:start] = [rand.choice(vocabulary) for _ in range(rand.randint(1, 5))]
+
+    return edited
+
+@pytest.mark.parametrize('seed', range(200))
+def test_align_token_lists_matches_rescanning(seed):
+
+    rand = random.Random(seed)
+
+    # a small vocabulary gives repeated tokens and sublists
+    vocabulary = [f'w{idx}' for idx in range(rand.randint(1, 12))]
+    list_1 = [rand.choice(vocabulary) for _ in range(rand.randint(0, 60))]
+    list_2 = get_edited_copy(rand, list_1, vocabulary)
+
+    assert align_token_lists(list_1, list_2) == compare_lists_by_rescanning(list_1, list_2)
+
+def test_align_token_lists_does_not_change_its_arguments():
+
+    list_1 = 'we expect the quarter to be strong the quarter'.split()
+    list_2 = 'the quarter we expect to be strong'.split()
+
+    expected = compare_lists_by_rescanning(list(list_1), list(list_2))
+
+    assert align_token_lists(list_1, list_2) == expected
+    assert list_1 == 'we expect the quarter to be strong the quarter'.split()
+    assert list_2 == 'the quarter we expect to be strong'.split()
+
+def test_align_token_lists_with_moved_sections():
+
+    missed, extra = align_token_lists('a b c d e'.split(), 'c d a b x'.split())
+
+    assert missed == ['e']
+    assert extra == ['x']
+
+def test_align_empty_token_lists():
+
+    assert align_token_lists([], []) == ([], [])
+    assert align_token_lists(['a'], []) == (['a'], [])
+    assert align_token_lists([], ['a']) == ([], ['a'])
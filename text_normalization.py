@@ -0,0 +1,71 @@
+import functools
+import re
+import unicodedata
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def normalize_text(text : str,
+                   strip_pattern : re.Pattern = None,
+                   lower : bool = False) -> str:
+    """canonical form of a text used by the token searches: ligatures are
+    replaced with ascii characters (NFKD), the characters matched by
+    strip_pattern are removed and the result is stripped
+
+    Args:
+        text (str): text to normalize
+        strip_pattern (re.Pattern): characters to remove, nothing is removed if None
+        lower (bool): lower case the text
+
+    Returns:
+        str: normalized text
+    """
+    normalized_text = unicodedata.normalize('NFKD', text)
+
+    if strip_pattern is not None:
+        normalized_text = strip_pattern.sub('', normalized_text)
+
+    if lower:
+        normalized_text = normalized_text.lower()
+
+    return normalized_text.strip()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@functools.lru_cache(maxsize=1024)
+def get_token_pattern(token : str,
+                      strip_pattern : re.Pattern = None) -> re.Pattern:
+    """compiled word boundary pattern for a token, shared by all documents. The
+    token is used as a regular expression, as in the searches it replaces.
+
+    Args:
+        token (str): token searched for
+        strip_pattern (re.Pattern): characters removed from the token first
+
+    Returns:
+        re.Pattern: pattern matching the token as a whole word
+    """
+    if strip_pattern is not None:
+        token = strip_pattern.sub('', token)
+
+    return re.compile(r'\b' + token + r'\b')
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def contains_tokens(normalized_text : str,
+                    tokens : list,
+                    token_strip_pattern : re.Pattern = None) -> bool:
+    """check if any of the tokens is contained in normalized_text as a whole word
+
+    Args:
+        normalized_text (str): text returned by normalize_text
+        tokens (list): list of strings which are being searched for
+        token_strip_pattern (re.Pattern): characters removed from the tokens
+
+    Returns:
+        bool: True if a token is found
+    """
+    for token in tokens:
+        if get_token_pattern(token, token_strip_pattern).search(normalized_text):
+            return True
+
+    return False
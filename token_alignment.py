@@ -0,0 +1,307 @@
+from collections import Counter
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_token_ids(list_1 : list,
+                  list_2 : list) -> (list, list):
+    """replace the tokens of both lists by integer ids
+
+    Returns:
+        (list, list): ids of list_1 and of list_2
+    """
+    token_ids = {}
+
+    ids_1 = [token_ids.setdefault(token, len(token_ids)) for token in list_1]
+    ids_2 = [token_ids.setdefault(token, len(token_ids)) for token in list_2]
+
+    return ids_1, ids_2
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def build_suffix_array(ids : list) -> (list, list):
+    """suffix array of a list of non negative ids by prefix doubling
+
+    Args:
+        ids (list): list of token ids
+
+    Returns:
+        (list, list): suffix array and rank of each suffix
+    """
+    num_ids = len(ids)
+
+    suffix_array = list(range(num_ids))
+    rank = list(ids)
+
+    length = 1
+    while num_ids > 0:
+        # a suffix shorter than length sorts before the suffixes it is a prefix of
+        keys = [(rank[i], rank[i+length] if i+length < num_ids else -1) for i in range(num_ids)]
+        suffix_array.sort(key=keys.__getitem__)
+
+        new_rank = [0]*num_ids
+        for position in range(1, num_ids):
+            new_rank[suffix_array[position]] = new_rank[suffix_array[position-1]]
+            if keys[suffix_array[position]] != keys[suffix_array[position-1]]:
+                new_rank[suffix_array[position]] = new_rank[suffix_array[position]] + 1
+        rank = new_rank
+
+        if rank[suffix_array[-1]] == num_ids - 1:
+            break
+
+        length = 2*length
+
+    return suffix_array, rank
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def build_lcp_array(ids : list,
+                    suffix_array : list,
+                    rank : list) -> list:
+    """longest common prefix of each suffix and the previous one in the suffix array (Kasai)
+
+    Returns:
+        list: lcp[i] is the common prefix length of suffix_array[i-1] and suffix_array[i]
+    """
+    num_ids = len(ids)
+    lcp = [0]*num_ids
+
+    common_length = 0
+    for idx in range(num_ids):
+        if rank[idx] == 0:
+            common_length = 0
+            continue
+
+        previous_idx = suffix_array[rank[idx]-1]
+        while idx+common_length < num_ids and previous_idx+common_length < num_ids and \
+              ids[idx+common_length] == ids[previous_idx+common_length]:
+            common_length = common_length + 1
+
+        lcp[rank[idx]] = common_length
+
+        if common_length > 0:
+            common_length = common_length - 1
+
+    return lcp
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_unique_prefix_lengths(ids : list) -> list:
+    """for every position p, the length of the shortest prefix of ids[p:] which
+    occurs only once in ids[p:], as found by check_results.get_unique_list_token
+
+    The suffixes are kept in a list ordered by rank and the suffix p is removed
+    after its length is computed, so when p is reached the list holds the
+    suffixes starting at p or later and the longest prefix p shares with any
+    of them is its common prefix with one of its two neighbours.
+
+    Args:
+        ids (list): list of token ids
+
+    Returns:
+        list: shortest unique prefix length for each position
+    """
+    num_ids = len(ids)
+
+    suffix_array, rank = build_suffix_array(ids)
+    lcp = build_lcp_array(ids, suffix_array, rank)
+
+    previous_rank = list(range(-1, num_ids-1))
+    next_rank = list(range(1, num_ids+1))
+
+    unique_lengths = [0]*num_ids
+
+    for idx in range(num_ids):
+        position = rank[idx]
+        left = previous_rank[position]
+        right = next_rank[position]
+
+        common_length = 0
+        if left != -1:
+            common_length = lcp[position]
+        if right != num_ids:
+            common_length = max(common_length, lcp[right])
+
+        unique_lengths[idx] = common_length + 1
+
+        # remove the suffix, the common prefix of its neighbours is the smaller of the two
+        if right != num_ids:
+            lcp[right] = min(lcp[position], lcp[right]) if left != -1 else 0
+            previous_rank[right] = left
+        if left != -1:
+            next_rank[left] = right
+
+    return unique_lengths
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class LinkedTokenList:
+    """
+    List of token ids from which sublists are removed, searched as if the
+    remaining tokens were concatenated. Each id keeps the positions where it
+    occurs so a search only starts at the occurrences of the rarest id of the
+    sublist.
+    """
+
+    def __init__(self,
+                 ids : list):
+
+        num_ids = len(ids)
+
+        self.ids = ids
+        self.previous = list(range(-1, num_ids-1))
+        self.next = list(range(1, num_ids+1))
+        self.alive = [True]*num_ids
+
+        self.positions = {}
+        for idx, token_id in enumerate(ids):
+            self.positions.setdefault(token_id, []).append(idx)
+
+        # index of the first live position of each id
+        self.first_position = dict.fromkeys(self.positions, 0)
+        self.counts = Counter(ids)
+
+    def matches_at(self,
+                   idx : int,
+                   sub_list : list) -> bool:
+
+        for token_id in sub_list:
+            if idx >= len(self.ids) or self.ids[idx] != token_id:
+                return False
+            idx = self.next[idx]
+
+        return True
+
+    def find(self,
+             sub_list : list) -> int:
+        """first position of sub_list in the remaining tokens
+
+        Args:
+            sub_list (list): token ids being searched for
+
+        Returns:
+            int: index of the first token of the match, -1 if not found
+        """
+        for token_id, count in Counter(sub_list).items():
+            if self.counts[token_id] < count:
+                return -1
+
+        # the rarest id of the sub_list has the fewest positions to try
+        anchor_offset = min(range(len(sub_list)), key=lambda offset: self.counts[sub_list[offset]])
+        anchor_id = sub_list[anchor_offset]
+
+        positions = self.positions[anchor_id]
+
+        # skip the removed positions at the start of the list
+        first_position = self.first_position[anchor_id]
+        while first_position < len(positions) and not self.alive[positions[first_position]]:
+            first_position = first_position + 1
+        self.first_position[anchor_id] = first_position
+
+        for position in positions[first_position:]:
+            if not self.alive[position]:
+                continue
+
+            start_idx = position
+            for _ in range(anchor_offset):
+                start_idx = self.previous[start_idx]
+                if start_idx == -1:
+                    break
+
+            if start_idx != -1 and self.matches_at(start_idx, sub_list):
+                return start_idx
+
+        return -1
+
+    def remove(self,
+               start_idx : int,
+               length : int) -> None:
+        """remove length tokens starting at start_idx
+        """
+        before_idx = self.previous[start_idx]
+
+        idx = start_idx
+        for _ in range(length):
+            self.alive[idx] = False
+            self.counts[self.ids[idx]] = self.counts[self.ids[idx]] - 1
+            idx = self.next[idx]
+
+        if before_idx != -1:
+            self.next[before_idx] = idx
+        if idx < len(self.ids):
+            self.previous[idx] = before_idx
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def get_multiset_residuals(list_1 : list,
+                           list_2 : list) -> (list, list):
+    """same result as check_results.get_residuals using counts instead of list.remove
+
+    Args:
+        list_1 (list): tokens which are cancelled against list_2 in order
+        list_2 (list): tokens cancelled from the front
+
+    Returns:
+        (list, list): the tokens of list_1 not in list_2 and the remaining tokens of list_2
+    """
+    available = Counter(list_2)
+
+    residual_1 = []
+    for item in list_1:
+        if available[item] > 0:
+            available[item] = available[item] - 1
+        else:
+            residual_1.append(item)
+
+    # the first occurrences of each item in list_2 were cancelled
+    cancelled = Counter(list_2)
+    cancelled.subtract(available)
+
+    residual_2 = []
+    for item in list_2:
+        if cancelled[item] > 0:
+            cancelled[item] = cancelled[item] - 1
+        else:
+            residual_2.append(item)
+
+    return residual_1, residual_2
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def align_token_lists(list_1 : list,
+                      list_2 : list) -> (list, list):
+    """same result as check_results.compare_lists in near linear time. list_1 is
+    cut into the shortest prefixes which are unique in the rest of list_1, each
+    is removed from its first occurrence in list_2 and the prefixes which are
+    not found are compared with what is left of list_2.
+
+    Args:
+        list_1 (list): first list to be compared
+        list_2 (list): second list to be compared
+
+    Returns:
+        (list, list): tokens of list_1 missing from list_2 and extra tokens of list_2
+    """
+    ids_1, ids_2 = get_token_ids(list_1, list_2)
+
+    unique_lengths = get_unique_prefix_lengths(ids_1)
+    remaining_2 = LinkedTokenList(ids_2)
+
+    list_1_missed = []
+
+    idx = 0
+    while idx < len(ids_1):
+        length = unique_lengths[idx]
+        unique_sub_list = ids_1[idx:idx+length]
+
+        start_idx = remaining_2.find(unique_sub_list)
+
+        if start_idx == -1:
+            list_1_missed.extend(list_1[idx:idx+length])
+        else:
+            remaining_2.remove(start_idx, length)
+
+        idx = idx + length
+
+    remaining_list_2 = [list_2[idx] for idx in range(len(list_2)) if remaining_2.alive[idx]]
+
+    return get_multiset_residuals(list_1_missed, remaining_list_2)
@@ -0,0 +1,208 @@
+import cProfile
+import glob
+import json
+import os
+import pstats
+import tracemalloc
+import zlib
+
+from contextlib import contextmanager
+
+# number of allocation sites kept per document and in the merged report
+NUM_TOP_ALLOCATIONS = 30
+
+# files written by the workers for each profiled document
+PROFILE_FILE_PATTERN = 'doc_*.prof'
+ALLOCATION_FILE_PATTERN = 'doc_*.alloc.json'
+
+MERGED_PROFILE_FILE_NAME = 'merged.prof'
+ALLOCATION_REPORT_FILE_NAME = 'allocations.txt'
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class WorkerProfiler:
+    """
+    Profiles the extraction and analysis of a document inside the worker
+    process which runs them. A sampled document is run under cProfile and
+    tracemalloc, and its pstats file and top allocation sites are written to
+    profile_dir for merge_profiles and merge_allocations to combine.
+
+    Documents are sampled from a hash of their file path, so the same ones are
+    profiled whichever worker gets them and from one run to the next.
+    """
+
+    def __init__(self,
+                 profile_dir : str,
+                 sample_fraction : float = 1.,
+                 num_top_allocations : int = NUM_TOP_ALLOCATIONS):
+
+        self.profile_dir = profile_dir
+        self.sample_fraction = sample_fraction
+        self.num_top_allocations = num_top_allocations
+
+        self.num_profiled = 0
+
+    def prepare(self) -> None:
+        """create the profile directory and remove the files of a previous run,
+        called in the parent before the workers start
+        """
+        os.makedirs(self.profile_dir, exist_ok=True)
+
+        for pattern in [PROFILE_FILE_PATTERN, ALLOCATION_FILE_PATTERN]:
+            for file_path in glob.glob(os.path.join(self.profile_dir, pattern)):
+                os.remove(file_path)
+
+    def is_sampled(self,
+                   file_path : str) -> bool:
+
+        return zlib.crc32(file_path.encode('UTF-8'))/2**32 < self.sample_fraction
+
+    @contextmanager
+    def profile(self,
+                file_path : str):
+        """profile the body of a with statement if file_path is sampled
+
+        Args:
+            file_path (str): file path to the pdf being processed
+        """
+        if not self.is_sampled(file_path):
+            yield
+            return
+
+        profiler = cProfile.Profile()
+
+        tracemalloc.start()
+        profiler.enable()
+
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_size = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.save(file_path, profiler, snapshot, peak_size)
+
+    def save(self,
+             file_path : str,
+             profiler : cProfile.Profile,
+             snapshot : tracemalloc.Snapshot,
+             peak_size : int) -> None:
+        """write the profile and the top allocation sites of a document
+
+        Args:
+            file_path (str): file path to the pdf which was profiled
+            profiler (cProfile.Profile): CPU profile of the document
+            snapshot (tracemalloc.Snapshot): memory still allocated at the end of the document
+            peak_size (int): largest traced memory while processing the document
+        """
+        file_name = f'doc_{os.getpid()}_{self.num_profiled}'
+        self.num_profiled = self.num_profiled + 1
+
+        profiler.dump_stats(os.path.join(self.profile_dir, file_name + '.prof'))
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                                           tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')])
+
+        allocations = [{'location' : f'{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}',
+                        'size' : statistic.size,
+                        'count' : statistic.count}
+                       for statistic in snapshot.statistics('lineno')[:self.num_top_allocations]]
+
+        with open(os.path.join(self.profile_dir, file_name + '.alloc.json'), 'w+', encoding='UTF-8') as output_file:
+            json.dump({'file_path' : file_path,
+                       'peak_size' : peak_size,
+                       'allocations' : allocations}, output_file)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def merge_profiles(profile_dir : str) -> pstats.Stats:
+    """merge the profiles of all the documents into profile_dir/merged.prof
+
+    Args:
+        profile_dir (str): directory the workers wrote their profiles to
+
+    Returns:
+        pstats.Stats: merged profile, None if no document was profiled
+    """
+    profile_paths = sorted(glob.glob(os.path.join(profile_dir, PROFILE_FILE_PATTERN)))
+
+    if len(profile_paths) == 0:
+        return None
+
+    merged_profile_path = os.path.join(profile_dir, MERGED_PROFILE_FILE_NAME)
+
+    pstats.Stats(*profile_paths).dump_stats(merged_profile_path)
+
+    # reloaded so the listing names the merged file and not every document
+    return pstats.Stats(merged_profile_path)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def merge_allocations(profile_dir : str,
+                      num_top_allocations : int = NUM_TOP_ALLOCATIONS) -> (list, list):
+    """add up the allocation sites of all the documents
+
+    Args:
+        profile_dir (str): directory the workers wrote their allocations to
+        num_top_allocations (int): number of allocation sites and documents returned
+
+    Returns:
+        (list, list): (location, size, count) of the largest allocation sites and
+            (peak size, file path) of the documents with the largest peak
+    """
+    sizes = {}
+    counts = {}
+    peak_sizes = []
+
+    for allocation_path in glob.glob(os.path.join(profile_dir, ALLOCATION_FILE_PATTERN)):
+        with open(allocation_path, 'r', encoding='UTF-8') as input_file:
+            document_allocations = json.load(input_file)
+
+        peak_sizes.append((document_allocations['peak_size'], document_allocations['file_path']))
+
+        for allocation in document_allocations['allocations']:
+            location = allocation['location']
+            sizes[location] = sizes.get(location, 0) + allocation['size']
+            counts[location] = counts.get(location, 0) + allocation['count']
+
+    top_allocations = sorted(((location, size, counts[location]) for location, size in sizes.items()),
+                             key=lambda allocation: allocation[1], reverse=True)
+
+    peak_sizes.sort(reverse=True)
+
+    return top_allocations[:num_top_allocations], peak_sizes[:num_top_allocations]
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def write_allocation_report(profile_dir : str,
+                            num_top_allocations : int = NUM_TOP_ALLOCATIONS) -> str:
+    """write the merged allocation sites and the documents with the largest
+    peak memory to profile_dir/allocations.txt
+
+    Args:
+        profile_dir (str): directory the workers wrote their allocations to
+        num_top_allocations (int): number of allocation sites and documents listed
+
+    Returns:
+        str: path to the report
+    """
+    top_allocations, peak_sizes = merge_allocations(profile_dir, num_top_allocations)
+
+    report_path = os.path.join(profile_dir, ALLOCATION_REPORT_FILE_NAME)
+
+    with open(report_path, 'w+', encoding='UTF-8') as output_file:
+        output_file.write('memory still allocated at the end of each document, summed over the documents\n')
+        output_file.write(f'{"size KiB":>12}{"count":>10}  location\n')
+        for location, size, count in top_allocations:
+            output_file.write(f'{size/1024:>12.1f}{count:>10}  {location}\n')
+
+        output_file.write('\nlargest peak traced memory\n')
+        output_file.write(f'{"peak KiB":>12}  file_path\n')
+        for peak_size, file_path in peak_sizes:
+            output_file.write(f'{peak_size/1024:>12.1f}  {file_path}\n')
+
+    return report_path